@@ -0,0 +1,172 @@
+"""Reading files out of a local (Finder) iPhone backup.
+
+A backup stores every file at `{fileID[:2]}/{fileID}`, where the fileID is
+a hash of the file's domain and relative path, and Manifest.db maps one to
+the other.  Manifest.db has a row for every file on the phone -- hundreds of
+thousands -- and usually sits on an external drive, so the extractors here
+don't query it directly.  The first run copies its
+
+    (domain, relativePath) -> fileID
+
+columns into an indexed SQLite file in the user cache, and later runs read
+that until Manifest.db's size or mtime changes (i.e. there's a new backup).
+
+Databases inside the backup are opened read-only with `immutable=1`: SQLite
+then takes no locks and never creates -journal/-shm files beside them, so
+there's no need to copy them out before querying.
+
+Shared by the scripts in the directories beside this one, which put this
+directory on `sys.path` themselves (they're run as plain files by `uv run`).
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import typing as ty
+from contextlib import closing
+from pathlib import Path
+
+_INDEX_VERSION = 1
+_UUID = re.compile(r"[0-9A-F]{8}-[0-9A-F]{4}-[0-9A-F]{4}-[0-9A-F]{4}-[0-9A-F]{12}", re.IGNORECASE)
+
+
+def connect_read_only(db: Path) -> sqlite3.Connection:
+    return sqlite3.connect(f"{db.resolve().as_uri()}?mode=ro&immutable=1", uri=True)
+
+
+def cache_dir(*parts: str) -> Path:
+    # Deliberately a copy of tools.cache.cache_dir (same place, same layout) rather
+    # than an import of it: these scripts run standalone under `uv run` and don't
+    # install the package.
+    base = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    return base.joinpath("tools", "ios-backup", *parts)
+
+
+def default_index_path(backup_root: Path) -> Path:
+    key = hashlib.sha256(str(backup_root.resolve()).encode()).hexdigest()[:16]
+    return cache_dir(f"{key}.sqlite")
+
+
+class BackupFile(ty.NamedTuple):
+    domain: str
+    relpath: str
+    file_id: str
+
+
+# ---------------------------------------------------------------------------
+# Index
+# ---------------------------------------------------------------------------
+
+
+def _manifest_stamp(manifest: Path) -> str:
+    st = manifest.stat()
+    return f"{_INDEX_VERSION}:{st.st_size}:{st.st_mtime_ns}"
+
+
+def _index_stamp(index_path: Path) -> str | None:
+    try:
+        with closing(connect_read_only(index_path)) as db:
+            row = db.execute("SELECT value FROM meta WHERE key = 'stamp'").fetchone()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+
+def _build_index(manifest: Path, index_path: Path, stamp: str) -> None:
+    print("Indexing Manifest.db…")
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = index_path.with_suffix(".tmp")
+    tmp.unlink(missing_ok=True)
+    with closing(connect_read_only(manifest)) as src, closing(sqlite3.connect(tmp)) as db:
+        db.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        db.execute(
+            "CREATE TABLE files (domain TEXT, relpath TEXT, file_id TEXT, PRIMARY KEY (domain, relpath))"
+            " WITHOUT ROWID"
+        )
+        # not the `file` column: that's a plist blob per row, most of Manifest.db's size
+        db.executemany(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?)",
+            src.execute("SELECT domain, relativePath, fileID FROM Files"),
+        )
+        db.execute("INSERT INTO meta VALUES ('stamp', ?)", (stamp,))
+        db.commit()
+    tmp.replace(index_path)
+
+
+class Backup:
+    def __init__(self, root: Path, *, index_path: Path | None = None) -> None:
+        self.root = root
+        self.manifest = root / "Manifest.db"
+        if not self.manifest.exists():
+            raise OSError(f"Manifest.db not found at {self.manifest}")
+        index_path = index_path or default_index_path(root)
+        stamp = _manifest_stamp(self.manifest)
+        if _index_stamp(index_path) != stamp:
+            _build_index(self.manifest, index_path, stamp)
+        self._index = connect_read_only(index_path)
+
+    def close(self) -> None:
+        self._index.close()
+
+    def __enter__(self) -> ty.Self:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+    def path(self, file_id: str) -> Path:
+        """Where a fileID is on disk: under a two-character subfolder, or (in
+        some older backups) directly in the root."""
+        p = self.root / file_id[:2] / file_id
+        if not p.exists() and (flat := self.root / file_id).exists():
+            return flat
+        return p
+
+    def file_id(self, domain: str, relpath: str) -> str | None:
+        row = self._index.execute(
+            "SELECT file_id FROM files WHERE domain = ? AND relpath = ?", (domain, relpath)
+        ).fetchone()
+        return row[0] if row else None
+
+    def files(self, domain: str) -> dict[str, str]:
+        """relpath -> fileID for everything in `domain`, in relpath order."""
+        rows = self._index.execute(
+            "SELECT relpath, file_id FROM files WHERE domain = ? ORDER BY relpath", (domain,)
+        )
+        return dict(rows)
+
+    def find(self, relpath_suffix: str) -> list[BackupFile]:
+        """Every file, in any domain, whose relpath ends with `relpath_suffix`."""
+        rows = self._index.execute(
+            "SELECT domain, relpath, file_id FROM files WHERE substr(relpath, -?) = ?",
+            (len(relpath_suffix), relpath_suffix),
+        )
+        return [BackupFile(*row) for row in rows]
+
+    def resolve_uuids(
+        self, domain: str, uuids: ty.Iterable[str], *, relpath_suffix: str = ""
+    ) -> dict[str, BackupFile]:
+        """Maps each UUID to the first file (in relpath order) in `domain`
+        whose relpath contains it and ends with `relpath_suffix`.
+
+        One pass over the domain, rather than a `LIKE '%uuid%'` scan of it
+        per UUID; UUIDs match case-insensitively, as LIKE does."""
+        wanted = {uuid.upper(): uuid for uuid in uuids}
+        resolved: dict[str, BackupFile] = {}
+        for relpath, file_id in self.files(domain).items():
+            if not relpath.endswith(relpath_suffix):
+                continue
+            for m in _UUID.finditer(relpath):
+                uuid = wanted.get(m[0].upper())
+                if uuid is not None and uuid not in resolved:
+                    resolved[uuid] = BackupFile(domain, relpath, file_id)
+        return resolved
+
+    def connect(self, domain: str, relpath: str) -> sqlite3.Connection | None:
+        """A read-only connection to a SQLite database in the backup, or None
+        if the backup hasn't got it."""
+        file_id = self.file_id(domain, relpath)
+        if file_id is None:
+            return None
+        return connect_read_only(self.path(file_id))
@@ -1,22 +1,21 @@
 #!/usr/bin/env -S uv run python
 
 import re
-import shutil
 import sqlite3
-import tempfile
+import sys
 import typing as ty
+from contextlib import closing
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from backup import Backup
+from export import export_files
+
 _NOTES_DOMAIN = "AppDomainGroup-group.com.apple.notes"
 _CORE_DATA_EPOCH = datetime(2001, 1, 1, tzinfo=timezone.utc)
 
 
-def _backup_abspath_for_file_id(backup_root: Path, file_id: str) -> Path:
-    """In iPhone backups, files are stored at {first_two_chars_of_hash}/{hash}."""
-    return backup_root / file_id[:2] / file_id
-
-
 def _sanitize(name: str) -> str:
     return re.sub(r"[^\w\s\-\.,()]", "", name).strip()
 
@@ -34,9 +33,9 @@ class _Recording(ty.NamedTuple):
     filename: str
 
 
-def _find_recordings_in_notestore(notestore_path: Path) -> list[_Recording]:
+def _find_recordings_in_notestore(notestore: sqlite3.Connection) -> list[_Recording]:
     """Query NoteStore.sqlite for actual audio attachments (not the 0-duration stubs)."""
-    with sqlite3.connect(str(notestore_path)) as conn:
+    with closing(notestore) as conn:
         rows = conn.execute(
             """
             SELECT
@@ -61,24 +60,6 @@ def _find_recordings_in_notestore(notestore_path: Path) -> list[_Recording]:
     ]
 
 
-def _resolve_backup_path(media_uuid: str, manifest_db: sqlite3.Connection) -> tuple[str, str] | None:
-    """Find the actual audio file in Manifest.db by media UUID."""
-    row = manifest_db.execute(
-        """
-        SELECT fileID, relativePath FROM Files
-        WHERE domain = ?
-          AND relativePath LIKE ?
-          AND relativePath LIKE '%audio.MOV'
-        """,
-        (_NOTES_DOMAIN, f"%{media_uuid}%"),
-    ).fetchone()
-    if not row:
-        return None
-    file_id: str = row[0]
-    relpath: str = row[1]
-    return file_id, relpath
-
-
 def _derive_friendly_name(rec: _Recording) -> str:
     parts = []
     if rec.note_title:
@@ -90,61 +71,55 @@ def _derive_friendly_name(rec: _Recording) -> str:
     return " ".join(parts) + ".m4a"
 
 
-def main(backup_root: Path, output_dir: Path) -> None:
-    manifest = backup_root / "Manifest.db"
-    if not manifest.exists():
-        raise EnvironmentError(f"Manifest.db not found at {manifest}")
-
+def main(backup_root: Path, output_dir: Path, jobs: int = 4) -> None:
     output_dir.mkdir(exist_ok=True, parents=True)
 
-    manifest_db = sqlite3.connect(str(manifest))
-
-    # extract NoteStore.sqlite to a temp file for querying
-    row = manifest_db.execute(
-        "SELECT fileID FROM Files WHERE domain = ? AND relativePath = 'NoteStore.sqlite'",
-        (_NOTES_DOMAIN,),
-    ).fetchone()
-    if not row:
-        print("NoteStore.sqlite not found in backup.")
-        return
-
-    notestore_src = _backup_abspath_for_file_id(backup_root, row[0])
-    with tempfile.NamedTemporaryFile(suffix=".sqlite", delete=False) as tmp:
-        tmp_path = Path(tmp.name)
-        shutil.copy2(notestore_src, tmp_path)
-        recordings = _find_recordings_in_notestore(tmp_path)
-        tmp_path.unlink()
-
-    if not recordings:
-        print("No call recordings found in NoteStore.")
-        return
+    with Backup(backup_root) as backup:
+        notestore = backup.connect(_NOTES_DOMAIN, "NoteStore.sqlite")
+        if not notestore:
+            print("NoteStore.sqlite not found in backup.")
+            return
+        recordings = _find_recordings_in_notestore(notestore)
+        if not recordings:
+            print("No call recordings found in NoteStore.")
+            return
+        resolved = backup.resolve_uuids(
+            _NOTES_DOMAIN, (rec.media_uuid for rec in recordings), relpath_suffix="audio.MOV"
+        )
 
     print(f"Found {len(recordings)} call recordings.\n")
 
+    to_export: list[tuple[Path, Path]] = []
+    taken: set[Path] = set()
     for rec in recordings:
-        resolved = _resolve_backup_path(rec.media_uuid, manifest_db)
-        if not resolved:
+        found = resolved.get(rec.media_uuid)
+        if not found:
             print(f"  MISSING from backup: {rec.note_title} ({rec.duration / 60:.0f}min)")
             continue
 
-        file_id, relpath = resolved
-        src = _backup_abspath_for_file_id(backup_root, file_id)
+        src = backup.path(found.file_id)
         if not src.exists():
-            print(f"  WARNING: file missing on disk: {relpath}")
+            print(f"  WARNING: file missing on disk: {found.relpath}")
             continue
 
         friendly = _derive_friendly_name(rec)
         dest = output_dir / friendly
 
-        if dest.exists():
+        # numbered apart from this run's other recordings, not from what's on
+        # disk: a re-run should find each recording where the last run put it
+        if dest in taken:
             stem, suffix = dest.stem, dest.suffix
             i = 2
-            while dest.exists():
+            while dest in taken:
                 dest = output_dir / f"{stem} ({i}){suffix}"
                 i += 1
 
         print(f"  {friendly}")
-        shutil.copy2(src, dest)
+        taken.add(dest)
+        to_export.append((src, dest))
+
+    print()
+    export_files(to_export, jobs=jobs)
 
     print(f"\nDone. Extracted to: {output_dir.resolve()}")
 
@@ -155,6 +130,7 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("backup_root", type=Path)
     parser.add_argument("output_dir", type=Path)
+    parser.add_argument("--jobs", type=int, default=4, help="files to copy at once")
     args = parser.parse_args()
 
-    main(args.backup_root, args.output_dir)
+    main(args.backup_root, args.output_dir, args.jobs)
@@ -0,0 +1,142 @@
+"""Copying files out of a backup, as fast as the disks allow.
+
+Backups usually live on an external drive, so the copy is bound by its
+bandwidth and latency, not by Python -- as long as Python stays out of the
+data path and more than one file is in flight.  So files are copied on a
+small thread pool, each one by the cheapest means available:
+
+  same filesystem   a reflink (clonefile on APFS, FICLONE on btrfs/XFS),
+                    which shares the blocks and copies nothing; failing
+                    that, copy_file_range, which copies in the kernel
+  otherwise         shutil.copyfile (fcopyfile/sendfile under the hood)
+
+A target that already has the source's size and mtime is left alone, so
+re-running an export only copies what's new.  Files are copied to a temp
+name and renamed into place, so an interrupted run never leaves a
+truncated file that looks finished.
+"""
+
+import errno
+import os
+import shutil
+import sys
+import time
+import typing as ty
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# FAT/exFAT drives keep mtimes to 2s
+_MTIME_SLACK = 2.0
+_CHUNK_SIZE = 64 << 20
+_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTTY, errno.EBADF}
+
+
+class Exported(ty.NamedTuple):
+    copied: int
+    skipped: int
+    bytes_copied: int
+    seconds: float
+
+    @property
+    def mb_per_s(self) -> float:
+        return self.bytes_copied / 1e6 / self.seconds if self.seconds else 0.0
+
+
+# ---------------------------------------------------------------------------
+# Copying one file
+# ---------------------------------------------------------------------------
+
+if sys.platform == "darwin":
+    import ctypes
+
+    _libc = ctypes.CDLL(None, use_errno=True)
+
+    def _clone(src: Path, dst: Path) -> bool:
+        return bool(_libc.clonefile(os.fsencode(src), os.fsencode(dst), 0) == 0)
+
+elif sys.platform == "linux":
+    import fcntl
+
+    _FICLONE = 0x40049409
+
+    def _clone(src: Path, dst: Path) -> bool:
+        with src.open("rb") as fsrc, dst.open("wb") as fdst:
+            try:
+                fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+            except OSError:
+                return False
+        return True
+
+else:
+
+    def _clone(src: Path, dst: Path) -> bool:
+        return False
+
+
+def _copy_file_range(src: Path, dst: Path) -> bool:
+    if not hasattr(os, "copy_file_range"):
+        return False
+    with src.open("rb") as fsrc, dst.open("wb") as fdst:
+        try:
+            while os.copy_file_range(fsrc.fileno(), fdst.fileno(), _CHUNK_SIZE):
+                pass
+        except OSError as e:
+            if e.errno in _UNSUPPORTED:
+                return False
+            raise
+    return True
+
+
+def _unchanged(src: os.stat_result, dst: Path) -> bool:
+    try:
+        st = dst.stat()
+    except FileNotFoundError:
+        return False
+    return st.st_size == src.st_size and abs(st.st_mtime - src.st_mtime) < _MTIME_SLACK
+
+
+def export_file(src: Path, dst: Path) -> bool:
+    """Copies `src` to `dst` with its mode and times, unless `dst` already
+    has the same size and mtime; True if it copied."""
+    st = src.stat()
+    if _unchanged(st, dst):
+        return False
+    tmp = dst.with_name(f".{dst.name}.export")
+    tmp.unlink(missing_ok=True)
+    try:
+        if st.st_dev != dst.parent.stat().st_dev or not (_clone(src, tmp) or _copy_file_range(src, tmp)):
+            shutil.copyfile(src, tmp)
+        shutil.copystat(src, tmp)
+        tmp.replace(dst)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Copying many
+# ---------------------------------------------------------------------------
+
+
+def export_files(pairs: ty.Iterable[tuple[Path, Path]], *, jobs: int = 4) -> Exported:
+    """Copies each (src, dst) with `export_file`, `jobs` at a time, and
+    prints the throughput."""
+    pairs = list(pairs)
+    start = time.monotonic()
+
+    def export(pair: tuple[Path, Path]) -> int:
+        src, dst = pair
+        return src.stat().st_size if export_file(src, dst) else -1
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        sizes = list(pool.map(export, pairs))
+
+    copied = [size for size in sizes if size >= 0]
+    exported = Exported(len(copied), len(sizes) - len(copied), sum(copied), time.monotonic() - start)
+    print(
+        f"Copied {exported.copied} file(s), {exported.bytes_copied / 1e6:.0f} MB in"
+        f" {exported.seconds:.1f}s ({exported.mb_per_s:.0f} MB/s);"
+        f" {exported.skipped} already up to date."
+    )
+    return exported
@@ -1,44 +1,29 @@
 #!/usr/bin/env -S uv run python
 import os
 import sqlite3
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from backup import Backup, connect_read_only
 
-def _hashed_path(backup_root: Path, file_id: str) -> Path:
-    """Map a fileID (40-char SHA1) to its on-disk path in the backup."""
-    p = backup_root / file_id[:2] / file_id
-    if p.exists():
-        return p
-    # Some backups don't use subfolders
-    p2 = backup_root / file_id
-    if p2.exists():
-        return p2
-    raise FileNotFoundError(f"Cannot find file for {file_id}")
 
-
-def _find_addressbook_db(backup_root: Path) -> Path:
+def _connect_addressbook_db(backup_root: Path) -> sqlite3.Connection:
     """Locate AddressBook.sqlitedb in a Finder/iTunes backup."""
-    manifest = backup_root / "Manifest.db"
-    conn = sqlite3.connect(manifest)
-    row = conn.execute(
-        """
-        SELECT fileID, relativePath
-        FROM Files
-        WHERE relativePath LIKE '%AddressBook.sqlitedb'
-    """
-    ).fetchone()
-    conn.close()
-    if not row:
-        raise FileNotFoundError("AddressBook.sqlitedb not found in Manifest.db")
-    file_id, relpath = row
-    db_path = _hashed_path(backup_root, file_id)
+    with Backup(backup_root) as backup:
+        found = backup.find("AddressBook.sqlitedb")
+        if not found:
+            raise FileNotFoundError("AddressBook.sqlitedb not found in Manifest.db")
+        _domain, relpath, file_id = found[0]
+        db_path = backup.path(file_id)
+        if not db_path.exists():
+            raise FileNotFoundError(f"Cannot find file for {file_id}")
     print(f"Found AddressBook: {relpath} (fileID={file_id}) -> {db_path}")
-    return db_path
+    return connect_read_only(db_path)
 
 
-def _build_contact_mapping(addressbook_db: Path) -> dict[str, str]:
+def _build_contact_mapping(conn: sqlite3.Connection) -> dict[str, str]:
     """Return mapping from phone/email to display name."""
-    conn = sqlite3.connect(addressbook_db)
     cur = conn.cursor()
     rows = cur.execute(
         """
@@ -85,8 +70,7 @@ def _rename_exports(
 
 
 def main(backup_root: Path, export_dir: Path, ext: str, apply: bool = False) -> None:
-    addressbook_db = _find_addressbook_db(backup_root)
-    mapping = _build_contact_mapping(addressbook_db)
+    mapping = _build_contact_mapping(_connect_addressbook_db(backup_root))
     _rename_exports(export_dir, mapping, ext, dry_run=not apply)
 
 
@@ -0,0 +1,63 @@
+import hashlib
+import sqlite3
+import sys
+import typing as ty
+from contextlib import closing
+from pathlib import Path
+
+import pytest
+
+# the scripts are run as plain files, and put this directory on sys.path themselves
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+BackupFiles = dict[tuple[str, str], bytes | None]
+"""(domain, relativePath) -> contents, or None for a file Manifest.db lists
+but the backup hasn't got (an interrupted backup)"""
+
+
+def file_id(domain: str, relpath: str) -> str:
+    return hashlib.sha1(f"{domain}-{relpath}".encode()).hexdigest()
+
+
+def _write_backup(root: Path, files: BackupFiles) -> None:
+    """(Re)writes a Finder-style backup: Manifest.db, and each file at
+    {fileID[:2]}/{fileID}.  Files whose contents haven't changed are left
+    alone, as a real incremental backup leaves them."""
+    root.mkdir(parents=True, exist_ok=True)
+    manifest = root / "Manifest.db"
+    manifest.unlink(missing_ok=True)
+    with closing(sqlite3.connect(manifest)) as db:
+        db.execute(
+            "CREATE TABLE Files"
+            " (fileID TEXT PRIMARY KEY, domain TEXT, relativePath TEXT, flags INTEGER, file BLOB)"
+        )
+        db.executemany(
+            "INSERT INTO Files VALUES (?, ?, ?, 1, NULL)", ((file_id(d, r), d, r) for d, r in files)
+        )
+        db.commit()
+
+    present = {file_id(d, r): content for (d, r), content in files.items() if content is not None}
+    for stale in root.glob("??/*"):
+        if stale.name not in present:
+            stale.unlink()
+    for fid, content in present.items():
+        blob = root / fid[:2] / fid
+        if not blob.exists() or blob.read_bytes() != content:
+            blob.parent.mkdir(exist_ok=True)
+            blob.write_bytes(content)
+
+
+@pytest.fixture(autouse=True)
+def _cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+
+
+@pytest.fixture
+def make_backup(tmp_path: Path) -> ty.Callable[[BackupFiles], Path]:
+    root = tmp_path / "backup"
+
+    def make(files: BackupFiles) -> Path:
+        _write_backup(root, files)
+        return root
+
+    return make
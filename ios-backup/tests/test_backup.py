@@ -0,0 +1,88 @@
+import typing as ty
+from pathlib import Path
+from unittest.mock import patch
+
+import backup as backup_mod
+import pytest
+from backup import Backup, BackupFile
+from conftest import BackupFiles, file_id
+
+_DOMAIN = "AppDomainGroup-group.com.apple.VoiceMemos.shared"
+_UUID = "0A1B2C3D-4E5F-6071-8293-A4B5C6D7E8F9"
+
+MakeBackup = ty.Callable[[BackupFiles], Path]
+
+
+def test_files_lists_a_domain_in_relpath_order(make_backup: MakeBackup) -> None:
+    root = make_backup(
+        {
+            (_DOMAIN, "Recordings/b.m4a"): b"b",
+            (_DOMAIN, "Recordings/a.m4a"): b"a",
+            ("HomeDomain", "Library/other"): b"x",
+        }
+    )
+
+    with Backup(root) as backup:
+        files = backup.files(_DOMAIN)
+
+    assert files == {
+        "Recordings/a.m4a": file_id(_DOMAIN, "Recordings/a.m4a"),
+        "Recordings/b.m4a": file_id(_DOMAIN, "Recordings/b.m4a"),
+    }
+
+
+def test_index_is_reused_until_the_manifest_changes(make_backup: MakeBackup) -> None:
+    root = make_backup({(_DOMAIN, "a.m4a"): b"a"})
+    Backup(root).close()
+
+    with patch.object(backup_mod, "_build_index", side_effect=AssertionError("re-indexed")):
+        Backup(root).close()
+
+    make_backup({(_DOMAIN, "a.m4a"): b"a", (_DOMAIN, "b.m4a"): b"b"})
+    with Backup(root) as backup:
+        assert backup.file_id(_DOMAIN, "b.m4a") == file_id(_DOMAIN, "b.m4a")
+
+
+def test_missing_manifest_is_an_os_error(tmp_path: Path) -> None:
+    with pytest.raises(OSError, match="Manifest.db not found"):
+        Backup(tmp_path)
+
+
+def test_path_falls_back_to_a_flat_layout(make_backup: MakeBackup) -> None:
+    root = make_backup({(_DOMAIN, "a.m4a"): b"a"})
+    fid = file_id(_DOMAIN, "a.m4a")
+    (root / fid[:2] / fid).rename(root / fid)
+
+    with Backup(root) as backup:
+        assert backup.path(fid) == root / fid
+
+
+def test_find_matches_a_relpath_suffix_in_any_domain(make_backup: MakeBackup) -> None:
+    root = make_backup({(_DOMAIN, "x/NoteStore.sqlite"): b"", ("HomeDomain", "NoteStore.sqlite-wal"): b""})
+
+    with Backup(root) as backup:
+        found = backup.find("NoteStore.sqlite")
+
+    assert found == [BackupFile(_DOMAIN, "x/NoteStore.sqlite", file_id(_DOMAIN, "x/NoteStore.sqlite"))]
+
+
+def test_resolve_uuids_matches_case_insensitively_and_by_suffix(make_backup: MakeBackup) -> None:
+    root = make_backup(
+        {
+            (_DOMAIN, f"Media/{_UUID.lower()}/Preview.png"): b"",
+            (_DOMAIN, f"Media/{_UUID.lower()}/call.m4a"): b"",
+        }
+    )
+
+    with Backup(root) as backup:
+        resolved = backup.resolve_uuids(_DOMAIN, [_UUID, "not-there"], relpath_suffix=".m4a")
+
+    relpath = f"Media/{_UUID.lower()}/call.m4a"
+    assert resolved == {_UUID: BackupFile(_DOMAIN, relpath, file_id(_DOMAIN, relpath))}
+
+
+def test_connect_is_none_for_a_database_the_backup_hasnt_got(make_backup: MakeBackup) -> None:
+    root = make_backup({(_DOMAIN, "a.m4a"): b"a"})
+
+    with Backup(root) as backup:
+        assert backup.connect(_DOMAIN, "Recordings/CloudRecordings.db") is None
@@ -0,0 +1,67 @@
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import export as export_mod
+import pytest
+from export import export_file, export_files
+
+
+def _source(tmp_path: Path, content: bytes = b"audio") -> Path:
+    src = tmp_path / "backup/ab/abcdef"
+    src.parent.mkdir(parents=True)
+    src.write_bytes(content)
+    os.utime(src, (1_700_000_000, 1_700_000_000))
+    return src
+
+
+def test_copies_contents_and_times(tmp_path: Path) -> None:
+    src, dst = _source(tmp_path), tmp_path / "memo.m4a"
+
+    assert export_file(src, dst)
+
+    assert dst.read_bytes() == b"audio"
+    assert dst.stat().st_mtime == src.stat().st_mtime
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["backup", "memo.m4a"]  # no temp left over
+
+
+def test_unchanged_target_is_not_copied_again(tmp_path: Path) -> None:
+    src, dst = _source(tmp_path), tmp_path / "memo.m4a"
+    export_file(src, dst)
+
+    with patch("shutil.copyfile", side_effect=AssertionError("copied")):
+        assert not export_file(src, dst)
+
+
+def test_changed_source_is_copied_again(tmp_path: Path) -> None:
+    src, dst = _source(tmp_path), tmp_path / "memo.m4a"
+    export_file(src, dst)
+    src.write_bytes(b"longer audio")
+
+    assert export_file(src, dst)
+    assert dst.read_bytes() == b"longer audio"
+
+
+def test_failed_copy_leaves_neither_target_nor_temp(tmp_path: Path) -> None:
+    src, dst = _source(tmp_path), tmp_path / "out/memo.m4a"
+    dst.parent.mkdir()
+
+    with (
+        patch.object(export_mod, "_clone", return_value=False),
+        patch.object(export_mod, "_copy_file_range", return_value=False),
+        patch("shutil.copyfile", side_effect=OSError("drive unplugged")),
+        pytest.raises(OSError, match="drive unplugged"),
+    ):
+        export_file(src, dst)
+
+    assert list(dst.parent.iterdir()) == []
+
+
+def test_export_files_counts_copied_and_skipped(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    src = _source(tmp_path)
+    export_file(src, tmp_path / "old.m4a")
+
+    exported = export_files([(src, tmp_path / "old.m4a"), (src, tmp_path / "new.m4a")], jobs=2)
+
+    assert (exported.copied, exported.skipped, exported.bytes_copied) == (1, 1, len(b"audio"))
+    assert "1 already up to date" in capsys.readouterr().out
@@ -0,0 +1,174 @@
+import importlib.util
+import plistlib
+import sqlite3
+import typing as ty
+from contextlib import closing
+from pathlib import Path
+from types import ModuleType
+from unittest.mock import patch
+
+import pytest
+from conftest import BackupFiles
+
+MakeBackup = ty.Callable[[BackupFiles], Path]
+
+_DOMAIN = "AppDomainGroup-group.com.apple.VoiceMemos.shared"
+
+
+def _load_extract() -> ModuleType:
+    # voice-memos/ isn't an importable package name
+    path = Path(__file__).resolve().parent.parent / "voice-memos/extract.py"
+    spec = importlib.util.spec_from_file_location("voice_memos_extract", path)
+    assert spec and spec.loader
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+extract = _load_extract()
+
+
+class _Memo(ty.NamedTuple):
+    audio: bytes | None
+    """None: listed in Manifest.db, but not in the backup"""
+    title: str = ""
+    plist_title: str | None = None
+    """set: the memo has a composition manifest.plist, with this title"""
+
+
+def _recordings_db(tmp_path: Path, memos: dict[str, _Memo]) -> bytes:
+    db_path = tmp_path / "CloudRecordings.db"
+    db_path.unlink(missing_ok=True)
+    with closing(sqlite3.connect(db_path)) as db:
+        db.execute("CREATE TABLE ZCLOUDRECORDING (ZPATH TEXT, ZENCRYPTEDTITLE TEXT)")
+        db.executemany(
+            "INSERT INTO ZCLOUDRECORDING VALUES (?, ?)", ((n, m.title) for n, m in memos.items())
+        )
+        db.commit()
+    return db_path.read_bytes()
+
+
+BackupMemos = ty.Callable[[dict[str, _Memo]], Path]
+
+
+@pytest.fixture
+def backup_memos(tmp_path: Path, make_backup: MakeBackup) -> BackupMemos:
+    def make(memos: dict[str, _Memo]) -> Path:
+        return make_backup(
+            {
+                (_DOMAIN, "Recordings/CloudRecordings.db"): _recordings_db(tmp_path, memos),
+                **{(_DOMAIN, f"Recordings/{name}"): memo.audio for name, memo in memos.items()},
+                **{
+                    (_DOMAIN, f"Recordings/{Path(name).stem}.composition/manifest.plist"): plistlib.dumps(
+                        {"RCSavedRecordingTitle": memo.plist_title}, fmt=plistlib.FMT_BINARY
+                    )
+                    for name, memo in memos.items()
+                    if memo.plist_title is not None
+                },
+            }
+        )
+
+    return make
+
+
+def _exported(output_dir: Path) -> list[str]:
+    return sorted(p.name for p in output_dir.iterdir())
+
+
+def test_memo_is_renamed_in_place_when_its_title_changes(tmp_path: Path, backup_memos: BackupMemos) -> None:
+    out = tmp_path / "out"
+    root = backup_memos({"20240101 120000.m4a": _Memo(b"audio", "Walk")})
+    extract.main(root, out, jobs=1)
+    inode = (out / "20240101 120000 Walk.m4a").stat().st_ino
+
+    backup_memos({"20240101 120000.m4a": _Memo(b"audio", "Run")})
+    extract.main(root, out, jobs=1)
+
+    assert _exported(out) == ["20240101 120000 Run.m4a"]
+    assert (out / "20240101 120000 Run.m4a").stat().st_ino == inode  # moved, not copied again
+
+
+def test_unchanged_backup_copies_nothing(
+    tmp_path: Path, backup_memos: BackupMemos, capsys: pytest.CaptureFixture[str]
+) -> None:
+    out = tmp_path / "out"
+    root = backup_memos({"a.m4a": _Memo(b"a", "A"), "b.m4a": _Memo(b"b")})
+    extract.main(root, out, jobs=1)
+    capsys.readouterr()
+
+    backup_memos({"a.m4a": _Memo(b"a", "A"), "b.m4a": _Memo(b"b")})
+    extract.main(root, out, jobs=1)
+
+    assert "Copied 0 file(s)" in capsys.readouterr().out
+    assert _exported(out) == ["a A.m4a", "b.m4a"]
+
+
+def test_prune_deletes_only_memos_deleted_from_the_backup(
+    tmp_path: Path, backup_memos: BackupMemos
+) -> None:
+    out = tmp_path / "out"
+    root = backup_memos({"kept.m4a": _Memo(b"kept"), "deleted.m4a": _Memo(b"deleted")})
+    extract.main(root, out, jobs=1)
+
+    backup_memos({"kept.m4a": _Memo(b"kept")})
+    extract.main(root, out, jobs=1)
+    assert _exported(out) == ["deleted.m4a", "kept.m4a"]  # reported, but kept without --prune
+
+    extract.main(root, out, jobs=1, prune=True)
+    assert _exported(out) == ["kept.m4a"]
+
+
+def test_prune_never_deletes_memos_missing_from_the_backup_on_disk(
+    tmp_path: Path, backup_memos: BackupMemos
+) -> None:
+    out = tmp_path / "out"
+    root = backup_memos({"a.m4a": _Memo(b"a"), "b.m4a": _Memo(b"b")})
+    extract.main(root, out, jobs=1)
+
+    backup_memos({"a.m4a": _Memo(b"a"), "b.m4a": _Memo(None)})  # an interrupted backup
+    extract.main(root, out, jobs=1, prune=True)
+
+    assert _exported(out) == ["a.m4a", "b.m4a"]
+
+
+def test_prune_keeps_memos_edited_since_they_were_exported(
+    tmp_path: Path, backup_memos: BackupMemos
+) -> None:
+    out = tmp_path / "out"
+    root = backup_memos({"a.m4a": _Memo(b"a")})
+    extract.main(root, out, jobs=1)
+    (out / "a.m4a").write_bytes(b"trimmed by hand")
+
+    backup_memos({})
+    extract.main(root, out, jobs=1, prune=True)
+
+    assert (out / "a.m4a").read_bytes() == b"trimmed by hand"
+
+
+def test_title_falls_back_to_the_composition_plist(tmp_path: Path, backup_memos: BackupMemos) -> None:
+    out = tmp_path / "out"
+    root = backup_memos(
+        {"a.m4a": _Memo(b"a", "From db", "Ignored"), "b.m4a": _Memo(b"b", "", "From plist")}
+    )
+
+    extract.main(root, out, jobs=1)
+
+    assert _exported(out) == ["a From db.m4a", "b From plist.m4a"]
+
+
+def test_titles_are_cached_until_their_source_changes(tmp_path: Path, backup_memos: BackupMemos) -> None:
+    out = tmp_path / "out"
+    memos = {"a.m4a": _Memo(b"a", "From db"), "b.m4a": _Memo(b"b", "", "From plist")}
+    root = backup_memos(memos)
+    extract.main(root, out, jobs=1)
+
+    backup_memos(memos)
+    with (
+        patch.object(extract, "_titles_from_db", side_effect=AssertionError("queried")),
+        patch.object(extract, "_title_from_plist", side_effect=AssertionError("read")),
+    ):
+        extract.main(root, out, jobs=1)
+
+    backup_memos({**memos, "a.m4a": _Memo(b"a", "Renamed")})
+    extract.main(root, out, jobs=1)
+    assert _exported(out) == ["a Renamed.m4a", "b From plist.m4a"]
@@ -1,20 +1,19 @@
 #!/usr/bin/env -S uv run python
 
+import hashlib
+import json
 import plistlib
 import re
-import shutil
-import sqlite3
-from functools import partial
+import sys
+import typing as ty
+from contextlib import closing
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from backup import Backup, cache_dir, connect_read_only
+from export import export_files
 
-def _backup_abspath_for_file_id(backup_root: Path, file_id: str) -> Path:
-    """in iphone backups, a "fileID" is a hashed form of the relpath.  they
-    store these files at their hashed filenames in subdirectories, where the
-    subdirectory name == first two chars of the hash"""
-    subdir = file_id[:2]
-    src = backup_root / subdir / file_id
-    return src
+_VOICE_MEMOS_DOMAIN = "AppDomainGroup-group.com.apple.VoiceMemos.shared"
 
 
 def _sanitize(name: str) -> str:
@@ -22,28 +21,16 @@ def _sanitize(name: str) -> str:
     return re.sub(r"[^\w\s\-\.,()]", "", name).strip()
 
 
-def _find_all_voice_memo_files(
-    backup_root: Path, manifest_db: sqlite3.Connection
-) -> dict[str, Path] | None:
-    cur = manifest_db.cursor()
-
+def _find_all_voice_memo_files(backup: Backup) -> dict[str, Path] | None:
     print("Querying for files in voice memos app…")
-    cur.execute(
-        """
-        SELECT fileID, relativePath
-        FROM Files
-        WHERE domain = 'AppDomainGroup-group.com.apple.VoiceMemos.shared'
-        ORDER BY relativePath;
-    """
-    )
-    rows = cur.fetchall()
+    rows = backup.files(_VOICE_MEMOS_DOMAIN)
 
     if not rows:
         print("No voice memo .m4a files found!")
         return None
 
     print(f"Found {len(rows)} voice memos files.")
-    return {relpath: _backup_abspath_for_file_id(backup_root, file_id) for file_id, relpath in rows}
+    return {relpath: backup.path(file_id) for relpath, file_id in rows.items()}
 
 
 def _select_only_resultant_audio_files(all_voice_memo_files: dict[str, Path]) -> dict[str, Path]:
@@ -64,86 +51,248 @@ def _select_only_resultant_audio_files(all_voice_memo_files: dict[str, Path]) ->
 ###
 
 
-def _build_file_id_onto_title(
-    recordings_db: Path | None,
-) -> dict[str, str]:
-    if not recordings_db:
-        return dict()
+# titles come from CloudRecordings.db, or failing that from the memo's
+# composition manifest.plist.  both are resolved once per backup, not per memo:
+# the db in one query joined against the memos we have, and plists only for
+# memos the db has no title for.  results are cached by fileID in the user
+# cache, and re-resolved once the file they came from changes.
+###
+
+_TITLES_VERSION = 1
 
-    with sqlite3.connect(recordings_db) as conn:
-        cur = conn.cursor()
-        cur.execute("select ZPATH, ZENCRYPTEDTITLE from ZCLOUDRECORDING;")
-        rows = cur.fetchall()
 
-        file_id_onto_title = {file_name: title for file_name, title in rows}
-        return file_id_onto_title
+class _TitleCache(ty.NamedTuple):
+    db: str
+    """stamp of the CloudRecordings.db that `titles` came from"""
+    titles: dict[str, str]  # memo fileID -> title in the db, or ""
+    plists: dict[str, tuple[str, str]]  # plist fileID -> (stamp, title)
 
 
-def _recording_db_path_from_relpath(relpath: str) -> str:
-    return Path(relpath).name
+def _titles_cache_path(backup_root: Path) -> Path:
+    key = hashlib.sha256(str(backup_root.resolve()).encode()).hexdigest()[:16]
+    return cache_dir("voice-memos", f"titles-{key}.json")
 
 
-def _get_title_from_recordings_db(file_id_onto_title: dict[str, str], audio_file_relpath: str) -> str:
-    path = _recording_db_path_from_relpath(audio_file_relpath)
-    return file_id_onto_title.get(path) or ""
+def _load_titles(path: Path) -> _TitleCache:
+    try:
+        data = json.loads(path.read_text())
+        if data.get("version") == _TITLES_VERSION:
+            plists = {plist_id: (stamp, title) for plist_id, (stamp, title) in data["plists"].items()}
+            return _TitleCache(data["db"], data["titles"], plists)
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return _TitleCache("", {}, {})
 
 
-def _manifest_plist_for_file(all_voice_memo_files: dict[str, Path], audio_file_relpath: str) -> dict | None:
-    audio_file_without_m4a = audio_file_relpath.replace(".m4a", "")
-    manifest_plist_relpath = f"{audio_file_without_m4a}.composition/manifest.plist"
-    if f := all_voice_memo_files.get(manifest_plist_relpath):
-        manifest_plist: dict = plistlib.loads(f.read_text())
-        return manifest_plist
-    return None
+def _save_titles(path: Path, cache: _TitleCache) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"version": _TITLES_VERSION, **cache._asdict()}))
+    tmp.replace(path)
+
+
+def _stamp(path: Path) -> str:
+    st = path.stat()
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def _titles_from_db(recordings_db: Path, memo_names: dict[str, str]) -> dict[str, str]:
+    """`memo_names` is fileID -> the memo's file name, which is its ZPATH."""
+    with closing(connect_read_only(recordings_db)) as conn:
+        conn.execute("CREATE TEMP TABLE memos (name TEXT PRIMARY KEY, file_id TEXT)")
+        conn.executemany("INSERT INTO memos VALUES (?, ?)", ((n, f) for f, n in memo_names.items()))
+        rows = conn.execute(
+            """
+            SELECT memos.file_id, ZCLOUDRECORDING.ZENCRYPTEDTITLE
+            FROM ZCLOUDRECORDING JOIN memos ON memos.name = ZCLOUDRECORDING.ZPATH
+            WHERE ZCLOUDRECORDING.ZENCRYPTEDTITLE != ''
+            """
+        )
+        return dict(rows)
 
 
-def _derive_friendly_name(title_in_db: str, manifest_plist: dict | None, audio_file_relpath: str) -> str:
-    original_stem = Path(audio_file_relpath).stem
+def _title_from_plist(plist: Path) -> str:
+    try:
+        with plist.open("rb") as f:
+            return str(plistlib.load(f).get("RCSavedRecordingTitle") or "")
+    except ValueError:  # plistlib.InvalidFileException
+        print(f"WARNING: unreadable plist: {plist}")
+        return ""
 
-    if title_in_db:
-        return f"{original_stem} {title_in_db}.m4a"
 
-    if manifest_plist:
-        title = manifest_plist["RCSavedRecordingTitle"]
-        return f"{original_stem} {title}.m4a"
+def _resolve_titles(
+    all_voice_memo_files: dict[str, Path], audio_files: dict[str, Path], cache_path: Path
+) -> dict[str, str]:
+    """fileID -> title ("" if it has none) for each of `audio_files`."""
+    cache = _load_titles(cache_path)
 
+    memo_names = {src.name: Path(relpath).name for relpath, src in audio_files.items()}
+    recordings_db = all_voice_memo_files.get("Recordings/CloudRecordings.db")
+    db = _stamp(recordings_db) if recordings_db and recordings_db.exists() else ""
+    titles = cache.titles
+    if db != cache.db or not memo_names.keys() <= titles.keys():
+        from_db = _titles_from_db(recordings_db, memo_names) if recordings_db and db else {}
+        titles = {file_id: from_db.get(file_id, "") for file_id in memo_names}
+
+    plists: dict[str, tuple[str, str]] = {}
+    resolved: dict[str, str] = {}
+    for relpath, src in audio_files.items():
+        title = titles[src.name]
+        plist = all_voice_memo_files.get(f"{relpath.removesuffix('.m4a')}.composition/manifest.plist")
+        if not title and plist and plist.exists():
+            stamp = _stamp(plist)
+            cached = cache.plists.get(plist.name)
+            plists[plist.name] = (
+                cached if cached and cached[0] == stamp else (stamp, _title_from_plist(plist))
+            )
+            title = plists[plist.name][1]
+        resolved[src.name] = title
+
+    _save_titles(cache_path, _TitleCache(db, titles, plists))
+    return resolved
+
+
+def _derive_friendly_name(title: str, audio_file_relpath: str) -> str:
+    if title:
+        return f"{Path(audio_file_relpath).stem} {title}.m4a"
     return Path(audio_file_relpath).name
 
 
-def main(backup_root: Path, output_dir: Path) -> None:
-    manifest = backup_root / "Manifest.db"
-    if not manifest.exists():
-        raise EnvironmentError(f"Manifest.db not found at {manifest}")
+###
+# each run syncs the output dir rather than rebuilding it: a state file (in the
+# user cache, not the output dir, which may well be synced somewhere) records
+# what was exported for each fileID, so a memo whose title changed is renamed
+# in place instead of copied again, and one deleted from the phone can be
+# pruned.  the checksum is how we know a file is still the one we exported
+# before moving or deleting it.
+###
+
+_STATE_VERSION = 1
+
 
-    shutil.rmtree(output_dir)
-    output_dir.mkdir(exist_ok=True, parents=True)
+class _ExportedMemo(ty.NamedTuple):
+    name: str
+    sha256: str
+    size: int
+    mtime_ns: int
+
+
+def _state_path(output_dir: Path) -> Path:
+    key = hashlib.sha256(str(output_dir.resolve()).encode()).hexdigest()[:16]
+    return cache_dir("voice-memos", f"{key}.json")
 
-    print("Connecting to Manifest.db…")
-    manifest_db = sqlite3.connect(str(manifest))
 
-    all_voice_memo_files = _find_all_voice_memo_files(backup_root, manifest_db)
+def _load_state(path: Path) -> dict[str, _ExportedMemo]:
+    try:
+        data = json.loads(path.read_text())
+        if data.get("version") != _STATE_VERSION:
+            return {}
+        return {file_id: _ExportedMemo(**memo) for file_id, memo in data["memos"].items()}
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
+
+
+def _save_state(path: Path, state: dict[str, _ExportedMemo]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    memos = {file_id: memo._asdict() for file_id, memo in sorted(state.items())}
+    tmp.write_text(json.dumps({"version": _STATE_VERSION, "memos": memos}, indent=1))
+    tmp.replace(path)
+
+
+def _sha256(path: Path) -> str:
+    with path.open("rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def _is_as_exported(path: Path, memo: _ExportedMemo) -> bool:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return False
+    if st.st_size != memo.size:
+        return False
+    return st.st_mtime_ns == memo.mtime_ns or _sha256(path) == memo.sha256
+
+
+def _exported(path: Path, previous: _ExportedMemo | None) -> _ExportedMemo:
+    st = path.stat()
+    if previous and (previous.size, previous.mtime_ns) == (st.st_size, st.st_mtime_ns):
+        return previous._replace(name=path.name)
+    return _ExportedMemo(path.name, _sha256(path), st.st_size, st.st_mtime_ns)
+
+
+def _sync(
+    memos: dict[str, tuple[Path, str]], missing: set[str], output_dir: Path, *, jobs: int, prune: bool
+) -> None:
+    """`memos` is fileID -> (backup file, name to export it as); `missing` are
+    the fileIDs the backup lists but hasn't got on disk, which are left as
+    they were (a half-copied backup mustn't prune anything)."""
+    state_path = _state_path(output_dir)
+    state = _load_state(state_path)
+
+    for file_id, (_, name) in memos.items():
+        previous = state.get(file_id)
+        if not previous or previous.name == name:
+            continue
+        old, new = output_dir / previous.name, output_dir / name
+        if not _is_as_exported(old, previous):
+            continue  # gone, or edited since: exported afresh under the new name
+        if new.exists():
+            print(
+                f"Not renaming {previous.name} -> {name}: {name} already exists."
+                f" {previous.name} is left as it is, and no longer tracked."
+            )
+        else:
+            print(f"Renaming: {previous.name} -> {name}")
+            old.rename(new)
+
+    export_files(((src, output_dir / name) for src, name in memos.values()), jobs=jobs)
+    for file_id, (_, name) in memos.items():
+        state[file_id] = _exported(output_dir / name, state.get(file_id))
+
+    gone = sorted(set(state) - set(memos) - missing)
+    if gone and not prune:
+        print(f"{len(gone)} exported memo(s) no longer in the backup; --prune deletes them.")
+    elif gone:
+        for file_id in gone:
+            memo = state.pop(file_id)
+            path = output_dir / memo.name
+            if _is_as_exported(path, memo):
+                print(f"Pruning: {memo.name}")
+                path.unlink()
+            elif path.exists():
+                print(f"Keeping {memo.name}: it has changed since it was exported")
+
+    _save_state(state_path, state)
+
+
+def main(backup_root: Path, output_dir: Path, jobs: int = 4, prune: bool = False) -> None:
+    with Backup(backup_root) as backup:
+        all_voice_memo_files = _find_all_voice_memo_files(backup)
+
     if not all_voice_memo_files:
         print("No files found.")
         return
 
+    output_dir.mkdir(exist_ok=True, parents=True)
+
     audio_files = _select_only_resultant_audio_files(all_voice_memo_files)
 
-    recordings_db = all_voice_memo_files.get("Recordings/CloudRecordings.db")
-    get_title_from_recordings_db = partial(
-        _get_title_from_recordings_db, _build_file_id_onto_title(recordings_db)
-    )
+    titles = _resolve_titles(all_voice_memo_files, audio_files, _titles_cache_path(backup_root))
 
+    memos: dict[str, tuple[Path, str]] = {}
+    missing: set[str] = set()
     for relpath, src in audio_files.items():
         if not src.exists():
             print(f"WARNING: Missing backup file: {relpath}, {src}")
+            missing.add(src.name)
             continue
 
-        friendly_name = _derive_friendly_name(
-            title_in_db=get_title_from_recordings_db(relpath),
-            manifest_plist=_manifest_plist_for_file(all_voice_memo_files, relpath),
-            audio_file_relpath=relpath,
-        )
-        shutil.copy2(src, output_dir / friendly_name)
+        friendly_name = _derive_friendly_name(titles[src.name], relpath)
+        memos[src.name] = (src, friendly_name)
+
+    _sync(memos, missing, output_dir, jobs=jobs, prune=prune)
 
     print("\nDone. Extracted files are in:", output_dir.resolve())
 
@@ -154,6 +303,10 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("backup_root", type=Path)
     parser.add_argument("output_dir", type=Path)
+    parser.add_argument("--jobs", type=int, default=4, help="files to copy at once")
+    parser.add_argument(
+        "--prune", action="store_true", help="delete exported memos that are no longer in the backup"
+    )
     args = parser.parse_args()
 
-    main(args.backup_root, args.output_dir)
+    main(args.backup_root, args.output_dir, args.jobs, args.prune)
@@ -0,0 +1,131 @@
+#!/usr/bin/env -S uv run python
+"""Wall time and peak RSS of `tools.vault.sync._classify` on a synthetic vault.
+
+Builds a source/dest pair of ~50k small notes plus a handful of large
+attachments (identical on both sides except for a few diverged files), then
+classifies it several ways, each in a fresh subprocess so peak RSS is
+attributable to that approach alone:
+
+  read_bytes        the original serial whole-file comparison
+  streaming         chunked early-exit comparison over a thread pool
+  manifest-cold     streaming hashes, recording a stat manifest
+  manifest-warm     the next run: classification from stat alone
+
+    uv run python benchmarks/classify.py [--files 50000] [--large 8 --large-mb 64]
+
+The tree's mtimes are set an hour back once it's built: the manifest
+doesn't keep a digest for a file modified in the two seconds before it's
+saved (see tools.vault.manifest), so on a just-written tree manifest-warm
+would hash everything again and measure nothing new.
+
+The OS page cache is warm after the first approach; pass --root to reuse a
+tree across invocations (and drop caches between them) for cold-disk numbers.
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import typing as ty
+from pathlib import Path
+
+_APPROACHES = ("read_bytes", "streaming", "manifest-cold", "manifest-warm")
+
+
+def _build_tree(root: Path, *, files: int, large: int, large_mb: int) -> None:
+    src, dst = root / "src", root / "dst"
+    if src.exists():
+        return
+    print(f"building {files:,} notes + {large} x {large_mb}MB attachments under {root}", file=sys.stderr)
+    for i in range(files):
+        rel = Path(f"area{i % 50:02}/topic{i % 997:03}/note{i}.md")
+        body = f"# note {i}\n\n" + "some words about things\n" * (i % 40 + 1)
+        for side in (src, dst):
+            (side / rel).parent.mkdir(parents=True, exist_ok=True)
+            (side / rel).write_text(body + ("diverged\n" if side is dst and i % 1000 == 0 else ""))
+    chunk = bytes(range(256)) * 4096  # 1MB
+    for i in range(large):
+        for side in (src, dst):
+            p = side / "attachments" / f"video{i}.mp4"
+            p.parent.mkdir(parents=True, exist_ok=True)
+            with p.open("wb") as f:
+                for _ in range(large_mb):
+                    f.write(chunk)
+    _age(root, seconds=3600)
+
+
+def _age(root: Path, *, seconds: float) -> None:
+    then = time.time() - seconds
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            os.utime(Path(dirpath) / name, (then, then))
+
+
+def _peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1 << 20) if sys.platform == "darwin" else rss / 1024
+
+
+def _run_one(approach: str, root: Path) -> dict[str, ty.Any]:
+    from tools.vault import sync
+
+    src, dst = root / "src", root / "dst"
+    source_files, dest_files = sync._discover_files(src), sync._discover_files(dst)
+    manifest_dir = root / "manifests"
+
+    start = time.perf_counter()
+    if approach == "read_bytes":
+        shared = [rel for rel in source_files if rel in dest_files]
+        diverged = sum((src / r).read_bytes() != (dst / r).read_bytes() for r in shared)
+    else:
+        manifests = (
+            sync._Manifests(
+                sync.load_manifest(manifest_dir, src, rehash=approach == "manifest-cold"),
+                sync.load_manifest(manifest_dir, dst, rehash=approach == "manifest-cold"),
+            )
+            if approach.startswith("manifest")
+            else None
+        )
+        actions = sync._classify(source_files, dest_files, src, dst, manifests)
+        diverged = sum(a.kind == "diverged" for a in actions)
+        if manifests:
+            manifests.source.save(f.rel for f in source_files.values())
+            manifests.dest.save(f.rel for f in dest_files.values())
+    elapsed = time.perf_counter() - start
+
+    return {"approach": approach, "seconds": elapsed, "peak_rss_mb": _peak_rss_mb(), "diverged": diverged}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--files", type=int, default=50_000)
+    parser.add_argument("--large", type=int, default=8)
+    parser.add_argument("--large-mb", type=int, default=64)
+    parser.add_argument("--root", type=Path, default=None)
+    parser.add_argument("--run", choices=_APPROACHES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(_run_one(args.run, args.root)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = args.root or Path(tmp)
+        _build_tree(root, files=args.files, large=args.large, large_mb=args.large_mb)
+        print(f"{'approach':<16}{'wall (s)':>10}{'peak RSS (MB)':>16}{'diverged':>10}")
+        for approach in _APPROACHES:
+            out = subprocess.check_output(
+                [sys.executable, __file__, "--run", approach, "--root", str(root)], text=True
+            )
+            r = json.loads(out)
+            print(f"{r['approach']:<16}{r['seconds']:>10.2f}{r['peak_rss_mb']:>16.1f}{r['diverged']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env -S uv run python
+"""Vault file discovery: the original `Path.rglob` scan vs `tools.vault.walk`.
+
+Builds a deep synthetic vault whose hidden directories (`.git`, `.obsidian`,
+`.trash`) hold as many files as the visible tree, like a real vault with git
+history, then times:
+
+  rglob         the original `_discover_files`, once per root
+  walk          scandir walk with hidden-directory pruning, once per root
+  walk_many     both roots walked concurrently
+
+    uv run python benchmarks/discover.py [--files 20000] [--depth 8]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import typing as ty
+from pathlib import Path
+
+from tools.vault.walk import walk, walk_many
+
+
+def _build_vault(root: Path, *, files: int, depth: int) -> None:
+    for i in range(files):
+        nested = Path(*(f"d{(i >> level) % 4}" for level in range(i % depth + 1)))
+        for rel in (nested / f"note{i}.md", Path(".git/objects") / nested / f"obj{i}"):
+            (root / rel).parent.mkdir(parents=True, exist_ok=True)
+            (root / rel).write_text("x")
+
+
+def _rglob_discover(root: Path) -> dict[Path, Path]:
+    return {
+        p.relative_to(root): p
+        for p in root.rglob("*")
+        if p.is_file() and not any(part.startswith(".") for part in p.relative_to(root).parts)
+    }
+
+
+def _time(label: str, fn: ty.Callable[[], ty.Any], *, repeat: int) -> None:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<12}{best:>10.3f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--files", type=int, default=20_000)
+    parser.add_argument("--depth", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        roots = [Path(tmp) / "src", Path(tmp) / "dst"]
+        print(f"building 2 vaults x {args.files:,} visible + {args.files:,} hidden files", file=sys.stderr)
+        for root in roots:
+            _build_vault(root, files=args.files, depth=args.depth)
+
+        _time("rglob", lambda: [_rglob_discover(r) for r in roots], repeat=args.repeat)
+        _time("walk", lambda: [walk(r) for r in roots], repeat=args.repeat)
+        _time("walk_many", lambda: walk_many(roots), repeat=args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env -S uv run python
+"""Time `tools.diff`'s line engines against plain difflib on large notes.
+
+Generates two versions of a long note for each shape, then times:
+
+  difflib-direct    `difflib.unified_diff` + a second SequenceMatcher for
+                    `apply_hunks` (what `tools.diff` used to do)
+  difflib           the difflib engine through `tools.linediff` (interned
+                    lines, opcodes computed once)
+  patience          the patience engine through `tools.linediff`
+
+Shapes:
+
+  transcript    meeting transcript: many repeated filler lines
+  table         exported markdown table: repeated rule rows, similar cells
+  prose         mostly unique lines
+
+    uv run python benchmarks/linediff.py [--lines 10000 30000 100000] [--edits 200]
+"""
+
+import argparse
+import difflib
+import random
+import time
+import typing as ty
+
+from tools.linediff import EngineName, grouped_opcodes, matching_blocks, opcodes
+
+_FILLER = ["uh-huh\n", "right.\n", "yeah\n", "\n", "ok so\n", "mm-hmm\n"]
+
+
+def _transcript(rng: random.Random, n: int) -> list[str]:
+    return [
+        rng.choice(_FILLER) if rng.random() < 0.6 else f"speaker {rng.randrange(8)}: point {i}\n"
+        for i in range(n)
+    ]
+
+
+def _table(rng: random.Random, n: int) -> list[str]:
+    return [
+        "| --- | --- | --- |\n" if i % 20 == 0 else f"| {rng.randrange(50)} | {rng.randrange(50)} | x |\n"
+        for i in range(n)
+    ]
+
+
+def _prose(rng: random.Random, n: int) -> list[str]:
+    return [f"sentence {i} about {rng.randrange(10_000)}\n" for i in range(n)]
+
+
+_SHAPES = {"transcript": _transcript, "table": _table, "prose": _prose}
+
+
+def _edit(rng: random.Random, lines: list[str], edits: int) -> list[str]:
+    edited = lines.copy()
+    for _ in range(edits):
+        at = rng.randrange(len(edited))
+        match rng.randrange(3):
+            case 0:
+                edited.insert(at, f"inserted {rng.random()}\n")
+            case 1:
+                del edited[at]
+            case _:
+                edited[at] = f"rewritten {rng.random()}\n"
+    return edited
+
+
+def _difflib_direct(a: list[str], b: list[str]) -> int:
+    hunks = sum(line.startswith("@@") for line in difflib.unified_diff(a, b))
+    list(difflib.SequenceMatcher(None, a, b).get_grouped_opcodes())  # apply_hunks' second pass
+    return hunks
+
+
+def _engine(name: EngineName) -> ty.Callable[[list[str], list[str]], int]:
+    def run(a: list[str], b: list[str]) -> int:
+        return len(grouped_opcodes(opcodes(matching_blocks(a, b, engine=name))))
+
+    return run
+
+
+_APPROACHES: dict[str, ty.Callable[[list[str], list[str]], int]] = {
+    "difflib-direct": _difflib_direct,
+    "difflib": _engine("difflib"),
+    "patience": _engine("patience"),
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--lines", type=int, nargs="+", default=[10_000, 30_000, 100_000])
+    parser.add_argument("--edits", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'shape':<12}{'lines':>8}  {'approach':<16}{'seconds':>9}{'hunks':>7}")
+    for shape, make in _SHAPES.items():
+        for n in args.lines:
+            rng = random.Random(args.seed)
+            a = make(rng, n)
+            b = _edit(rng, a, args.edits)
+            for approach, run in _APPROACHES.items():
+                start = time.perf_counter()
+                n_hunks = run(a, b)
+                elapsed = time.perf_counter() - start
+                print(f"{shape:<12}{n:>8}  {approach:<16}{elapsed:>9.2f}{n_hunks:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env -S uv run python
+"""Check that every console script still starts fast.
+
+Imports each `[project.scripts]` module in a fresh interpreter under
+`python -X importtime`, keeps the best of a few runs of the module's
+cumulative import time, and exits 1 if any is over budget -- e.g. because
+something heavy (thds.mops, thds.core, a `git` subprocess) went back to
+being imported, or run, at module level.
+
+    uv run python benchmarks/startup.py [--budget-ms 120] [--runs 5]
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+import tomllib
+from pathlib import Path
+
+_PYPROJECT = Path(__file__).resolve().parent.parent / "pyproject.toml"
+# "import time: self [us] | cumulative | imported package", indented by depth
+_LINE = re.compile(r"^import time:\s+\d+ \|\s+(\d+) \| (\S+)$")
+# run as scripts rather than installed as console scripts
+_UNREGISTERED = {"google-photos-to-immich": "tools.google_photos_to_immich"}
+
+
+def _modules() -> dict[str, str]:
+    scripts = tomllib.loads(_PYPROJECT.read_text())["project"]["scripts"]
+    return {name: target.partition(":")[0] for name, target in scripts.items()} | _UNREGISTERED
+
+
+def _import_us(module: str) -> int:
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    for line in stderr.splitlines():
+        if (m := _LINE.match(line)) and m[2] == module:
+            return int(m[1])
+    raise RuntimeError(f"{module} not in -X importtime output:\n{stderr}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--budget-ms", type=float, default=120.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    over = []
+    print(f"{'script':<25}{'module':<34}{'ms':>8}")
+    for script, module in _modules().items():
+        ms = min(_import_us(module) for _ in range(args.runs)) / 1000
+        flag = "  OVER BUDGET" if ms > args.budget_ms else ""
+        print(f"{script:<25}{module:<34}{ms:>8.1f}{flag}")
+        if flag:
+            over.append(script)
+
+    if over:
+        print(f"\n{len(over)} script(s) over the {args.budget_ms:.0f}ms budget: {', '.join(over)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+import os
+from pathlib import Path
+
+
+def cache_dir(*parts: str) -> Path:
+    """Per-user scratch space for state that can always be rebuilt from scratch.
+
+    Deliberately kept out of the vaults and this repo: anything written inside
+    a synced vault gets uploaded to coworkers.
+    """
+    base = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    return base.joinpath("tools", *parts)
@@ -0,0 +1,22 @@
+"""`thds.termtool.colorize.colorized`, imported on first use.
+
+Importing thds.termtool pulls in all of thds.core -- about a fifth of a
+second -- which a script shouldn't pay at startup just to have its colors
+ready for output it may never print.
+"""
+
+import typing as ty
+from functools import cache
+
+
+def colorized(fg: str, bg: str = "", style: str = "") -> ty.Callable[[str], str]:
+    @cache
+    def real() -> ty.Callable[[str], str]:
+        from thds.termtool.colorize import colorized
+
+        return colorized(fg=fg, bg=bg, style=style)
+
+    def colorize(s: str) -> str:
+        return real()(s)
+
+    return colorize
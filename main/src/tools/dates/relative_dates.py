@@ -4,12 +4,23 @@ Outputs relative dates for use by Claude skills.
 
 Keys are named to match natural phrases ("end of week", "monday", etc.)
 so skills can use them directly without mapping tables.
+
+Skills call this a lot, so `--build-table` precomputes every day in a range
+of years into a fixed-width binary table (one row of int32s per day: dates
+as ordinals).  Later `--of` lookups in that range are a seek and a read;
+dates outside it are still derived.  `--range START..END` prints many days
+at once, as tab-separated rows under a header.
 """
 
+import struct
 import typing as ty
+import zlib
 from argparse import ArgumentParser
 from dataclasses import dataclass, field, fields
 from datetime import date, timedelta
+from pathlib import Path
+
+from tools.cache import cache_dir
 
 # Friday = start of weekend. Work week is Mon-Thu.
 WEEKEND_START = 4  # 0=Mon ... 6=Sun
@@ -124,24 +135,142 @@ def _derive_relative_dates(relative_to: date) -> RelativeDates:
     )
 
 
+# ---------------------------------------------------------------------------
+# Precomputed table
+# ---------------------------------------------------------------------------
+
+_FIELDS = fields(RelativeDates)
+_ROW = struct.Struct(f"<{len(_FIELDS)}i")
+_HEADER = struct.Struct("<4sIiI")  # magic, schema, first ordinal, number of days
+_MAGIC = b"RDT1"
+# Bump whenever _derive_relative_dates changes what it computes: a field's
+# meaning can change without its name, and only this would notice.
+_TABLE_VERSION = 1
+
+
+def _schema(table_version: int) -> int:
+    # a table built before the fields (or the weekend, or the derivation) changed is ignored, not misread
+    return zlib.crc32(f"{table_version}:{WEEKEND_START}:{','.join(f.name for f in _FIELDS)}".encode())
+
+
+_SCHEMA = _schema(_TABLE_VERSION)
+
+
+def default_table_path() -> Path:
+    return cache_dir("relative-dates", "table.bin")
+
+
+def _encode(dates: RelativeDates) -> bytes:
+    values = (getattr(dates, f.name) for f in _FIELDS)
+    return _ROW.pack(*(v.toordinal() if isinstance(v, date) else v for v in values))
+
+
+def _decode(row: bytes) -> RelativeDates:
+    values: dict[str, ty.Any] = {
+        f.name: date.fromordinal(v) if f.type is date else v for f, v in zip(_FIELDS, _ROW.unpack(row))
+    }
+    return RelativeDates(**values)
+
+
+def build_table(path: Path, first_year: int, last_year: int) -> int:
+    """Writes every day from Jan 1 of `first_year` through Dec 31 of `last_year`;
+    returns the number of days."""
+    first = date(first_year, 1, 1).toordinal()
+    days = date(last_year, 12, 31).toordinal() - first + 1
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with tmp.open("wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _SCHEMA, first, days))
+        f.write(b"".join(_encode(_derive_relative_dates(date.fromordinal(first + n))) for n in range(days)))
+    tmp.replace(path)
+    return days
+
+
+def _lookup(path: Path, days: list[date]) -> list[RelativeDates | None]:
+    """Rows for `days` read straight out of the table at `path`; None for any
+    day it doesn't cover (or all of them, if there's no usable table)."""
+    found: list[RelativeDates | None] = [None] * len(days)
+    try:
+        with path.open("rb") as f:
+            magic, schema, first, count = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC or schema != _SCHEMA:
+                return found
+            for n, day in enumerate(days):
+                offset = day.toordinal() - first
+                if 0 <= offset < count:
+                    f.seek(_HEADER.size + offset * _ROW.size)
+                    found[n] = _decode(f.read(_ROW.size))
+    except (OSError, struct.error):
+        pass
+    return found
+
+
+def relative_dates(days: list[date], table: Path | None = None) -> list[RelativeDates]:
+    looked_up = _lookup(table or default_table_path(), days)
+    return [rd or _derive_relative_dates(day) for rd, day in zip(looked_up, days)]
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+
 def _parse_date(s: str | date) -> date:
     if isinstance(s, date):
         return s
     return date.fromisoformat(s)
 
 
+def _parse_range(s: str) -> list[date]:
+    start_s, sep, end_s = s.partition("..")
+    if not sep:
+        raise ValueError(f"expected START..END, got {s!r}")
+    start, end = _parse_date(start_s), _parse_date(end_s)
+    return [start + timedelta(days=n) for n in range((end - start).days + 1)]
+
+
+def _parse_years(s: str) -> tuple[int, int]:
+    first, _, last = s.partition("..")
+    return int(first), int(last or first)
+
+
 def cli() -> None:
     parser = ArgumentParser()
-    parser.add_argument(
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
         "--of",
         help="Print dates relative to this date. e.g., '2026-05-13'. Defaults to today.",
         default="",
     )
+    mode.add_argument(
+        "--range",
+        type=_parse_range,
+        metavar="START..END",
+        help="Print a tab-separated row for every date from START through END (inclusive).",
+    )
+    mode.add_argument(
+        "--build-table",
+        type=_parse_years,
+        metavar="FIRST..LAST",
+        help="Precompute every day of these years (e.g. '2020..2040') for fast lookups, then exit.",
+    )
+    parser.add_argument("--table", type=Path, default=None, help="Table location (default: user cache).")
     args = parser.parse_args()
 
-    relative_to = _parse_date(args.of or date.today())
-    dates = _derive_relative_dates(relative_to)
-    for f in fields(dates):
+    table = args.table or default_table_path()
+    if args.build_table:
+        days = build_table(table, *args.build_table)
+        print(f"wrote {days} days to {table}")
+        return
+
+    if args.range is not None:
+        print("\t".join(f.name for f in _FIELDS))
+        for dates in relative_dates(args.range, table):
+            print("\t".join(str(getattr(dates, f.name)) for f in _FIELDS))
+        return
+
+    (dates,) = relative_dates([_parse_date(args.of or date.today())], table)
+    for f in _FIELDS:
         desc = f.metadata.get("desc", "")
         val = getattr(dates, f.name)
         print(f"{f.name}={val}  # {desc}" if desc else f"{f.name}={val}")
@@ -1,8 +1,25 @@
-import difflib
+"""Line diffs between two versions of a file.
+
+The line matching itself is done once, by a pluggable engine (see
+`tools.linediff`); the unified-diff lines, the hunks and `apply_hunks` are all
+views over that one set of grouped opcodes.
+"""
+
 import typing as ty
+from dataclasses import dataclass, field
 from pathlib import Path
 
-from thds.termtool.colorize import colorized
+from tools.color import colorized
+from tools.hashing import files_equal
+from tools.linediff import (
+    DEFAULT_ENGINE,
+    EngineName,
+    Opcode,
+    OpTag,
+    grouped_opcodes,
+    matching_blocks,
+    opcodes,
+)
 
 _RED = colorized(fg="red")
 _GREEN = colorized(fg="green")
@@ -10,17 +27,68 @@ _BLUE = colorized(fg="blue")
 _DIM = colorized(fg="gray")
 
 
-Diff = list[str]
+def _format_range(start: int, stop: int) -> str:
+    """A unified-diff range, exactly as `difflib.unified_diff` writes it."""
+    beginning, length = start + 1, stop - start
+    if length == 1:
+        return str(beginning)
+    if not length:
+        beginning -= 1
+    return f"{beginning},{length}"
 
 
-def diff(v1: Path, v2: Path) -> Diff:
-    lines = difflib.unified_diff(
-        v2.read_text().splitlines(keepends=True),
-        v1.read_text().splitlines(keepends=True),
-        fromfile=str(v2),
-        tofile=str(v1),
-    )
-    return list(lines)
+def _hunk_header(group: list[Opcode]) -> str:
+    first, last = group[0], group[-1]
+    return f"@@ -{_format_range(first.i1, last.i2)} +{_format_range(first.j1, last.j2)} @@\n"
+
+
+def _hunk_lines(a: list[str], b: list[str], group: list[Opcode]) -> ty.Iterator[str]:
+    for tag, i1, i2, j1, j2 in group:
+        if tag == "equal":
+            yield from (f" {line}" for line in a[i1:i2])
+            continue
+        if tag in ("replace", "delete"):
+            yield from (f"-{line}" for line in a[i1:i2])
+        if tag in ("replace", "insert"):
+            yield from (f"+{line}" for line in b[j1:j2])
+
+
+@dataclass(frozen=True)
+class Diff:
+    """`a` -> `b` as grouped opcodes, one group per hunk.  Iterating yields the
+    unified-diff lines (what `difflib.unified_diff` would have produced)."""
+
+    fromfile: str
+    tofile: str
+    a: list[str] = field(default_factory=list)
+    b: list[str] = field(default_factory=list)
+    groups: list[list[Opcode]] = field(default_factory=list)
+
+    def __iter__(self) -> ty.Iterator[str]:
+        if not self.groups:
+            return
+        yield f"--- {self.fromfile}\n"
+        yield f"+++ {self.tofile}\n"
+        for group in self.groups:
+            yield _hunk_header(group)
+            yield from _hunk_lines(self.a, self.b, group)
+
+    def __bool__(self) -> bool:
+        return bool(self.groups)
+
+
+def _groups(a: list[str], b: list[str], engine: EngineName) -> list[list[Opcode]]:
+    return grouped_opcodes(opcodes(matching_blocks(a, b, engine=engine)))
+
+
+def diff(v1: Path, v2: Path, *, engine: EngineName = DEFAULT_ENGINE) -> Diff:
+    """v2 -> v1.  Byte-identical files are answered without reading their
+    lines, so `a` / `b` are only populated when there is something to show."""
+    if files_equal(v1, v2):
+        return Diff(str(v2), str(v1))
+    a = v2.read_text().splitlines(keepends=True)
+    b = v1.read_text().splitlines(keepends=True)
+    return Diff(str(v2), str(v1), a, b, _groups(a, b, engine))
 
 
 def _colorize_diff_line(line: str) -> str:
@@ -35,35 +103,37 @@ def colorize(d: Diff) -> str:
 
 
 # ---------------------------------------------------------------------------
-# Hunk parsing and selective application
+# Hunks and selective application
 # ---------------------------------------------------------------------------
 
 
-class Hunk(ty.NamedTuple):
-    header: str
-    diff_lines: list[str]
+class Hunk:
+    """One opcode group, as index ranges into the diff's own `a` / `b` line
+    lists: no line is copied until the hunk is rendered."""
 
+    __slots__ = ("a", "b", "group", "header")
 
-def hunks(d: Diff) -> list[Hunk]:
-    """Split a unified diff into hunks (one per @@ header)."""
-    result: list[Hunk] = []
-    current_header: str | None = None
-    current_lines: list[str] = []
+    def __init__(self, a: list[str], b: list[str], group: list[Opcode], header: str | None = None) -> None:
+        self.a = a
+        self.b = b
+        self.group = group
+        self.header = header if header is not None else _hunk_header(group)
 
-    for line in d:
-        if line.startswith("@@"):
-            if current_header is not None:
-                result.append(Hunk(current_header, current_lines))
-            current_header = line
-            current_lines = []
-        elif current_header is not None:
-            current_lines.append(line)
-        # skip --- / +++ / other preamble lines
+    @property
+    def diff_lines(self) -> ty.Iterator[str]:
+        return _hunk_lines(self.a, self.b, self.group)
 
-    if current_header is not None:
-        result.append(Hunk(current_header, current_lines))
+    def __repr__(self) -> str:
+        return f"Hunk({self.header.strip()!r})"
 
-    return result
+
+def iter_hunks(d: Diff) -> ty.Iterator[Hunk]:
+    """One hunk per opcode group (i.e. per @@ header of the unified diff)."""
+    return (Hunk(d.a, d.b, g) for g in d.groups)
+
+
+def hunks(d: Diff) -> list[Hunk]:
+    return list(iter_hunks(d))
 
 
 def colorize_hunk(hunk: Hunk) -> str:
@@ -91,19 +161,23 @@ def apply_hunks(
     dest_lines: list[str],
     source_lines: list[str],
     choices: list[HunkChoice],
+    *,
+    groups: ty.Sequence[list[Opcode]] | None = None,
+    engine: EngineName = DEFAULT_ENGINE,
 ) -> MergedSides:
     """Build per-side merged output from a three-way choice per hunk.
 
-    Uses SequenceMatcher.get_grouped_opcodes to produce hunk-aligned groups
-    that correspond 1:1 with unified diff hunks.  For each group's non-equal
-    ops the choice decides what both sides receive:
+    `groups` are the hunk-aligned opcode groups of dest -> source (a `Diff`'s
+    `groups`, or its hunks' `group`s); passing them reuses the matching the
+    diff already did.  For each group's non-equal ops the choice decides what
+    both sides receive:
 
       "source"  both sides take source's version (source -> dest)
       "dest"    both sides take dest's version   (dest -> source)
       "skip"    each side keeps its own version  (region stays diverged)
     """
-    sm = difflib.SequenceMatcher(None, dest_lines, source_lines)
-    groups = list(sm.get_grouped_opcodes())
+    if groups is None:
+        groups = _groups(dest_lines, source_lines, engine)
 
     if len(groups) != len(choices):
         raise ValueError(f"expected {len(groups)} choice(s), got {len(choices)}")
@@ -115,8 +189,8 @@ def apply_hunks(
 
     for group, choice in zip(groups, choices):
         # fill gap of equal lines between previous group and this one
-        new_dest.extend(dest_lines[last_dest_pos : group[0][1]])
-        new_source.extend(source_lines[last_source_pos : group[0][3]])
+        new_dest.extend(dest_lines[last_dest_pos : group[0].i1])
+        new_source.extend(source_lines[last_source_pos : group[0].j1])
 
         for tag, i1, i2, j1, j2 in group:
             if tag == "equal":
@@ -132,10 +206,133 @@ def apply_hunks(
                 new_dest.extend(dest_lines[i1:i2])
                 new_source.extend(source_lines[j1:j2])
 
-        last_dest_pos = group[-1][2]
-        last_source_pos = group[-1][4]
+        last_dest_pos = group[-1].i2
+        last_source_pos = group[-1].j2
 
     # trailing equal lines after last group
     new_dest.extend(dest_lines[last_dest_pos:])
     new_source.extend(source_lines[last_source_pos:])
     return MergedSides(source=new_source, dest=new_dest)
+
+
+# ---------------------------------------------------------------------------
+# Three-way merge against a common ancestor
+# ---------------------------------------------------------------------------
+
+Merge3Kind = ty.Literal["unchanged", "dest", "source", "same", "conflict"]
+
+
+class Merge3Chunk(ty.NamedTuple):
+    """A region of the merge.  `kind` names which side(s) changed it relative
+    to `base`: "same" means both sides made the identical change."""
+
+    kind: Merge3Kind
+    base: list[str]
+    dest: list[str]
+    source: list[str]
+
+
+class _SyncRegion(ty.NamedTuple):
+    """A run of base lines that both sides kept, with where it sits in each."""
+
+    base_start: int
+    base_end: int
+    dest_start: int
+    dest_end: int
+    source_start: int
+    source_end: int
+
+
+def _sync_regions(
+    base: list[str], dest: list[str], source: list[str], engine: EngineName
+) -> list[_SyncRegion]:
+    dest_blocks = matching_blocks(base, dest, engine=engine)
+    source_blocks = matching_blocks(base, source, engine=engine)
+
+    regions: list[_SyncRegion] = []
+    i = j = 0
+    while i < len(dest_blocks) and j < len(source_blocks):
+        d_base, d_at, d_len = dest_blocks[i]
+        s_base, s_at, s_len = source_blocks[j]
+        lo, hi = max(d_base, s_base), min(d_base + d_len, s_base + s_len)
+        if lo < hi:
+            d_lo, s_lo = d_at + lo - d_base, s_at + lo - s_base
+            regions.append(_SyncRegion(lo, hi, d_lo, d_lo + hi - lo, s_lo, s_lo + hi - lo))
+        if d_base + d_len < s_base + s_len:
+            i += 1
+        else:
+            j += 1
+
+    regions.append(_SyncRegion(len(base), len(base), len(dest), len(dest), len(source), len(source)))
+    return regions
+
+
+def merge3(
+    base: list[str], dest: list[str], source: list[str], *, engine: EngineName = DEFAULT_ENGINE
+) -> list[Merge3Chunk]:
+    """diff3-style merge: regions changed on only one side (or identically on
+    both) resolve themselves; only overlapping, different changes come back as
+    "conflict" chunks."""
+    chunks: list[Merge3Chunk] = []
+    b_at = d_at = s_at = 0
+    for region in _sync_regions(base, dest, source, engine):
+        b, d, s = (
+            base[b_at : region.base_start],
+            dest[d_at : region.dest_start],
+            source[s_at : region.source_start],
+        )
+        if d or s:
+            if d == s:
+                chunks.append(Merge3Chunk("same", b, d, s))
+            elif b == d:
+                chunks.append(Merge3Chunk("source", b, d, s))
+            elif b == s:
+                chunks.append(Merge3Chunk("dest", b, d, s))
+            else:
+                chunks.append(Merge3Chunk("conflict", b, d, s))
+        if region.base_end > region.base_start:
+            kept = base[region.base_start : region.base_end]
+            chunks.append(Merge3Chunk("unchanged", kept, kept, kept))
+        b_at, d_at, s_at = region.base_end, region.dest_end, region.source_end
+    return chunks
+
+
+def conflict_hunk(chunk: Merge3Chunk) -> Hunk:
+    """Present a conflict chunk like a diff hunk: dest's lines as removals,
+    source's as additions."""
+    tag: OpTag = "replace" if chunk.dest and chunk.source else "delete" if chunk.dest else "insert"
+    return Hunk(
+        chunk.dest,
+        chunk.source,
+        [Opcode(tag, 0, len(chunk.dest), 0, len(chunk.source))],
+        header=f"@@ conflict (base had {len(chunk.base)} line(s)) @@\n",
+    )
+
+
+def resolve_merge3(chunks: list[Merge3Chunk], choices: list[HunkChoice]) -> MergedSides:
+    """Per-side merged output given one choice per "conflict" chunk (same
+    semantics as `apply_hunks`); every other chunk takes its changed side."""
+    n_conflicts = sum(c.kind == "conflict" for c in chunks)
+    if n_conflicts != len(choices):
+        raise ValueError(f"expected {n_conflicts} choice(s), got {len(choices)}")
+
+    new_dest: list[str] = []
+    new_source: list[str] = []
+    remaining = iter(choices)
+    for chunk in chunks:
+        if chunk.kind == "conflict":
+            match next(remaining):
+                case "source":
+                    new_dest.extend(chunk.source)
+                    new_source.extend(chunk.source)
+                case "dest":
+                    new_dest.extend(chunk.dest)
+                    new_source.extend(chunk.dest)
+                case "skip":
+                    new_dest.extend(chunk.dest)
+                    new_source.extend(chunk.source)
+        else:
+            resolved = chunk.dest if chunk.kind == "dest" else chunk.source
+            new_dest.extend(resolved)
+            new_source.extend(resolved)
+    return MergedSides(source=new_source, dest=new_dest)
@@ -1,13 +1,25 @@
+import hashlib
+import os
+import pickle
 import shutil
-import tomllib
+import sys
+import typing as ty
 from dataclasses import dataclass, field
 from pathlib import Path
 
 from tools import git
+from tools.cache import cache_dir
 
-_THIS_REPO_ROOT = git.repo_root(Path(__file__))
-_ENV_TOML = _THIS_REPO_ROOT / ".env.toml"
-_ENV_TEMPLATE = _THIS_REPO_ROOT / ".env.template.toml"
+# Nothing here runs at import time: every console script imports this module,
+# and most only need the config on some paths (or after `--help`).
+
+
+def _env_toml() -> Path:
+    return git.repo_root(Path(__file__)) / ".env.toml"
+
+
+def _env_template() -> Path:
+    return git.repo_root(Path(__file__)) / ".env.template.toml"
 
 
 @dataclass
@@ -61,61 +73,193 @@ class EnvTomlConfig:
     vault: VaultConfig = field(default_factory=VaultConfig)
 
 
+class EnvError(ValueError):
+    pass
+
+
+# ---------------------------------------------------------------------------
+# Parsing: every problem is collected, then reported together
+# ---------------------------------------------------------------------------
+#
+# Unknown keys are only warned about: a key some other checkout (or an older
+# template) writes shouldn't stop every script from starting.
+
+
 def _expand_user(s: str | None) -> Path | None:
     return Path(s).expanduser() if s else None
 
 
-def load_env() -> EnvTomlConfig | None:
-    if not _ENV_TOML.exists():
-        return None
-    with _ENV_TOML.open("rb") as f:
-        data = tomllib.load(f)
+def _key(prefix: str, key: str) -> str:
+    return f"{prefix}.{key}" if prefix else key
+
+
+def _table(errors: list[str], data: dict[str, ty.Any], prefix: str, key: str) -> dict[str, ty.Any]:
+    value = data.get(key, {})
+    if isinstance(value, dict):
+        return value
+    errors.append(f"{_key(prefix, key)}: expected a table, got {value!r}")
+    return {}
+
+
+def _str(errors: list[str], data: dict[str, ty.Any], prefix: str, key: str) -> str:
+    value = data.get(key, "")
+    if isinstance(value, str):
+        return value
+    errors.append(f"{_key(prefix, key)}: expected a string, got {value!r}")
+    return ""
+
+
+def _path(errors: list[str], data: dict[str, ty.Any], prefix: str, key: str) -> Path | None:
+    return _expand_user(_str(errors, data, prefix, key))
+
+
+def _paths(errors: list[str], data: dict[str, ty.Any], prefix: str, key: str) -> dict[str, Path]:
+    where = _key(prefix, key)
+    table = _table(errors, data, prefix, key)
+    return {name: path for name in table if (path := _path(errors, table, where, name))}
+
+
+def _unknown_keys(warnings: list[str], data: dict[str, ty.Any], prefix: str, known: set[str]) -> None:
+    warnings.extend(f"{_key(prefix, key)}: unknown key, ignored" for key in data if key not in known)
+
+
+def _parse(data: dict[str, ty.Any], warnings: list[str]) -> EnvTomlConfig:
+    """Raises EnvError listing every problem in the file, not just the first;
+    appends anything merely suspicious to `warnings`."""
+    errors: list[str] = []
+    _unknown_keys(warnings, data, "", {"computer_name", "claude", "immich", "vault"})
 
     config = EnvTomlConfig()
-    config.computer_name = data.get("computer_name", "")
+    config.computer_name = _str(errors, data, "", "computer_name")
 
-    claude_data = data.get("claude", {})
+    claude_data = _table(errors, data, "", "claude")
+    _unknown_keys(warnings, claude_data, "claude", {"project-targets", "auto-memory-paths"})
     config.claude = ClaudeConfig(
-        project_targets={
-            project_name: target
-            for project_name, target_str in claude_data.get("project-targets", {}).items()
-            if (target := _expand_user(target_str))
-        },
-        auto_memory_paths={
-            project_name: path
-            for project_name, path_str in claude_data.get("auto-memory-paths", {}).items()
-            if (path := _expand_user(path_str))
-        },
+        project_targets=_paths(errors, claude_data, "claude", "project-targets"),
+        auto_memory_paths=_paths(errors, claude_data, "claude", "auto-memory-paths"),
     )
 
-    immich_data = data.get("immich", {})
+    immich_data = _table(errors, data, "", "immich")
+    _unknown_keys(warnings, immich_data, "immich", {"server_url", "api_key"})
     config.immich = ImmichConfig(
-        server_url=immich_data.get("server_url", ""),
-        api_key=immich_data.get("api_key", ""),
+        server_url=_str(errors, immich_data, "immich", "server_url"),
+        api_key=_str(errors, immich_data, "immich", "api_key"),
     )
 
-    vault_data = data.get("vault", {})
-    main_vault_data = vault_data.get("main", {})
+    vault_data = _table(errors, data, "", "vault")
+    _unknown_keys(warnings, vault_data, "vault", {"main", "work", "walked-file"})
+    main_vault_data = _table(errors, vault_data, "vault", "main")
+    _unknown_keys(warnings, main_vault_data, "vault.main", {"root", "walked-file"})
     config.vault = VaultConfig(
         main=MainVaultConfig(
-            root=_expand_user(main_vault_data.get("root")),
-            walked_file=_expand_user(main_vault_data.get("walked-file")),
+            root=_path(errors, main_vault_data, "vault.main", "root"),
+            walked_file=_path(errors, main_vault_data, "vault.main", "walked-file"),
         )
     )
+    if "walked-file" in vault_data:  # where the template used to put it
+        warnings.append("vault.walked-file: deprecated, move it under [vault.main]")
+        legacy_walked_file = _path(errors, vault_data, "vault", "walked-file")
+        config.vault.main.walked_file = config.vault.main.walked_file or legacy_walked_file
+
+    if work_vault_data := _table(errors, vault_data, "vault", "work"):
+        _unknown_keys(warnings, work_vault_data, "vault.work", {"root", "current-project"})
+        config.vault.work = WorkVaultConfig(root=_path(errors, work_vault_data, "vault.work", "root"))
+        where = "vault.work.current-project"
+        if current_project_data := _table(errors, work_vault_data, "vault.work", "current-project"):
+            _unknown_keys(warnings, current_project_data, where, {"personal", "shared"})
+            personal, shared = (
+                _path(errors, current_project_data, where, k) for k in ("personal", "shared")
+            )
+            if personal and shared:
+                config.vault.work.current_project = WorkVaultCurrentProjectConfig(personal, shared)
+            else:
+                errors.append(f"{where}: set both personal and shared, or neither")
+
+    if errors:
+        raise EnvError(f"invalid {_env_toml()}:\n  " + "\n  ".join(errors))
+    return config
+
+
+# ---------------------------------------------------------------------------
+# Loading: memoized per process, and snapshotted across processes
+# ---------------------------------------------------------------------------
+#
+# Both are keyed on .env.toml's (mtime_ns, size), so an edit is picked up by
+# the next load.  The snapshot is a pickle of the parsed config in the user
+# cache; unpickling it skips tomllib (pure Python) and validation entirely.
+# The parse's warnings are kept with it, so every run still shows them.
+
+_SNAPSHOT_VERSION = 2  # bump when the config dataclasses (or the snapshot) change shape
+
+_Stamp = tuple[int, int]
+_loaded: tuple[_Stamp, EnvTomlConfig] | None = None
+
+
+def _snapshot_file(env_toml: Path) -> Path:
+    key = hashlib.sha256(str(env_toml).encode()).hexdigest()[:16]
+    return cache_dir("env", f"{key}.pickle")
+
+
+def _read_snapshot(env_toml: Path, stamp: _Stamp) -> tuple[EnvTomlConfig, list[str]] | None:
+    try:
+        with _snapshot_file(env_toml).open("rb") as f:
+            version, snapshot_stamp, config, warnings = pickle.load(f)
+    # missing, truncated, or pickled from classes that have since changed
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, ValueError, TypeError):
+        return None
+    ok = version == _SNAPSHOT_VERSION and snapshot_stamp == stamp and isinstance(config, EnvTomlConfig)
+    return (config, warnings) if ok else None
+
+
+def _write_snapshot(env_toml: Path, stamp: _Stamp, config: EnvTomlConfig, warnings: list[str]) -> None:
+    snapshot = _snapshot_file(env_toml)
+    try:
+        snapshot.parent.mkdir(parents=True, exist_ok=True)
+        tmp = snapshot.with_suffix(".tmp")
+        # the config holds secrets (immich.api_key): owner-only, whatever the umask
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            os.fchmod(fd, 0o600)  # in case a stale tmp was left with wider permissions
+            f.write(pickle.dumps((_SNAPSHOT_VERSION, stamp, config, warnings)))
+        tmp.replace(snapshot)
+    except OSError:
+        pass  # only ever a speedup
+
+
+def load_env() -> EnvTomlConfig | None:
+    """Raises EnvError if .env.toml exists but doesn't validate."""
+    global _loaded
+
+    env_toml = _env_toml()
+    try:
+        st = env_toml.stat()
+    except FileNotFoundError:
+        return None
+    stamp = (st.st_mtime_ns, st.st_size)
+    if _loaded and _loaded[0] == stamp:
+        return _loaded[1]
 
-    if work_vault_data := vault_data.get("work", {}):
-        config.vault.work = WorkVaultConfig(root=work_vault_data.get("root"))
-        if current_project_data := work_vault_data.get("current-project", {}):
-            personal, shared = (_expand_user(current_project_data.get(k)) for k in ("personal", "shared"))
-            assert personal and shared
-            config.vault.work.current_project = WorkVaultCurrentProjectConfig(personal, shared)
+    if snapshot := _read_snapshot(env_toml, stamp):
+        config, warnings = snapshot
+    else:
+        import tomllib
 
+        try:
+            data = tomllib.loads(env_toml.read_text())
+        except tomllib.TOMLDecodeError as e:
+            raise EnvError(f"invalid {env_toml}: {e}") from None
+        warnings = []
+        config = _parse(data, warnings)
+        _write_snapshot(env_toml, stamp, config, warnings)
+    for warning in warnings:
+        print(f"warning: {env_toml}: {warning}", file=sys.stderr)
+    _loaded = (stamp, config)
     return config
 
 
 def require_env() -> EnvTomlConfig:
     env = load_env()
     if env is None:
-        shutil.copy(_ENV_TEMPLATE, _ENV_TOML)
+        shutil.copy(_env_template(), _env_toml())
         raise EnvironmentError(".env.toml did not previously exist; fill it out now and re-run this script")
     return env
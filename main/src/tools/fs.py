@@ -0,0 +1,107 @@
+"""Rewriting files in place without upsetting whatever is watching them.
+
+Vault files are watched by Relay / iCloud: every write is an upload, even one
+that leaves the bytes as they were, and a file caught half-written is how
+conflicted copies get made.  So writes that would change nothing are skipped,
+and the rest are written to a temp file beside the target and renamed over
+it, so watchers only ever see the old bytes or the new ones.
+
+Temp files are dot-prefixed, so the vault walkers (and Relay) ignore them.
+A symlinked target is written through: the file it points at is replaced,
+and the link is left as it was.
+"""
+
+import os
+import tempfile
+import threading
+import typing as ty
+from pathlib import Path
+
+# what open() would give a new file under the usual 022 umask; reading the
+# real umask means setting it, which isn't safe with writer threads around
+_NEW_FILE_MODE = 0o644
+
+
+def _unchanged(path: Path, data: bytes) -> bool:
+    try:
+        if path.stat().st_size != len(data):
+            return False
+        return path.read_bytes() == data
+    except FileNotFoundError:
+        return False
+
+
+def _fsync(path: Path) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class AtomicWrites:
+    """Stages writes and commits them together: the temp files are fsynced
+    in one pass, renamed into place, and then each directory touched is
+    fsynced once.  Leaving the `with` block with an exception discards
+    everything staged and leaves the targets untouched."""
+
+    def __init__(self, *, fsync: bool = True) -> None:
+        self.fsync = fsync
+        self._staged: list[tuple[Path, Path]] = []  # (temp, target)
+        self._lock = threading.Lock()  # staging may happen from a pool of writers
+
+    def write_if_changed(self, path: Path, data: str | bytes) -> bool:
+        """Stages `data` for `path` unless that's already its content; True if staged."""
+        path = path.resolve()
+        data = data.encode() if isinstance(data, str) else data
+        if _unchanged(path, data):
+            return False
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        try:
+            os.chmod(tmp, path.stat().st_mode & 0o7777)
+        except FileNotFoundError:
+            os.chmod(tmp, _NEW_FILE_MODE)
+        with self._lock:
+            self._staged.append((Path(tmp), path))
+        return True
+
+    def commit(self) -> None:
+        with self._lock:
+            staged, self._staged = self._staged, []
+        try:
+            if self.fsync:
+                for tmp, _ in staged:
+                    _fsync(tmp)
+            for tmp, path in staged:
+                os.replace(tmp, path)
+        except BaseException:
+            for tmp, _ in staged:
+                tmp.unlink(missing_ok=True)  # those already renamed are gone anyway
+            raise
+        if self.fsync:
+            for directory in {path.parent for _, path in staged}:
+                _fsync(directory)
+
+    def discard(self) -> None:
+        with self._lock:
+            staged, self._staged = self._staged, []
+        for tmp, _ in staged:
+            tmp.unlink(missing_ok=True)
+
+    def __enter__(self) -> ty.Self:
+        return self
+
+    def __exit__(self, exc_type: type[BaseException] | None, *_: object) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+
+
+def write_if_changed(path: Path, data: str | bytes, *, fsync: bool = True) -> bool:
+    """Atomically replaces `path`'s content with `data`, unless it already is
+    exactly that.  Returns whether anything was written."""
+    with AtomicWrites(fsync=fsync) as writes:
+        return writes.write_if_changed(path, data)
@@ -1,11 +1,21 @@
-import subprocess
 from functools import lru_cache
 from pathlib import Path
 
 
 @lru_cache
 def repo_root(file: Path | None = None) -> Path:
-    cwd = (file if file.is_dir() else file.parent) if file and file.exists() else None
+    """The nearest directory at or above `file` (default: the cwd) with a
+    `.git` in it -- a directory, or the file a worktree or submodule has.
+    Found by looking rather than by running `git`, which would cost every
+    script a subprocess at startup; `git` is only asked when nothing's found,
+    so it can report why."""
+    start = ((file if file.is_dir() else file.parent) if file and file.exists() else Path.cwd()).resolve()
+    for d in (start, *start.parents):
+        if (d / ".git").exists():
+            return d
+
+    import subprocess
+
     return Path(
-        subprocess.check_output(["git", "rev-parse", "--show-toplevel"], text=True, cwd=cwd).strip()
+        subprocess.check_output(["git", "rev-parse", "--show-toplevel"], text=True, cwd=start).strip()
     )
@@ -13,22 +13,43 @@ so every .tgz overlays into a single shared root — this is what immich-go
 expects so album JSON sidecars resolve their photos. Trial extracts into
 the same shared root so the work is reused (memoized) by later runs.
 
-NOTE: @pure.magic() content-hashes Path inputs, so the first time we see a
-50GB .tgz mops will SHA-256 the whole file before deciding cache hit/miss.
-Hashes persist at ~/.thds/core/hash-cache, so subsequent runs are fast.
+  --jobs N        extract up to N archives at once (default 1)
+  --jobs auto     find the concurrency the disk does best at by measuring
+                  it (see tools.takeout.extract)
+
+NOTE: @pure.magic() would content-hash a Path input, so the first time it
+saw a 50GB .tgz mops would SHA-256 the whole file before deciding cache
+hit/miss.  So `_unzip` takes the archive as a `Fingerprinted` instead -- by
+default size, mtime, inode and a few MB of sampled blocks (see
+tools.takeout.fingerprint) -- and a cold-cache --trial starts extracting in
+seconds.
+
+  --fingerprint full    memoize on a SHA-256 of each whole archive instead
+
+Uploads run as one immich-go per year, several at once, and resume from
+where an interrupted run stopped (see tools.takeout.upload).
 """
 
 import argparse
 import logging
-import subprocess
+import time
 import typing as ty
-from datetime import datetime, timezone
+from datetime import UTC, datetime
+from functools import cache
 from pathlib import Path
 
-from thds.core.project_root import find_project_root
-from thds.mops import pure
-
 from tools.env import require_env
+from tools.takeout.extract import Jobs, extract_all
+from tools.takeout.fingerprint import Fingerprinted, FingerprintMode, fingerprinted
+from tools.takeout.untar import untar
+from tools.takeout.upload import (
+    Checkpoint,
+    ImmichGo,
+    album_names,
+    default_checkpoint_path,
+    upload_shards,
+    year_shards,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -36,52 +57,73 @@ _BASE = Path("/Volumes/seagate1tb/google-photo-migration")
 _RAW_TGZ_DIR = _BASE / "raw/brittany"
 _UNZIPPED_ROOT = _BASE / "unzipped/brittany"
 
-_PROJECT_DIR = find_project_root(Path(__file__))
-_MOPS_BLOB_ROOT = _PROJECT_DIR / ".mops"
-_LOGS_DIR = _PROJECT_DIR / ".out/logs"
+
+@cache
+def _project_dir() -> Path:
+    from thds.core.project_root import find_project_root
+
+    return find_project_root(Path(__file__))
 
 
-@pure.magic(pipeline_id="google-photos-to-immich", blob_root=_MOPS_BLOB_ROOT)
-def _unzip(tgz: Path, dest_root: str) -> None:
+def _unzip(tgz: Fingerprinted, dest_root: str) -> None:
     """Extract one .tgz directly into dest_root. Returns dest_root.
 
     Multiple Takeout deliveries share the same Takeout/ subtree on purpose,
     so calling this repeatedly with different tgzs and the same dest_root
-    overlays them into a single merged tree.
+    overlays them into a single merged tree.  Files an earlier delivery (or
+    an earlier, interrupted run) already wrote identically are skipped.
     """
     dest_root_ = Path(dest_root)
-    logger.warning(
-        "extracting %s into %s (will overwrite same-named files already in dest)", tgz, dest_root_
+    logger.info("extracting %s into %s", tgz.path, dest_root_)
+    result = untar(Path(tgz.path), dest_root_)
+    logger.info(
+        "%s: wrote %d file(s) (%.1f GB), %d already extracted",
+        Path(tgz.path).name,
+        result.written,
+        result.bytes_written / 1e9,
+        result.skipped,
     )
-    dest_root_.mkdir(parents=True, exist_ok=True)
-    subprocess.check_call(["tar", "-xf", str(tgz), "-C", str(dest_root_)])
 
 
-def _upload_with_immich_go(takeout_root: Path, *, log_file: Path, dry_run: bool) -> None:
+@cache
+def _memoized_unzip() -> ty.Callable[[Fingerprinted, str], None]:
+    """`_unzip` under @pure.magic().  Applied on first use because importing
+    thds.mops takes about a second, which `--help` shouldn't pay."""
+    from thds.mops import pure
+
+    return pure.magic(pipeline_id="google-photos-to-immich", blob_root=_project_dir() / ".mops")(_unzip)
+
+
+def _upload_with_immich_go(
+    takeout_root: Path, *, log_dir: Path, dry_run: bool, max_uploads: int = 4
+) -> None:
     env = require_env()
-    cmd = [
-        "immich-go",
-        "upload",
-        "from-google-photos",
-        "--server",
-        env.immich.server_url,
-        "--api-key",
-        env.immich.api_key,
-        *(["--dry-run"] if dry_run else []),
-        "--concurrent-tasks=1",
-        "--on-errors=4",
-        f"--log-file={str(log_file)}",
-        str(takeout_root),
-    ]
-    log_file.parent.mkdir(parents=True, exist_ok=True)
-    # Mask the api key for logging.
-    log_cmd = [("***" if part == env.immich.api_key else part) for part in cmd]
-    logger.info("running: %s", " ".join(log_cmd))
-    subprocess.check_call(cmd)
-
-
-def main(*, src_tgz_dir: Path, unzip_dest_dir: Path, dry_run: bool, limit: ty.Optional[int]) -> None:
-    now = datetime.now(tz=timezone.utc)
+    upload_shards(
+        takeout_root,
+        year_shards(takeout_root),
+        ImmichGo(env.immich.server_url, env.immich.api_key),
+        log_dir=log_dir,
+        dry_run=dry_run,
+        checkpoint=Checkpoint(
+            None if dry_run else default_checkpoint_path(takeout_root, env.immich.server_url)
+        ),
+        max_concurrency=max_uploads,
+        albums=album_names(takeout_root),
+    )
+
+
+def main(
+    *,
+    src_tgz_dir: Path,
+    unzip_dest_dir: Path,
+    dry_run: bool,
+    limit: int | None,
+    jobs: Jobs = 1,
+    max_jobs: int = 4,
+    fingerprint: FingerprintMode = "sampled",
+    max_uploads: int = 4,
+) -> None:
+    now = datetime.now(tz=UTC)
     tgzs = sorted(src_tgz_dir.glob("*.tgz"))
     if not tgzs:
         raise FileNotFoundError(f"no .tgz files found in {src_tgz_dir}")
@@ -91,11 +133,21 @@ def main(*, src_tgz_dir: Path, unzip_dest_dir: Path, dry_run: bool, limit: ty.Op
         logger.info("limit mode: %d archive(s)", len(tgzs))
 
     logger.info("extracting %d archive(s) into shared root %s", len(tgzs), unzip_dest_dir)
-    for tgz in tgzs:
-        _unzip(tgz, str(unzip_dest_dir))
+    unzip = _memoized_unzip()
+    start = time.monotonic()
+    extracted = extract_all(
+        tgzs,
+        lambda tgz: unzip(fingerprinted(tgz, fingerprint), str(unzip_dest_dir)),
+        jobs=jobs,
+        max_jobs=max_jobs,
+    )
+    total, elapsed = sum(e.size for e in extracted), time.monotonic() - start
+    # every archive memoized (or none to extract) can finish within the clock's resolution
+    rate = total / 1e6 / max(elapsed, 1e-9)
+    logger.info("extracted %.1f GB in %.0fs (%.0f MB/s overall)", total / 1e9, elapsed, rate)
 
-    log_file = _LOGS_DIR / f"{now.isoformat(timespec='seconds')}.log"
-    _upload_with_immich_go(unzip_dest_dir, log_file=log_file, dry_run=dry_run)
+    log_dir = _project_dir() / ".out/logs" / now.isoformat(timespec="seconds")
+    _upload_with_immich_go(unzip_dest_dir, log_dir=log_dir, dry_run=dry_run, max_uploads=max_uploads)
 
 
 def cli() -> None:
@@ -113,10 +165,39 @@ def cli() -> None:
         default=None,
         help="extract only the first N archives (ignored if --trial)",
     )
+    parser.add_argument(
+        "--jobs",
+        type=lambda s: s if s == "auto" else int(s),
+        default=1,
+        help="archives to extract at once, or 'auto' to find the best number by measuring (default: 1)",
+    )
+    parser.add_argument("--max-jobs", type=int, default=4, help="upper bound for --jobs auto (default: 4)")
+    parser.add_argument(
+        "--fingerprint",
+        choices=ty.get_args(FingerprintMode),
+        default="sampled",
+        help="how archives are identified for memoization (default: sampled; 'full' reads all of each)",
+    )
+    parser.add_argument(
+        "--max-uploads",
+        type=int,
+        default=4,
+        help="most immich-go processes (one per year of photos) to run at once; "
+        "starts at 1 and adapts to the server (default: 4)",
+    )
     args = parser.parse_args()
 
     logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
-    main(src_tgz_dir=_RAW_TGZ_DIR, unzip_dest_dir=_UNZIPPED_ROOT, dry_run=args.dry_run, limit=args.limit)
+    main(
+        src_tgz_dir=_RAW_TGZ_DIR,
+        unzip_dest_dir=_UNZIPPED_ROOT,
+        dry_run=args.dry_run,
+        limit=args.limit,
+        jobs=args.jobs,
+        max_jobs=args.max_jobs,
+        fingerprint=args.fingerprint,
+        max_uploads=args.max_uploads,
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,69 @@
+"""Chunked file hashing and comparison.
+
+Nothing here holds more than one chunk per file in memory, so comparing two
+multi-GB videos costs the same RSS as comparing two notes.  The `*_many`
+variants fan out over a thread pool: hashlib and file reads release the GIL,
+so threads overlap I/O latency (and, on SSDs, hashing) across files.  That
+only pays once there's enough to read and a second CPU to hash on: on one
+CPU, or for a few MB of notes the page cache already holds, the pool costs
+more than it overlaps, so those run serially.
+"""
+
+import hashlib
+import os
+import typing as ty
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+CHUNK_SIZE = 1 << 20
+PARALLEL_MIN_BYTES = 16 << 20
+
+
+def file_digest(path: Path) -> str:
+    with path.open("rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def read_head(path: Path, n: int) -> bytes:
+    with path.open("rb") as f:
+        return f.read(n)
+
+
+def files_equal(a: Path, b: Path, *, chunk_size: int = CHUNK_SIZE) -> bool:
+    """Byte-for-byte equality, stopping at the first differing chunk."""
+    if a.stat().st_size != b.stat().st_size:
+        return False
+    with a.open("rb") as fa, b.open("rb") as fb:
+        while True:
+            chunk_a = fa.read(chunk_size)
+            if chunk_a != fb.read(chunk_size):
+                return False
+            if not chunk_a:
+                return True
+
+
+def _parallel_map[T, R](
+    fn: ty.Callable[[T], R], items: ty.Sequence[T], max_workers: int | None, total_bytes: int | None
+) -> list[R]:
+    """`total_bytes`, if the caller knows it, is how much `fn` will read over all `items`."""
+    if (
+        len(items) <= 1
+        or (os.process_cpu_count() or 1) <= 1
+        or (total_bytes is not None and total_bytes < PARALLEL_MIN_BYTES)
+    ):
+        return list(map(fn, items))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(fn, items))
+
+
+def digest_many(
+    paths: ty.Sequence[Path], *, max_workers: int | None = None, total_bytes: int | None = None
+) -> list[str]:
+    return _parallel_map(file_digest, paths, max_workers, total_bytes)
+
+
+def equal_many(
+    pairs: ty.Sequence[tuple[Path, Path]], *, max_workers: int | None = None, total_bytes: int | None = None
+) -> list[bool]:
+    """`total_bytes` is the size of one side of each pair, summed."""
+    return _parallel_map(lambda pair: files_equal(*pair), pairs, max_workers, total_bytes)
@@ -0,0 +1,206 @@
+"""Line-matching engines behind `tools.diff`.
+
+Lines are interned to small ints first, so every comparison an engine makes
+is an int compare rather than a string compare, and engines never see text.
+
+An engine returns matching blocks in `difflib.SequenceMatcher.get_matching_blocks`
+form -- ascending, non-overlapping `(a, b, size)` runs ending in the
+`(len(a), len(b), 0)` sentinel -- and everything downstream (opcodes, hunk
+grouping, unified-diff lines) is derived from those once.
+
+  patience  anchor on lines that occur exactly once on each side (or,
+            failing that, on the rarest lines), recurse between anchors;
+            repeated boilerplate (transcript filler, table rules) can't pull
+            the alignment around, and the work is close to linear.  Regions
+            with nothing to anchor on fall back to difflib.
+  difflib   plain `SequenceMatcher` (what `tools.diff` used to call directly)
+"""
+
+import bisect
+import difflib
+import typing as ty
+
+
+class Match(ty.NamedTuple):
+    a: int
+    b: int
+    size: int
+
+
+OpTag = ty.Literal["equal", "replace", "delete", "insert"]
+
+
+class Opcode(ty.NamedTuple):
+    tag: OpTag
+    i1: int
+    i2: int
+    j1: int
+    j2: int
+
+
+DiffEngine = ty.Callable[[ty.Sequence[int], ty.Sequence[int]], list[Match]]
+EngineName = ty.Literal["patience", "difflib"]
+
+
+def intern_lines(a: ty.Sequence[str], b: ty.Sequence[str]) -> tuple[list[int], list[int]]:
+    ids: dict[str, int] = {}
+    return [ids.setdefault(line, len(ids)) for line in a], [ids.setdefault(line, len(ids)) for line in b]
+
+
+# ---------------------------------------------------------------------------
+# Engines
+# ---------------------------------------------------------------------------
+
+
+def _difflib_blocks(a: ty.Sequence[int], b: ty.Sequence[int]) -> list[Match]:
+    return [Match(*m) for m in difflib.SequenceMatcher(None, a, b).get_matching_blocks()]
+
+
+# Lines repeated more often than this never anchor; their regions go to difflib.
+_MAX_ANCHOR_OCCURRENCES = 64
+
+
+def _anchors(
+    a: ty.Sequence[int], b: ty.Sequence[int], alo: int, ahi: int, blo: int, bhi: int
+) -> list[tuple[int, int]]:
+    """Longest increasing run of (i, j) pairs of the rarest lines the regions
+    share.  That's lines unique to both when there are any (patience diff);
+    otherwise the rarest lines occurring equally often on both sides, k-th
+    occurrence paired with k-th (after histogram diff)."""
+    in_a: dict[int, list[int]] = {}
+    for i in range(alo, ahi):
+        in_a.setdefault(a[i], []).append(i)
+    in_b: dict[int, list[int]] = {}
+    for j in range(blo, bhi):
+        in_b.setdefault(b[j], []).append(j)
+
+    def shared_count(line: int, at: list[int]) -> int:
+        return len(at) if len(at) <= _MAX_ANCHOR_OCCURRENCES and len(in_b.get(line, ())) == len(at) else 0
+
+    rarest = min((n for line, at in in_a.items() if (n := shared_count(line, at))), default=0)
+    if not rarest:
+        return []
+    pairs = sorted(
+        pair
+        for line, at in in_a.items()
+        if len(at) == rarest and shared_count(line, at)
+        for pair in zip(at, in_b[line])
+    )
+
+    # patience sorting: piles[k] ends the best increasing run of length k+1
+    tops: list[int] = []  # j at the top of each pile, increasing
+    piles: list[int] = []  # index into pairs at the top of each pile
+    back: list[int] = []  # predecessor of each pair in its run
+    for n, (_, j) in enumerate(pairs):
+        k = bisect.bisect_left(tops, j)
+        back.append(piles[k - 1] if k else -1)
+        if k == len(tops):
+            tops.append(j)
+            piles.append(n)
+        else:
+            tops[k] = j
+            piles[k] = n
+
+    anchors: list[tuple[int, int]] = []
+    n = piles[-1] if piles else -1
+    while n >= 0:
+        anchors.append(pairs[n])
+        n = back[n]
+    anchors.reverse()
+    return anchors
+
+
+def _patience_blocks(a: ty.Sequence[int], b: ty.Sequence[int]) -> list[Match]:
+    matched: list[tuple[int, int]] = []
+    regions = [(0, len(a), 0, len(b))]
+    while regions:
+        alo, ahi, blo, bhi = regions.pop()
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            matched.append((alo, blo))
+            alo, blo = alo + 1, blo + 1
+        while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+            ahi, bhi = ahi - 1, bhi - 1
+            matched.append((ahi, bhi))
+        if alo == ahi or blo == bhi:
+            continue
+
+        anchors = _anchors(a, b, alo, ahi, blo, bhi)
+        if not anchors:
+            for m in _difflib_blocks(a[alo:ahi], b[blo:bhi]):
+                matched.extend((alo + m.a + k, blo + m.b + k) for k in range(m.size))
+            continue
+        for i, j in anchors:
+            matched.append((i, j))
+            regions.append((alo, i, blo, j))
+            alo, blo = i + 1, j + 1
+        regions.append((alo, ahi, blo, bhi))
+
+    matched.sort()
+    blocks: list[Match] = []
+    for i, j in matched:
+        if blocks and blocks[-1].a + blocks[-1].size == i and blocks[-1].b + blocks[-1].size == j:
+            blocks[-1] = blocks[-1]._replace(size=blocks[-1].size + 1)
+        else:
+            blocks.append(Match(i, j, 1))
+    blocks.append(Match(len(a), len(b), 0))
+    return blocks
+
+
+ENGINES: dict[EngineName, DiffEngine] = {"patience": _patience_blocks, "difflib": _difflib_blocks}
+DEFAULT_ENGINE: EngineName = "patience"
+
+
+# ---------------------------------------------------------------------------
+# Derived views
+# ---------------------------------------------------------------------------
+
+
+def matching_blocks(
+    a: ty.Sequence[str], b: ty.Sequence[str], *, engine: EngineName = DEFAULT_ENGINE
+) -> list[Match]:
+    return ENGINES[engine](*intern_lines(a, b))
+
+
+def opcodes(blocks: ty.Iterable[tuple[int, int, int]]) -> list[Opcode]:
+    """Same shape as `SequenceMatcher.get_opcodes`."""
+    ops: list[Opcode] = []
+    i = j = 0
+    for ai, bj, size in blocks:
+        if i < ai and j < bj:
+            ops.append(Opcode("replace", i, ai, j, bj))
+        elif i < ai:
+            ops.append(Opcode("delete", i, ai, j, bj))
+        elif j < bj:
+            ops.append(Opcode("insert", i, ai, j, bj))
+        i, j = ai + size, bj + size
+        if size:
+            ops.append(Opcode("equal", ai, i, bj, j))
+    return ops
+
+
+def grouped_opcodes(ops: list[Opcode], context: int = 3) -> list[list[Opcode]]:
+    """Same grouping as `SequenceMatcher.get_grouped_opcodes`: one group per
+    unified-diff hunk, with up to `context` equal lines either side."""
+    if not ops:
+        ops = [Opcode("equal", 0, 1, 0, 1)]
+    ops = ops.copy()
+    if ops[0].tag == "equal":
+        _, i1, i2, j1, j2 = ops[0]
+        ops[0] = Opcode("equal", max(i1, i2 - context), i2, max(j1, j2 - context), j2)
+    if ops[-1].tag == "equal":
+        _, i1, i2, j1, j2 = ops[-1]
+        ops[-1] = Opcode("equal", i1, min(i2, i1 + context), j1, min(j2, j1 + context))
+
+    groups: list[list[Opcode]] = []
+    group: list[Opcode] = []
+    for tag, i1, i2, j1, j2 in ops:
+        # a long run of equal lines ends one hunk and starts the next
+        if tag == "equal" and i2 - i1 > context * 2:
+            group.append(Opcode(tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)))
+            groups.append(group)
+            group = []
+            i1, j1 = max(i1, i2 - context), max(j1, j2 - context)
+        group.append(Opcode(tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0].tag == "equal"):
+        groups.append(group)
+    return groups
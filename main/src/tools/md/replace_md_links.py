@@ -2,6 +2,8 @@ from pathlib import Path
 import argparse
 import subprocess
 
+from tools.fs import write_if_changed
+
 
 def _git_repo_remote_url():
     git_remote = subprocess.check_output(["git", "remote", "get-url", "origin"], text=True).strip()
@@ -28,9 +30,7 @@ def main():
         md = f.read()
 
     xfed = _xf(_git_repo_remote_url(), md)
-
-    with open(args.file, "w") as f:
-        f.write(xfed)
+    write_if_changed(args.file, xfed)
 
 
 if __name__ == "__main__":
@@ -4,6 +4,7 @@ import typing as ty
 from pathlib import Path
 
 from tools.copy_paste import pbcopy, pbpaste
+from tools.fs import write_if_changed
 
 xfs: ty.Final = {
     "* [ ]": "- [ ]",
@@ -27,8 +28,8 @@ def _replace_common_formatting(content: str) -> str:
 
 def main(file: Path | None = None) -> None:
     if file:
-        file.write_text(_replace_common_formatting(file.read_text()))
-        print("done")
+        wrote = write_if_changed(file, _replace_common_formatting(file.read_text()))
+        print("done" if wrote else "no changes")
         return
 
     is_atty = sys.stdin.isatty()
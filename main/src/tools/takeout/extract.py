@@ -0,0 +1,136 @@
+"""Extracting several Takeout .tgz deliveries at once.
+
+Extraction is bound by the disk, not the CPU: on a USB spinning disk two
+concurrent extractions may beat one while four thrash the heads, whatever
+the core count.  So `jobs="auto"` measures instead of guessing -- it starts
+with one extraction, adds another while the combined throughput keeps
+improving, and backs off (then holds) once it stops.
+
+The pool here only bounds how many extractions run; what an extraction is
+comes from the caller (see tools.takeout.untar).  It's a thread pool, not a
+process pool: the caller's extraction is usually a memoized closure that
+won't pickle, and the heavy parts of one don't hold the GIL -- pigz (when
+installed) decompresses in its own process, and zlib, hashlib and file
+reads and writes all release it -- so what the probe measures is the disk.
+Extractions into one destination share its index; tools.takeout.untar
+serializes the writes to it.
+"""
+
+import logging
+import time
+import typing as ty
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+Jobs = int | ty.Literal["auto"]
+
+# Quicker than this and it was a memoized no-op, not a measurement of the disk.
+_MIN_MEASURED_SECONDS = 1.0
+
+
+class Extracted(ty.NamedTuple):
+    archive: Path
+    size: int
+    seconds: float
+    jobs: int
+    """how many extractions were allowed to run alongside this one"""
+
+    @property
+    def mb_per_s(self) -> float:
+        return self.size / 1e6 / self.seconds if self.seconds else 0.0
+
+
+class ConcurrencyProbe:
+    """Hill-climbs the number of concurrent jobs on measured throughput.
+
+    Each level is measured over `samples` completions (at least one per job
+    running); a level that beats the best so far by `gain` earns another
+    job, anything less settles the search -- one level back if throughput
+    actually dropped.
+    """
+
+    def __init__(self, *, max_jobs: int, samples: int = 2, gain: float = 1.1) -> None:
+        self.jobs = 1
+        self.max_jobs = max_jobs
+        self.samples = samples
+        self.gain = gain
+        self.settled = max_jobs <= 1
+        self._best = 0.0
+        self._start_window(time.monotonic())
+
+    def _start_window(self, now: float) -> None:
+        self._window_start = now
+        self._window_bytes = 0
+        self._window_count = 0
+
+    def record(self, size: int, now: float) -> None:
+        if self.settled:
+            return
+        self._window_bytes += size
+        self._window_count += 1
+        if self._window_count < max(self.samples, self.jobs):
+            return
+
+        rate = self._window_bytes / max(now - self._window_start, 1e-9)
+        logger.info("%d concurrent extraction(s): %.0f MB/s", self.jobs, rate / 1e6)
+        if rate > self._best * self.gain and self.jobs < self.max_jobs:
+            self._best = rate
+            self.jobs += 1
+        else:
+            if rate < self._best:
+                self.jobs -= 1
+            self.settled = True
+            logger.info("settled on %d concurrent extraction(s)", self.jobs)
+        self._start_window(now)
+
+
+def extract_all(
+    archives: ty.Sequence[Path],
+    extract: ty.Callable[[Path], object],
+    *,
+    jobs: Jobs = 1,
+    max_jobs: int = 4,
+) -> list[Extracted]:
+    """Runs `extract` on every archive, at most `jobs` at a time (or as many
+    as `ConcurrencyProbe` finds pays off, up to `max_jobs`), in order of
+    submission; returns per-archive throughput in order of completion.
+
+    The first failure is raised once the extractions already running finish;
+    nothing new is started after it."""
+    probe = ConcurrencyProbe(max_jobs=max_jobs) if jobs == "auto" else None
+
+    def limit() -> int:
+        return probe.jobs if probe else ty.cast(int, jobs)
+
+    pending = deque(archives)
+    running: dict[Future[object], tuple[Path, float, int]] = {}
+    results: list[Extracted] = []
+    with ThreadPoolExecutor(max_workers=max_jobs if probe else limit()) as pool:
+        while pending or running:
+            while pending and len(running) < limit():
+                archive = pending.popleft()
+                running[pool.submit(extract, archive)] = (archive, time.monotonic(), limit())
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                archive, start, n_jobs = running.pop(future)
+                if future.exception():
+                    pending.clear()
+                    future.result()
+                now = time.monotonic()
+                extracted = Extracted(archive, archive.stat().st_size, now - start, n_jobs)
+                logger.info(
+                    "extracted %s: %.1f GB in %.0fs (%.0f MB/s, %d job(s))",
+                    archive.name,
+                    extracted.size / 1e9,
+                    extracted.seconds,
+                    extracted.mb_per_s,
+                    n_jobs,
+                )
+                if probe and extracted.seconds >= _MIN_MEASURED_SECONDS:
+                    probe.record(extracted.size, now)
+                results.append(extracted)
+    return results
@@ -0,0 +1,62 @@
+"""Cheap identities for huge files, for memoizing on them.
+
+`@pure.magic()` content-hashes every Path argument before it can even look
+up the memo, which for a 50GB .tgz on a USB disk is the better part of an
+hour of reads.  Wrap an argument in `Fingerprinted` instead and mops sees
+two short strings: the path, and a fingerprint built from
+
+  sampled   size, mtime and inode, plus SHA-256 over the first and last
+            chunk and `chunks` evenly spaced ones in between -- a few MB
+            read, whatever the file's size
+  full      SHA-256 of the whole file, for when that's worth waiting for
+
+A sampled fingerprint misses an edit that lands between the samples and
+leaves the stat alone.  Takeout deliveries are written once and never
+edited in place, so for them that can't happen; for anything else, ask
+for "full".
+"""
+
+import hashlib
+import os
+import typing as ty
+from pathlib import Path
+
+from tools.hashing import file_digest
+
+FingerprintMode = ty.Literal["sampled", "full"]
+
+_CHUNK_SIZE = 1 << 20
+_CHUNKS = 16
+
+
+class Fingerprinted(ty.NamedTuple):
+    path: str
+    fingerprint: str
+
+
+def _sample_offsets(size: int, chunks: int, chunk_size: int) -> list[int]:
+    last = max(size - chunk_size, 0)
+    if last == 0:
+        return [0]
+    return sorted({last * n // (chunks + 1) for n in range(chunks + 2)})
+
+
+def sampled_fingerprint(path: Path, *, chunks: int = _CHUNKS, chunk_size: int = _CHUNK_SIZE) -> str:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        st = os.fstat(fd)
+        h = hashlib.sha256(f"{st.st_size}:{st.st_mtime_ns}:{st.st_ino}".encode())
+        for offset in _sample_offsets(st.st_size, chunks, chunk_size):
+            h.update(os.pread(fd, chunk_size, offset))
+    finally:
+        os.close(fd)
+    return f"sampled:{st.st_size}:{h.hexdigest()}"
+
+
+def full_fingerprint(path: Path) -> str:
+    return f"sha256:{file_digest(path)}"
+
+
+def fingerprinted(path: Path, mode: FingerprintMode = "sampled") -> Fingerprinted:
+    fingerprint = sampled_fingerprint(path) if mode == "sampled" else full_fingerprint(path)
+    return Fingerprinted(str(path), fingerprint)
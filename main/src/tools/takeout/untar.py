@@ -0,0 +1,191 @@
+"""Streaming .tgz extraction that skips what's already on disk.
+
+Takeout deliveries overlap, and a failed run leaves most of an archive
+extracted; `tar -xf` rewrites all of it anyway.  This reads the archive as
+a stream (through pigz when it's installed) and keeps an index, per
+destination, of every file it has written:
+
+    rel -> (member size, member mtime, sha256, on-disk mtime_ns)
+
+A member is skipped when the index has it at the same size and mtime and
+the file on disk still has the stat it was written with.  If the stat
+moved but the size didn't, the file is re-hashed against the recorded
+sha256 -- reading it back is still cheaper than rewriting it.  Everything
+else is written to a temp file beside the target in large writes, hashed
+on the way, and renamed into place.
+
+The index is SQLite in the user cache, committed member by member, so a
+run that dies part-way resumes from where it stopped.  Several archives may
+extract into one destination at once (see tools.takeout.extract), each with
+its own connection to the same index: a write transaction is never held
+across a member's extraction, and writes to one index from this process go
+through one lock, so no extraction waits on another's to finish.
+"""
+
+import hashlib
+import os
+import shutil
+import sqlite3
+import subprocess
+import tarfile
+import tempfile
+import threading
+import typing as ty
+from pathlib import Path
+
+from tools.cache import cache_dir
+from tools.hashing import file_digest
+
+_BUFFER_SIZE = 8 << 20
+_LOCK_TIMEOUT = 60.0  # seconds; another process extracting into the same dest
+
+_write_locks: dict[Path, threading.Lock] = {}
+_write_locks_lock = threading.Lock()
+
+
+def _write_lock(path: Path) -> threading.Lock:
+    with _write_locks_lock:
+        return _write_locks.setdefault(path.resolve(), threading.Lock())
+
+
+class Untarred(ty.NamedTuple):
+    written: int
+    skipped: int
+    bytes_written: int
+
+
+# ---------------------------------------------------------------------------
+# Index
+# ---------------------------------------------------------------------------
+
+
+class _Record(ty.NamedTuple):
+    size: int
+    mtime: int
+    sha256: str
+    disk_mtime_ns: int
+
+
+def default_index_path(dest: Path) -> Path:
+    key = hashlib.sha256(str(dest.resolve()).encode()).hexdigest()[:16]
+    return cache_dir("takeout", "untar", f"{key}.sqlite")
+
+
+class ExtractIndex:
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=_LOCK_TIMEOUT, check_same_thread=False)
+        self._lock = _write_lock(path)
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            # a commit per member: WAL appends without an fsync, and a lost tail
+            # only means re-extracting those members
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS files"
+                " (rel TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, sha256 TEXT, disk_mtime_ns INTEGER)"
+            )
+            self._db.commit()
+
+    def get(self, rel: str) -> _Record | None:
+        row = self._db.execute(
+            "SELECT size, mtime, sha256, disk_mtime_ns FROM files WHERE rel = ?", (rel,)
+        ).fetchone()
+        return _Record(*row) if row else None
+
+    def put(self, rel: str, record: _Record) -> None:
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)", (rel, *record))
+            self._db.commit()
+
+    def close(self) -> None:
+        self._db.close()
+
+
+# ---------------------------------------------------------------------------
+# Extraction
+# ---------------------------------------------------------------------------
+
+
+def _is_current(index: ExtractIndex, rel: str, member: tarfile.TarInfo, target: Path) -> bool:
+    record = index.get(rel)
+    if record is None or (record.size, record.mtime) != (member.size, int(member.mtime)):
+        return False
+    try:
+        st = target.stat()
+    except FileNotFoundError:
+        return False
+    if st.st_size != record.size:
+        return False
+    if st.st_mtime_ns == record.disk_mtime_ns:
+        return True
+    if file_digest(target) != record.sha256:
+        return False
+    index.put(rel, record._replace(disk_mtime_ns=st.st_mtime_ns))
+    return True
+
+
+def _write(src: ty.IO[bytes], member: tarfile.TarInfo, target: Path) -> _Record:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # unique per write: the same member often comes in more than one delivery,
+    # and two extractions may be writing it at once
+    fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".untar")
+    h = hashlib.sha256()
+    try:
+        with os.fdopen(fd, "wb", buffering=0) as f:
+            while chunk := src.read(_BUFFER_SIZE):
+                h.update(chunk)
+                f.write(chunk)
+        os.chmod(tmp, member.mode & 0o777 or 0o644)
+        os.utime(tmp, (member.mtime, member.mtime))
+        os.replace(tmp, target)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return _Record(member.size, int(member.mtime), h.hexdigest(), target.stat().st_mtime_ns)
+
+
+def _open_stream(tgz: Path) -> tuple[tarfile.TarFile, subprocess.Popen[bytes] | None]:
+    if pigz := shutil.which("pigz"):
+        proc = subprocess.Popen([pigz, "-dc", str(tgz)], stdout=subprocess.PIPE)
+        assert proc.stdout
+        return tarfile.open(fileobj=proc.stdout, mode="r|", bufsize=_BUFFER_SIZE), proc
+    return tarfile.open(tgz, mode="r|gz", bufsize=_BUFFER_SIZE), None
+
+
+def untar(tgz: Path, dest: Path, *, index_path: Path | None = None) -> Untarred:
+    """Extracts `tgz` into `dest`, skipping members already there (see module doc)."""
+    dest.mkdir(parents=True, exist_ok=True)
+    index = ExtractIndex(index_path or default_index_path(dest))
+    written = skipped = bytes_written = 0
+    tar, proc = _open_stream(tgz)
+    try:
+        with tar:
+            for member in tar:
+                member = tarfile.data_filter(member, str(dest))  # no absolute paths, no `..`
+                if not member.isfile():
+                    tar.extract(member, dest, filter="data")
+                    continue
+                rel = member.name
+                target = dest / rel
+                if _is_current(index, rel, member, target):
+                    skipped += 1
+                    continue  # the stream skips the member's data when we move on
+                src = tar.extractfile(member)
+                assert src
+                index.put(rel, _write(src, member, target))
+                written += 1
+                bytes_written += member.size
+        if proc:
+            assert proc.stdout
+            while proc.stdout.read(_BUFFER_SIZE):  # padding after the end-of-archive marker
+                pass
+    finally:
+        index.close()
+        if proc:
+            assert proc.stdout
+            proc.stdout.close()
+            proc.wait()
+    if proc and proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, proc.args)
+    return Untarred(written, skipped, bytes_written)
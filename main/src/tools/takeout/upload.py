@@ -0,0 +1,270 @@
+"""Uploading a merged Takeout tree to immich as concurrent, resumable shards.
+
+One `immich-go` over the whole tree takes days and starts over if it's
+interrupted.  Instead the tree is split into one shard per year (Takeout
+keeps a `Photos from YYYY` folder per year; immich-go's `--date-range`
+selects it), plus a final sweep with no range for whatever has no date --
+everything else in it is already on the server by then, which immich-go
+checks and skips.
+
+Why by date rather than by directory, when each date range still has
+immich-go scan the whole tree: an album folder's JSON sidecars name photos
+that live in the year folders, so an immich-go given only part of the tree
+would upload those photos without their albums.
+
+Shards run as separate immich-go processes.  How many run at once follows
+the server: one more after each shard that finishes without the combined
+throughput falling off, half as many after a failure (AIMD, as TCP does).
+A failed shard is retried later, up to `attempts` times.  The sweep
+uploads next to nothing, so its throughput isn't a sample.
+
+Concurrent shards would race to create an album that spans years, each
+finding it missing and creating its own.  So every album in the tree is
+created up front, one at a time; immich-go then adds to it by name.
+
+Finished shards are checkpointed in the user cache (per tree and server),
+so an interrupted run resumes with the shards that hadn't finished.  Dry
+runs are never checkpointed.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import subprocess
+import time
+import typing as ty
+import urllib.request
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from tools.cache import cache_dir
+
+logger = logging.getLogger(__name__)
+
+_YEAR_DIR = re.compile(r"^Photos from (\d{4})$")
+
+
+class Shard(ty.NamedTuple):
+    name: str
+    args: tuple[str, ...]
+    """extra immich-go arguments selecting this shard's photos"""
+    files: int
+
+
+def year_shards(takeout_root: Path) -> list[Shard]:
+    years: dict[str, int] = {}
+    for d in takeout_root.glob("**/Photos from *"):
+        if d.is_dir() and (m := _YEAR_DIR.match(d.name)):
+            years[m[1]] = years.get(m[1], 0) + sum(1 for f in d.iterdir() if f.is_file())
+    shards = [Shard(year, (f"--date-range={year}",), n) for year, n in sorted(years.items())]
+    return [*shards, Shard("rest", (), 0)]
+
+
+def album_names(takeout_root: Path) -> list[str]:
+    """Titles of the albums in the tree: folders with a metadata.json."""
+    names: set[str] = set()
+    for metadata in takeout_root.glob("**/metadata.json"):
+        if _YEAR_DIR.match(metadata.parent.name):
+            continue
+        try:
+            title = json.loads(metadata.read_text()).get("title")
+        except (OSError, ValueError, AttributeError):
+            title = None
+        names.add(title if isinstance(title, str) and title else metadata.parent.name)
+    return sorted(names)
+
+
+# ---------------------------------------------------------------------------
+# Checkpoint
+# ---------------------------------------------------------------------------
+
+_CHECKPOINT_VERSION = 1
+
+
+def default_checkpoint_path(takeout_root: Path, server_url: str) -> Path:
+    key = hashlib.sha256(f"{takeout_root.resolve()}\n{server_url}".encode()).hexdigest()[:16]
+    return cache_dir("takeout", "upload", f"{key}.json")
+
+
+class Checkpoint:
+    def __init__(self, path: Path | None) -> None:
+        """`path=None` keeps nothing (dry runs)."""
+        self.path = path
+        self.done: dict[str, float] = {}  # shard -> seconds it took
+        if path:
+            try:
+                data = json.loads(path.read_text())
+                if data.get("version") == _CHECKPOINT_VERSION:
+                    self.done = data["done"]
+            except (OSError, ValueError, KeyError):
+                pass
+
+    def mark_done(self, shard: Shard, seconds: float) -> None:
+        self.done[shard.name] = seconds
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"version": _CHECKPOINT_VERSION, "done": self.done}))
+        tmp.replace(self.path)
+
+
+# ---------------------------------------------------------------------------
+# Concurrency
+# ---------------------------------------------------------------------------
+
+
+class AdaptiveConcurrency:
+    """Additive increase while throughput holds up, multiplicative decrease
+    on errors."""
+
+    def __init__(self, *, max_limit: int, tolerance: float = 0.9) -> None:
+        self.limit = 1
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self._best = 0.0
+
+    def succeeded(self, files_per_s: float) -> None:
+        if files_per_s >= self._best * self.tolerance:
+            self.limit = min(self.limit + 1, self.max_limit)
+        else:
+            self.limit = max(self.limit - 1, 1)
+        self._best = max(self._best, files_per_s)
+
+    def failed(self) -> None:
+        self.limit = max(self.limit // 2, 1)
+
+
+# ---------------------------------------------------------------------------
+# Running
+# ---------------------------------------------------------------------------
+
+
+class ImmichGo(ty.NamedTuple):
+    server_url: str
+    api_key: str
+    executable: str = "immich-go"
+    tasks_per_shard: int = 1
+
+    def command(self, takeout_root: Path, shard: Shard, *, log_file: Path, dry_run: bool) -> list[str]:
+        return [
+            self.executable,
+            "upload",
+            "from-google-photos",
+            "--server",
+            self.server_url,
+            "--api-key",
+            self.api_key,
+            *(["--dry-run"] if dry_run else []),
+            f"--concurrent-tasks={self.tasks_per_shard}",
+            "--on-errors=4",
+            f"--log-file={log_file}",
+            *shard.args,
+            str(takeout_root),
+        ]
+
+    def _api(self, path: str, body: dict[str, ty.Any] | None = None) -> ty.Any:
+        request = urllib.request.Request(
+            f"{self.server_url.rstrip('/')}/api/{path}",
+            data=None if body is None else json.dumps(body).encode(),
+            headers={"x-api-key": self.api_key, "Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return json.load(response)
+
+    def ping(self) -> None:
+        """Fails fast (URLError) if the server isn't there, rather than once per shard."""
+        self._api("server/ping")
+
+    def ensure_albums(self, names: ty.Iterable[str]) -> list[str]:
+        """Creates whichever of the albums the server hasn't got; returns those."""
+        existing = {album["albumName"] for album in self._api("albums")}
+        created = [name for name in dict.fromkeys(names) if name not in existing]
+        for name in created:
+            self._api("albums", {"albumName": name})
+        return created
+
+
+class ShardFailedError(RuntimeError):
+    pass
+
+
+def upload_shards(
+    takeout_root: Path,
+    shards: ty.Sequence[Shard],
+    immich_go: ImmichGo,
+    *,
+    log_dir: Path,
+    dry_run: bool,
+    checkpoint: Checkpoint,
+    max_concurrency: int = 4,
+    attempts: int = 3,
+    albums: ty.Sequence[str] = (),
+) -> None:
+    """Raises ShardFailedError naming every shard still failing after `attempts`."""
+    immich_go.ping()
+    if albums and not dry_run:
+        created = immich_go.ensure_albums(albums)
+        logger.info("created %d of %d album(s) before uploading", len(created), len(albums))
+    log_dir.mkdir(parents=True, exist_ok=True)
+    # the sweep goes last, alone: it's only cheap once everything dated is up
+    dated = [s for s in shards if s.args and s.name not in checkpoint.done]
+    sweeps = [s for s in shards if not s.args and s.name not in checkpoint.done]
+    if len(dated) + len(sweeps) < len(shards):
+        logger.info("resuming: %d shard(s) already uploaded", len(shards) - len(dated) - len(sweeps))
+
+    concurrency = AdaptiveConcurrency(max_limit=max_concurrency)
+    failures: dict[str, int] = {}
+
+    def run(shard: Shard) -> int:
+        log_file = log_dir / f"{shard.name}.log"
+        cmd = immich_go.command(takeout_root, shard, log_file=log_file, dry_run=dry_run)
+        logger.info("running: %s", " ".join("***" if part == immich_go.api_key else part for part in cmd))
+        return subprocess.call(cmd, stdout=subprocess.DEVNULL)
+
+    for batch in (dated, sweeps):
+        pending = deque(batch)
+        running: dict[Future[int], tuple[Shard, float]] = {}
+        last_done = time.monotonic()
+        with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+            while pending or running:
+                while pending and len(running) < concurrency.limit:
+                    shard = pending.popleft()
+                    running[pool.submit(run, shard)] = (shard, time.monotonic())
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    shard, start = running.pop(future)
+                    now = time.monotonic()
+                    if future.result() == 0:
+                        checkpoint.mark_done(shard, now - start)
+                        if shard.files:
+                            # with several shards running, files per second between
+                            # completions approximates their combined throughput
+                            concurrency.succeeded(shard.files / max(now - last_done, 1e-9))
+                        last_done = now
+                        logger.info(
+                            "shard %s: %d file(s) in %.0fs; %d at once next",
+                            shard.name,
+                            shard.files,
+                            now - start,
+                            concurrency.limit,
+                        )
+                        continue
+                    failures[shard.name] = failures.get(shard.name, 0) + 1
+                    concurrency.failed()
+                    logger.warning(
+                        "shard %s failed (attempt %d of %d); %d at once next",
+                        shard.name,
+                        failures[shard.name],
+                        attempts,
+                        concurrency.limit,
+                    )
+                    if failures[shard.name] < attempts:
+                        pending.append(shard)
+
+    failed = sorted(name for name in failures if name not in checkpoint.done)
+    if failed:
+        raise ShardFailedError(f"shard(s) still failing after {attempts} attempts: {', '.join(failed)}")
@@ -0,0 +1,130 @@
+"""The version of each text file both sides last agreed on.
+
+Kept per (source, dest) pair as a small rel -> sha256 index plus a shared,
+content-addressed store of zlib-compressed bodies.  A file's entry only
+advances when a sync leaves both sides byte-identical, so for a file that has
+since diverged it is the common ancestor a three-way merge needs.
+
+Only text is stored: binary files (and anything over `_MAX_SNAPSHOT_BYTES`)
+get an index entry -- so they aren't re-examined every run -- but no body.
+"""
+
+import hashlib
+import json
+import os
+import time
+import typing as ty
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from tools.cache import cache_dir
+from tools.hashing import read_head
+
+_FORMAT_VERSION = 1
+
+_MAX_SNAPSHOT_BYTES = 4 << 20
+
+_GC_GRACE_SECONDS = 3600
+"""bodies younger than this are never collected: another sync may have just
+stored (or re-recorded) them without having saved its index yet"""
+
+
+def _is_snapshottable(path: Path) -> bool:
+    return path.stat().st_size <= _MAX_SNAPSHOT_BYTES and b"\x00" not in read_head(path, 8192)
+
+
+@dataclass
+class BaseSnapshots:
+    index_path: Path
+    objects_dir: Path
+    index: dict[str, str] = field(default_factory=dict)
+    """vault-relative posix path -> sha256 of its last agreed-on content"""
+
+    def _object_path(self, sha256: str) -> Path:
+        return self.objects_dir / sha256[:2] / sha256[2:]
+
+    def text(self, rel: Path) -> str | None:
+        """The last agreed-on text of `rel`, or None if there isn't one stored."""
+        sha256 = self.index.get(rel.as_posix())
+        if sha256 is None:
+            return None
+        try:
+            return zlib.decompress(self._object_path(sha256).read_bytes()).decode()
+        except (OSError, zlib.error, UnicodeDecodeError):
+            return None
+
+    def record(self, rel: Path, sha256: str, path: Path) -> None:
+        """Note that both sides agree on `rel` with content `sha256`.  `path`
+        (either side's copy) is only read when that content isn't stored yet."""
+        key = rel.as_posix()
+        if self.index.get(key) == sha256:
+            return
+        obj = self._object_path(sha256)
+        try:
+            os.utime(obj)  # already stored: keep it clear of the GC grace period
+        except FileNotFoundError:
+            if _is_snapshottable(path):
+                obj.parent.mkdir(parents=True, exist_ok=True)
+                tmp = obj.with_suffix(".tmp")
+                tmp.write_bytes(zlib.compress(path.read_bytes()))
+                tmp.replace(obj)
+        self.index[key] = sha256
+
+    def save(self, live: ty.Iterable[str], *, collect_garbage: bool = False) -> None:
+        """Persist the index for `live` paths only.  With `collect_garbage`,
+        then drop stored bodies that no index (of any pair) refers to any more
+        -- that reads every index and lists the whole store, so it's for a full
+        run, not for every burst of a watch."""
+        keep = {rel: sha for rel in live if (sha := self.index.get(rel))}
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"version": _FORMAT_VERSION, "index": keep}))
+        tmp.replace(self.index_path)
+        if collect_garbage:
+            _collect_garbage(self.index_path.parent, self.objects_dir)
+
+
+def _referenced(index_dir: Path) -> set[str]:
+    referenced: set[str] = set()
+    for index_file in index_dir.glob("*.json"):
+        try:
+            referenced.update(json.loads(index_file.read_text()).get("index", {}).values())
+        except (OSError, ValueError):
+            continue
+    return referenced
+
+
+def _collect_garbage(index_dir: Path, objects_dir: Path) -> None:
+    if not objects_dir.is_dir():
+        return
+    referenced = _referenced(index_dir)
+    cutoff = time.time() - _GC_GRACE_SECONDS
+    for fanout in os.scandir(objects_dir):
+        if not fanout.is_dir():
+            continue
+        for obj in os.scandir(fanout.path):
+            if fanout.name + obj.name in referenced:
+                continue
+            try:
+                if obj.stat().st_mtime < cutoff:
+                    os.unlink(obj.path)
+            except FileNotFoundError:
+                continue  # collected by another run
+
+
+def default_base_dir() -> Path:
+    return cache_dir("sync-vault", "base")
+
+
+def load_base(base_dir: Path, source: Path, dest: Path) -> BaseSnapshots:
+    pair = f"{source.resolve()}\0{dest.resolve()}"
+    key = hashlib.sha256(pair.encode()).hexdigest()[:16]
+    base = BaseSnapshots(index_path=base_dir / "index" / f"{key}.json", objects_dir=base_dir / "objects")
+    try:
+        data = json.loads(base.index_path.read_text())
+    except (OSError, ValueError):
+        return base  # no (readable) base yet: every divergence is a two-way diff
+    if data.get("version") == _FORMAT_VERSION:
+        base.index = data.get("index", {})
+    return base
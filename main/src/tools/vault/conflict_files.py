@@ -1,18 +1,32 @@
+"""Find Relay's "(Conflicted copy ...)" files and review them against their source.
+
+Every copy and source is hashed up front, in parallel, so copies with the
+same content are reviewed once, and copies identical to their source never
+need a diff at all.
+"""
+
 import re
 import typing as ty
 from pathlib import Path
 
-from thds.termtool.colorize import colorized
-
 from tools import diff
+from tools.color import colorized
 from tools.env import require_env
+from tools.hashing import digest_many
+
+from .walk import walk
 
 _YELLOW = colorized(fg="yellow")
 _BLUE = colorized(fg="blue")
 
 
+def _is_conflict_file_name(name: str) -> bool:
+    return " (Conflicted copy " in name
+
+
 def _find_conflict_files(root: Path) -> ty.Iterator[Path]:
-    yield from root.rglob("* (Conflicted copy *")
+    # hidden directories too: Relay syncs .obsidian/ (settings, plugin data), and conflicts there
+    yield from (root / f.rel for f in walk(root, include=_is_conflict_file_name, include_hidden=True))
 
 
 class Conflict(ty.NamedTuple):
@@ -21,40 +35,129 @@ class Conflict(ty.NamedTuple):
 
 
 def _match_conflict_file_with_source(conflict_file: Path) -> Conflict:
-    conflict_re = r" \(Conflicted copy .+\)\.md$"
-    source_file = conflict_file.parent / re.sub(conflict_re, ".md", conflict_file.name)
-    assert source_file.exists(), f"conflict_file {conflict_file} has no source to match"
+    conflict_re = r" \(Conflicted copy .+\)((?:\.[^.()]*)?)$"  # keeping the extension, .md or not
+    source_file = conflict_file.parent / re.sub(conflict_re, r"\1", conflict_file.name)
     return Conflict(source_file, conflict_file)
 
 
-def find_and_prompt_to_delete_conflict_files(vault_root: Path, *, force: bool = False) -> int:
-    count = 0
-    for src, conflict in map(_match_conflict_file_with_source, _find_conflict_files(vault_root)):
-        if force:
-            conflict.unlink()
-            count += 1
-            continue
+def _report_orphans(orphans: ty.Sequence[Conflict]) -> None:
+    """Copies whose source was renamed or deleted: there's nothing to compare
+    them against, and they may be the only copy of their content, so they're
+    listed and left alone."""
+    if orphans:
+        print(f"{len(orphans)} conflict file(s) with no source to compare against, left as they are:")
+    for c in orphans:
+        print(f"- {c.conflict} ({_YELLOW(f'no {c.source.name}')})")
+
+
+class ConflictGroup(ty.NamedTuple):
+    source: Path
+    copies: list[Path]
+    """conflicted copies of `source` that are byte-identical to one another"""
+    same_as_source: bool
+
+
+def _group_conflicts(
+    conflicts: ty.Sequence[Conflict], *, max_workers: int | None = None
+) -> list[ConflictGroup]:
+    """Hashes every copy and every source once, in parallel, and groups copies
+    of the same source by content."""
+    sources = sorted({c.source for c in conflicts})
+    copies = sorted(c.conflict for c in conflicts)
+    digests = dict(zip([*sources, *copies], digest_many([*sources, *copies], max_workers=max_workers)))
+
+    by_content: dict[tuple[Path, str], list[Path]] = {}
+    for c in sorted(conflicts):
+        by_content.setdefault((c.source, digests[c.conflict]), []).append(c.conflict)
+    return [
+        ConflictGroup(source, group, same_as_source=digest == digests[source])
+        for (source, digest), group in by_content.items()
+    ]
+
+
+def _delete(path: Path, reason: str) -> None:
+    path.unlink()
+    print(f"  deleted {path.name} ({_YELLOW(reason)})")
+
+
+def _delete_duplicates(group: ConflictGroup) -> ConflictGroup:
+    """Deletes every copy identical to the source, or all but the first of a
+    group that differs from it; returns what is left to review."""
+    if group.same_as_source:
+        for copy in group.copies:
+            _delete(copy, f"identical to {group.source.name}")
+        return group._replace(copies=[])
+    for copy in group.copies[1:]:
+        _delete(copy, f"identical to {group.copies[0].name}")
+    return group._replace(copies=group.copies[:1])
+
+
+def _prompt_to_delete(group: ConflictGroup) -> int:
+    representative, *duplicates = group.copies
+    print(diff.colorize(diff.diff(group.source, representative)))
+    also = (
+        f" and {len(duplicates)} identical cop{'y' if len(duplicates) == 1 else 'ies'}"
+        if duplicates
+        else ""
+    )
+    response = input(_BLUE(f"Delete {representative.name}{also}? [y/N] ")).strip().lower()
+    if response != "y":
+        print(f"  skipped {representative.name}{also}")
+        return 0
+    for copy in group.copies:
+        copy.unlink()
+    return len(group.copies)
+
+
+def find_and_prompt_to_delete_conflict_files(
+    vault_root: Path, *, force: bool = False, auto_identical: bool = False
+) -> int:
+    """Copies with the same content are reviewed (and deleted) together.
+    `auto_identical` deletes, without asking, every copy identical to its
+    source and every extra copy of an identical group."""
+    conflicts: list[Conflict] = []
+    orphans: list[Conflict] = []
+    for c in map(_match_conflict_file_with_source, _find_conflict_files(vault_root)):
+        (conflicts if c.source.exists() else orphans).append(c)
+    _report_orphans(orphans)
+    if force:
+        for c in conflicts:
+            _delete(c.conflict, "forced")
+        print(f"deleted {len(conflicts)} conflict files")
+        return len(conflicts)
 
-        diff_ = diff.colorize(diff.diff(src, conflict))
-        if not diff_:
-            print(f"- {src} ({_YELLOW('no changes')})")
+    count = 0
+    for group in _group_conflicts(conflicts):
+        if auto_identical:
+            remaining = _delete_duplicates(group)
+            count += len(group.copies) - len(remaining.copies)
+            group = remaining
+        elif group.same_as_source:
+            print(f"- {group.source} ({_YELLOW('no changes')}, {len(group.copies)} cop(ies))")
             continue
 
-        print(diff_)
-        response = input(_BLUE(f"Delete {conflict.name}? [y/N] ")).strip().lower()
-        if response == "y":
-            conflict.unlink()
-            count += 1
-        else:
-            print(f"  skipped {conflict.name}")
+        if group.copies:
+            count += _prompt_to_delete(group)
     print(f"deleted {count} conflict files")
     return count
 
 
 def cli() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Review and delete Relay's conflicted copies in the vault."
+    )
+    parser.add_argument(
+        "--auto-identical",
+        action="store_true",
+        help="delete copies that are byte-identical to their source (or to another copy) without asking",
+    )
+    args = parser.parse_args()
+
     vault_root = require_env().vault.main.root
     assert vault_root
-    find_and_prompt_to_delete_conflict_files(vault_root)
+    find_and_prompt_to_delete_conflict_files(vault_root, auto_identical=args.auto_identical)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,111 @@
+"""Persistent per-root record of (size, mtime_ns, inode) -> content hash.
+
+Lets sync classify unchanged files from `stat` alone: a file's body is only
+read when its stat no longer matches what was recorded on the previous run.
+"""
+
+import hashlib
+import json
+import time
+import typing as ty
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from tools.cache import cache_dir
+from tools.hashing import digest_many as _digest_many
+
+from .walk import WalkedFile
+
+_FORMAT_VERSION = 1
+
+# Like git's "racily clean" index entries: a file modified within the same
+# timestamp tick as we recorded it could change again without its stat
+# changing, so we don't trust hashes for files that were that fresh.
+_RACY_WINDOW_NS = 2_000_000_000
+
+
+class ManifestEntry(ty.NamedTuple):
+    size: int
+    mtime_ns: int
+    inode: int
+    sha256: str
+
+
+def _matches(entry: ManifestEntry, f: WalkedFile) -> bool:
+    return (entry.size, entry.mtime_ns, entry.inode) == (f.size, f.mtime_ns, f.inode)
+
+
+@dataclass
+class Manifest:
+    root: Path
+    path: Path | None = None
+    entries: dict[str, ManifestEntry] = field(default_factory=dict)
+    hashed: int = 0
+    """Number of file bodies read since load; the rest were answered from stat."""
+
+    def is_fresh(self, f: WalkedFile) -> bool:
+        entry = self.entries.get(f.rel)
+        return entry is not None and _matches(entry, f)
+
+    def record(self, f: WalkedFile, sha256: str) -> None:
+        self.entries[f.rel] = ManifestEntry(f.size, f.mtime_ns, f.inode, sha256)
+        self.hashed += 1
+
+    def save(self, live: ty.Iterable[str]) -> None:
+        """Persist entries for `live` paths only, so deleted files don't accumulate."""
+        if self.path is None:
+            return
+        cutoff = time.time_ns() - _RACY_WINDOW_NS
+        keep = {
+            rel: list(entry) for rel in live if (entry := self.entries.get(rel)) and entry.mtime_ns < cutoff
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"version": _FORMAT_VERSION, "root": str(self.root), "entries": keep}))
+        tmp.replace(self.path)
+
+
+class DigestRequest(ty.NamedTuple):
+    manifest: Manifest
+    file: WalkedFile
+
+
+def digest_many(requests: ty.Sequence[DigestRequest], *, max_workers: int | None = None) -> list[str]:
+    """Digests for each request, hashing stale files (across any number of
+    manifests) in one parallel pass."""
+    stale = [r for r in requests if not r.manifest.is_fresh(r.file)]
+    digests = _digest_many(
+        [r.manifest.root / r.file.rel for r in stale],
+        max_workers=max_workers,
+        total_bytes=sum(r.file.size for r in stale),
+    )
+    for r, sha in zip(stale, digests):
+        r.manifest.record(r.file, sha)
+    return [r.manifest.entries[r.file.rel].sha256 for r in requests]
+
+
+def default_manifest_dir() -> Path:
+    return cache_dir("sync-vault", "manifests")
+
+
+def manifest_path(manifest_dir: Path, root: Path) -> Path:
+    key = hashlib.sha256(str(root.resolve()).encode()).hexdigest()[:16]
+    return manifest_dir / f"{key}.json"
+
+
+def load_manifest(manifest_dir: Path, root: Path, *, rehash: bool = False) -> Manifest:
+    """`rehash` discards whatever was recorded, forcing every body to be re-read."""
+    path = manifest_path(manifest_dir, root)
+    manifest = Manifest(root=root, path=path)
+    if rehash or not path.exists():
+        return manifest
+
+    try:
+        data = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return manifest  # unreadable cache is just a cold cache
+    if data.get("version") != _FORMAT_VERSION:
+        return manifest
+
+    manifest.entries = {key: ManifestEntry(*fields) for key, fields in data.get("entries", {}).items()}
+    return manifest
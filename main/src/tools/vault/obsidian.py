@@ -1,8 +1,15 @@
+import functools
+import json
+import os
 import shutil
 import subprocess
+import sys
 import typing as ty
+import urllib.parse
 from pathlib import Path
 
+from tools.cache import cache_dir
+
 
 def _list_vault_names() -> list[str]:
     output = subprocess.check_output(["obsidian-cli", "vaults"], text=True)
@@ -26,6 +33,60 @@ def _get_vault_info(vault_name: str) -> _VaultInfo:
     return _VaultInfo(name=vault_info_dict["name"], path=Path(vault_info_dict["path"]))
 
 
+# ---------------------------------------------------------------------------
+# Vault registry: asking obsidian-cli costs 1 + (number of vaults) process
+# spawns, so it is done at most once per process, and across processes for as
+# long as Obsidian's own vault list (obsidian.json) is unchanged.
+# ---------------------------------------------------------------------------
+
+
+def _obsidian_config() -> Path | None:
+    config_home = Path(os.environ.get("XDG_CONFIG_HOME") or Path.home() / ".config")
+    for candidate in (
+        Path.home() / "Library/Application Support/obsidian/obsidian.json",
+        config_home / "obsidian/obsidian.json",
+    ):
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def _registry_cache_file() -> Path:
+    return cache_dir("obsidian", "vaults.json")
+
+
+def _load_persisted_registry(config_mtime_ns: int) -> list[_VaultInfo] | None:
+    try:
+        data = json.loads(_registry_cache_file().read_text())
+    except (OSError, ValueError):
+        return None
+    if data.get("config_mtime_ns") != config_mtime_ns:
+        return None
+    return [_VaultInfo(name, Path(path)) for name, path in data["vaults"]]
+
+
+def _persist_registry(config_mtime_ns: int, vaults: list[_VaultInfo]) -> None:
+    cache_file = _registry_cache_file()
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    cache_file.write_text(
+        json.dumps({"config_mtime_ns": config_mtime_ns, "vaults": [[v.name, str(v.path)] for v in vaults]})
+    )
+
+
+@functools.cache
+def _vault_index() -> dict[Path, _VaultInfo]:
+    config = _obsidian_config()
+    config_mtime_ns = config.stat().st_mtime_ns if config else None
+
+    vaults = _load_persisted_registry(config_mtime_ns) if config_mtime_ns is not None else None
+    if vaults is None:
+        vaults = list(map(_get_vault_info, _list_vault_names()))
+        if config_mtime_ns is not None:
+            _persist_registry(config_mtime_ns, vaults)
+
+    return {v.path.resolve(): v for v in vaults}
+
+
 class _FileInVault(ty.NamedTuple):
     vault_name: str
     file_relpath: str
@@ -37,25 +98,91 @@ class _VaultNotFoundException(FileNotFoundError):
 
 def _xf_to_file_in_vault(p: Path) -> _FileInVault:
     p = p.resolve()
+    index = _vault_index()
 
-    for vault_info in map(_get_vault_info, _list_vault_names()):
-        if p.is_relative_to(vault_info.path):
-            return _FileInVault(
-                vault_name=vault_info.name, file_relpath=str(p.relative_to(vault_info.path))
-            )
+    # nearest ancestor first, so a vault nested inside another vault wins
+    for candidate in (p, *p.parents):
+        if vault_info := index.get(candidate):
+            return _FileInVault(vault_name=vault_info.name, file_relpath=str(p.relative_to(candidate)))
 
     raise _VaultNotFoundException("Could not find vault root")
 
 
+def _locate(p: Path) -> _FileInVault | None:
+    try:
+        return _xf_to_file_in_vault(p)
+    except (subprocess.CalledProcessError, _VaultNotFoundException):
+        return None
+
+
+def _obsidian_uri(f: _FileInVault) -> str:
+    query = urllib.parse.urlencode(
+        {"vault": f.vault_name, "file": f.file_relpath, "paneType": "tab"}, quote_via=urllib.parse.quote
+    )
+    return f"obsidian://open?{query}"
+
+
+# Well under ARG_MAX everywhere (macOS: 1MB, shared with the environment):
+# past it exec fails outright (E2BIG), so a big batch is split into several `open`s.
+_ARGV_BYTES = 128 * 1024
+
+
+def _argv_chunks(args: ty.Sequence[str], budget: int) -> ty.Iterator[list[int]]:
+    """Indexes into `args`, in runs whose argv footprint (the bytes, their NULs
+    and a pointer each) stays within `budget` -- or a single argument over it."""
+    chunk: list[int] = []
+    size = 0
+    for i, arg in enumerate(args):
+        cost = len(os.fsencode(arg)) + 1 + 8
+        if chunk and size + cost > budget:
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(i)
+        size += cost
+    if chunk:
+        yield chunk
+
+
+def _uri_opener() -> str | None:
+    """A command that opens any number of URIs in one go, if there is one."""
+    return "open" if sys.platform == "darwin" else None
+
+
+def _open_in_vault(f: _FileInVault) -> bool:
+    try:
+        subprocess.check_call(
+            ["obsidian-cli", f"vault={f.vault_name}", "open", f"path={f.file_relpath}", "newtab"]
+        )
+        return True
+    except subprocess.CalledProcessError:
+        return False
+
+
+def obsidian_open_many(paths: ty.Sequence[Path]) -> list[bool]:
+    """Opens every path in a new Obsidian tab; True for each one opened.
+
+    obsidian-cli's `open` takes one note, and on macOS all it does is `open`
+    an obsidian:// URI -- so there the batch goes to `open` as all their URIs
+    at once: one process per argv's worth of paths, rather than one per path.
+    Elsewhere each path is one obsidian-cli call."""
+    if not shutil.which("obsidian-cli"):
+        return [False] * len(paths)
+    located = [_locate(p) for p in paths]
+    if not (opener := _uri_opener()):
+        return [f is not None and _open_in_vault(f) for f in located]
+
+    opened = [False] * len(paths)
+    found = [(i, _obsidian_uri(f)) for i, f in enumerate(located) if f]
+    for chunk in _argv_chunks([uri for _, uri in found], _ARGV_BYTES - len(opener) - 9):
+        try:
+            subprocess.check_call([opener, *(found[j][1] for j in chunk)])
+        except (subprocess.CalledProcessError, OSError):
+            continue
+        for j in chunk:
+            opened[found[j][0]] = True
+    return opened
+
+
 def obsidian_open(p: Path) -> bool:
     """wraps a utility on my PATH for opening a file in obsidian"""
-    if shutil.which("obsidian-cli"):
-        try:
-            vault_name, file_relpath = _xf_to_file_in_vault(p)
-            subprocess.check_call(
-                ["obsidian-cli", f"vault={vault_name}", "open", f"path={file_relpath}", "newtab"]
-            )
-            return True
-        except (subprocess.CalledProcessError, _VaultNotFoundException):
-            pass
-    return False
+    return obsidian_open_many([p])[0]
@@ -0,0 +1,166 @@
+"""Planned file operations, executed together on a bounded thread pool.
+
+Callers decide everything first and hand over the whole plan, which runs in
+phases:
+
+1. every parent directory the plan needs is created once, shallowest first;
+2. every target is opened in Obsidian in one batch (copy targets are touched
+   first so there is something to open) -- Obsidian has to have a file open
+   before its contents change, or the Relay plugin won't pick the change up;
+3. the copies / writes run on a thread pool.  No two ops write the same path,
+   so they can complete in any order.  Writes are staged, and committed
+   together once the pool is done (tools.fs.AtomicWrites): one pass of
+   fsyncs over the staged files and one fsync per directory, rather than a
+   file and a directory fsync per write.
+"""
+
+import itertools
+import shutil
+import sys
+import time
+import typing as ty
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from tools.color import colorized
+from tools.fs import AtomicWrites
+
+from .obsidian import obsidian_open_many
+
+_DIM = colorized(fg="gray")
+
+_DEFAULT_MAX_WORKERS = 8
+
+
+class CopyOp(ty.NamedTuple):
+    src: Path
+    dst: Path
+
+
+class WriteOp(ty.NamedTuple):
+    dst: Path
+    text: str
+
+
+FileOp = CopyOp | WriteOp
+
+
+class OpTiming(ty.NamedTuple):
+    op: FileOp
+    seconds: float
+    error: OSError | None
+
+
+@dataclass
+class ExecutionReport:
+    wall_seconds: float = 0.0
+    open_seconds: float = 0.0
+    timings: list[OpTiming] = field(default_factory=list)
+    commit_error: OSError | None = None
+    """committing the staged writes failed; none of them took effect"""
+
+    @property
+    def errors(self) -> list[OSError]:
+        errors = [t.error for t in self.timings if t.error is not None]
+        return [*errors, self.commit_error] if self.commit_error else errors
+
+
+def _describe(op: FileOp) -> str:
+    match op:
+        case CopyOp(src, dst):
+            return f"copy {src} -> {dst}"
+        case WriteOp(dst, _):
+            return f"write {dst}"
+
+
+def _run(op: FileOp, writes: AtomicWrites) -> None:
+    match op:
+        case CopyOp(src, dst):
+            shutil.copy2(src, dst)
+        case WriteOp(dst, text):
+            writes.write_if_changed(dst, text)
+
+
+def _timed(op: FileOp, writes: AtomicWrites) -> OpTiming:
+    start = time.perf_counter()
+    try:
+        _run(op, writes)
+    except OSError as e:
+        return OpTiming(op, time.perf_counter() - start, e)
+    return OpTiming(op, time.perf_counter() - start, None)
+
+
+def _make_parent_dirs(ops: ty.Sequence[FileOp]) -> None:
+    for parent in sorted({op.dst.parent for op in ops}, key=lambda p: (len(p.parts), p)):
+        parent.mkdir(parents=True, exist_ok=True)
+
+
+def _touch(op: FileOp) -> OpTiming | None:
+    """A copy target that can't even be created fails here, before Obsidian is
+    asked to open it."""
+    if isinstance(op, CopyOp):
+        try:
+            op.dst.touch()
+        except OSError as e:
+            return OpTiming(op, 0.0, e)
+    return None
+
+
+def _open_targets(ops: ty.Sequence[FileOp]) -> list[OpTiming]:
+    """Returns the ops whose target couldn't be touched; the rest are opened."""
+    failed = [timing for op in ops if (timing := _touch(op))]
+    untouched = {t.op for t in failed}
+    obsidian_open_many([op.dst for op in ops if op not in untouched])
+    return failed
+
+
+def execute(ops: ty.Sequence[FileOp], *, max_workers: int = _DEFAULT_MAX_WORKERS) -> ExecutionReport:
+    """Runs every op even if some fail; failures are left on the report."""
+    report = ExecutionReport()
+    if not ops:
+        return report
+
+    start = time.perf_counter()
+    _make_parent_dirs(ops)
+    report.timings = _open_targets(ops)
+    failed = {t.op for t in report.timings}
+    ops = [op for op in ops if op not in failed]
+    report.open_seconds = time.perf_counter() - start
+    show_progress = sys.stdout.isatty()
+    writes = AtomicWrites()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for done, timing in enumerate(pool.map(_timed, ops, itertools.repeat(writes)), start=1):
+            report.timings.append(timing)
+            if show_progress:
+                print(f"\r  applying {done}/{len(ops)}", end="", flush=True)
+    if show_progress:
+        print()
+    try:
+        writes.commit()
+    except OSError as e:
+        report.commit_error = e
+    report.wall_seconds = time.perf_counter() - start
+    return report
+
+
+def format_report(report: ExecutionReport, *, slowest: int = 5) -> str:
+    busy = sum(t.seconds for t in report.timings)
+    lines = [
+        (
+            f"  {len(report.timings)} file op(s) in {report.wall_seconds:.2f}s wall"
+            f" ({report.open_seconds:.2f}s opening in Obsidian, {busy:.2f}s copying across workers)"
+        ),
+        *(
+            _DIM(f"    {t.seconds:6.2f}s  {_describe(t.op)}")
+            for t in sorted(report.timings, key=lambda t: t.seconds, reverse=True)[:slowest]
+        ),
+        *(f"  FAILED {_describe(t.op)}: {t.error}" for t in report.timings if t.error),
+        *([f"  FAILED committing the writes: {report.commit_error}"] if report.commit_error else []),
+    ]
+    return "\n".join(lines)
+
+
+def raise_for_errors(report: ExecutionReport) -> None:
+    if errors := report.errors:
+        raise ExceptionGroup(f"{len(errors)} file operation(s) failed", errors)
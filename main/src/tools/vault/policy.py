@@ -0,0 +1,113 @@
+"""Unattended resolutions for `sync-vault --batch`.
+
+A policy is a TOML file of per-kind defaults plus optional per-glob rules;
+the first rule whose glob matches a file's vault-relative path overrides
+whichever defaults it sets:
+
+    source_only = "copy"        # restore files missing from dest
+    dest_only = "copy"          # pick up files only in dest
+    diverged_text = "skip"
+    diverged_binary = "newest"  # newest mtime wins
+
+    [[rules]]
+    glob = "attachments/**"
+    diverged_binary = "source"
+
+Diverged files resolve whole-file: "source" / "dest" name the side whose
+version both sides end up with.
+"""
+
+import typing as ty
+from dataclasses import dataclass, replace
+from pathlib import Path, PurePath
+
+MissingResolution = ty.Literal["copy", "skip"]
+DivergedResolution = ty.Literal["source", "dest", "newest", "skip"]
+
+_ALLOWED: dict[str, tuple[str, ...]] = {
+    "source_only": ty.get_args(MissingResolution),
+    "dest_only": ty.get_args(MissingResolution),
+    "diverged_text": ty.get_args(DivergedResolution),
+    "diverged_binary": ty.get_args(DivergedResolution),
+}
+
+
+@dataclass(frozen=True)
+class Resolutions:
+    source_only: MissingResolution = "copy"
+    dest_only: MissingResolution = "copy"
+    diverged_text: DivergedResolution = "skip"
+    diverged_binary: DivergedResolution = "newest"
+
+
+@dataclass(frozen=True)
+class Rule:
+    glob: str
+    overrides: dict[str, str]
+
+
+@dataclass(frozen=True)
+class Policy:
+    defaults: Resolutions = Resolutions()
+    rules: tuple[Rule, ...] = ()
+
+    def for_path(self, rel: PurePath) -> Resolutions:
+        for rule in self.rules:
+            if rel.full_match(rule.glob):
+                return replace(self.defaults, **rule.overrides)  # type: ignore[arg-type]
+        return self.defaults
+
+
+class PolicyError(ValueError):
+    pass
+
+
+def _resolution_errors(where: str, data: dict[str, ty.Any]) -> list[str]:
+    return [
+        f"{where}: {key} must be one of {', '.join(_ALLOWED[key])}, got {value!r}"
+        if key in _ALLOWED
+        else f"{where}: unknown key {key!r}"
+        for key, value in data.items()
+        if key not in _ALLOWED or value not in _ALLOWED[key]
+    ]
+
+
+def parse_policy(data: dict[str, ty.Any]) -> Policy:
+    """Raises PolicyError listing every problem in the document, not just the first."""
+    raw_rules = data.get("rules", [])
+    defaults = {k: v for k, v in data.items() if k != "rules"}
+    errors = _resolution_errors("policy", defaults)
+    if not isinstance(raw_rules, list):
+        errors.append(f"rules: expected an array of tables ([[rules]]), got {raw_rules!r}")
+        raw_rules = []
+
+    rules: list[Rule] = []
+    for i, raw in enumerate(raw_rules):
+        where = f"rules[{i}]"
+        if not isinstance(raw, dict):
+            errors.append(f"{where}: expected a table, got {raw!r}")
+            continue
+        if not isinstance(raw.get("glob"), str):
+            errors.append(f"{where}: glob is required")
+        overrides = {k: v for k, v in raw.items() if k != "glob"}
+        errors.extend(_resolution_errors(where, overrides))
+        rules.append(Rule(raw.get("glob", ""), overrides))
+
+    if errors:
+        raise PolicyError("invalid sync policy:\n  " + "\n  ".join(errors))
+    return Policy(Resolutions(**defaults), tuple(rules))
+
+
+def load_policy(path: Path) -> Policy:
+    """Raises PolicyError for a file that's missing or unreadable, isn't TOML,
+    or doesn't validate."""
+    import tomllib
+
+    try:
+        with path.open("rb") as f:
+            data = tomllib.load(f)
+    except OSError as e:
+        raise PolicyError(f"can't read sync policy {path}: {e.strerror}") from e
+    except tomllib.TOMLDecodeError as e:
+        raise PolicyError(f"invalid sync policy {path}: {e}") from e
+    return parse_policy(data)
@@ -14,20 +14,56 @@ and periodically sync against the shared directory (dest):
   pushed to source even when source would otherwise overwrite it with
   nothing.
 - Binary files prompt for a whole-file keep-source / keep-dest choice.
+
+Decisions are collected first and the resulting copies / writes are applied
+together afterwards (see `tools.vault.ops`).
+
+`--batch` replaces every prompt with a policy (see `tools.vault.policy`), and
+can write a JSON report of the outcome, for unattended (cron / launchd) runs.
+`--watch` applies the same policy continuously: after the initial pass it
+waits for filesystem changes (see `tools.vault.watch`) and reclassifies only
+the paths that changed.
+
+Files present on both sides are compared through a persistent stat manifest
+(see `tools.vault.manifest`), so repeat runs only read the bodies of files
+whose size/mtime/inode changed since the last run.
+
+Whenever a run leaves a text file identical on both sides, that version is
+kept as its base (see `tools.vault.base`).  When the file later diverges it is
+merged three-way against that base: changes made on only one side apply
+themselves, and only overlapping edits are prompted for (or, with --batch,
+left to the policy).
 """
 
-import shutil
+import json
+import threading
 import typing as ty
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
 from pathlib import Path
 
-from thds.termtool.colorize import colorized
-
-from tools.diff import HunkChoice, apply_hunks, colorize_hunk, diff, hunks
+from tools.color import colorized
+from tools.diff import (
+    Hunk,
+    HunkChoice,
+    MergedSides,
+    apply_hunks,
+    colorize_hunk,
+    conflict_hunk,
+    diff,
+    iter_hunks,
+    merge3,
+    resolve_merge3,
+)
 from tools.env import require_env
+from tools.hashing import equal_many, file_digest, files_equal, read_head
 
-from .obsidian import obsidian_open
+from .base import BaseSnapshots, default_base_dir, load_base
+from .manifest import DigestRequest, Manifest, default_manifest_dir, digest_many, load_manifest
+from .ops import CopyOp, FileOp, WriteOp, execute, format_report
+from .policy import DivergedResolution, Policy, PolicyError, load_policy
+from .walk import WalkedFile, stat_file, walk, walk_many
+from .watch import Change, PollingWatcher, debounced, open_watcher
 
 _RED = colorized(fg="red")
 _GREEN = colorized(fg="green")
@@ -50,7 +86,7 @@ class SyncAction(ty.NamedTuple):
     dest: Path
 
 
-SyncActionPerformed = ty.Literal["copied_to_dest", "copied_to_source", "merged", "skipped"]
+SyncActionPerformed = ty.Literal["copied_to_dest", "copied_to_source", "merged", "skipped", "failed"]
 
 
 @dataclass
@@ -59,6 +95,45 @@ class SyncSummary:
     copied_to_source: int = 0
     merged: int = 0
     skipped: int = 0
+    failed: int = 0
+
+    def tally(self, performed: SyncActionPerformed) -> None:
+        match performed:
+            case "copied_to_source":
+                self.copied_to_source += 1
+            case "copied_to_dest":
+                self.copied_to_dest += 1
+            case "merged":
+                self.merged += 1
+            case "skipped":
+                self.skipped += 1
+            case "failed":
+                self.failed += 1
+
+
+class BatchOutcome(ty.NamedTuple):
+    rel: Path
+    kind: DifferenceKind
+    performed: SyncActionPerformed
+
+
+@dataclass
+class BatchReport:
+    summary: SyncSummary = field(default_factory=SyncSummary)
+    identical: int = 0
+    outcomes: list[BatchOutcome] = field(default_factory=list)
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                **asdict(self.summary),
+                "identical": self.identical,
+                "files": [
+                    {"path": o.rel.as_posix(), "kind": o.kind, "result": o.performed} for o in self.outcomes
+                ],
+            },
+            indent=2,
+        )
 
 
 # ---------------------------------------------------------------------------
@@ -70,39 +145,76 @@ def _is_hidden(rel: Path) -> bool:
     return any(part.startswith(".") for part in rel.parts)
 
 
-def _discover_files(root: Path) -> dict[Path, Path]:
-    return {
-        p.relative_to(root): p
-        for p in root.rglob("*")
-        if p.is_file() and not _is_hidden(p.relative_to(root))
-    }
+_Files = dict[Path, WalkedFile]
+
+
+def _discover_files(root: Path) -> _Files:
+    return {Path(f.rel): f for f in walk(root)}
+
+
+def _discover_both(source: Path, dest: Path) -> tuple[_Files, _Files]:
+    source_files, dest_files = walk_many([source, dest])
+    return {Path(f.rel): f for f in source_files}, {Path(f.rel): f for f in dest_files}
 
 
 def _is_binary(path: Path) -> bool:
-    return b"\x00" in path.read_bytes()[:8192]
+    return b"\x00" in read_head(path, 8192)
 
 
-def _files_identical(a: Path, b: Path) -> bool:
-    return a.read_bytes() == b.read_bytes()
+class _Manifests(ty.NamedTuple):
+    source: Manifest
+    dest: Manifest
+
+
+class _SharedFile(ty.NamedTuple):
+    rel: Path
+    source: WalkedFile
+    dest: WalkedFile
+
+
+def _identical_rels(
+    shared: list[_SharedFile], source_root: Path, dest_root: Path, manifests: _Manifests | None
+) -> set[Path]:
+    """Compares every shared file at once so bodies that do need reading are
+    read concurrently.  A size mismatch settles it without reading anything."""
+    same_size = [f for f in shared if f.source.size == f.dest.size]
+    if manifests:
+        digests = digest_many(
+            [
+                *(DigestRequest(manifests.source, f.source) for f in same_size),
+                *(DigestRequest(manifests.dest, f.dest) for f in same_size),
+            ]
+        )
+        equal = [a == b for a, b in zip(digests[: len(same_size)], digests[len(same_size) :])]
+    else:
+        equal = equal_many(
+            [(source_root / f.rel, dest_root / f.rel) for f in same_size],
+            total_bytes=sum(f.source.size for f in same_size),
+        )
+    return {f.rel for f, eq in zip(same_size, equal) if eq}
 
 
 def _classify(
-    source_files: dict[Path, Path],
-    dest_files: dict[Path, Path],
+    source_files: _Files,
+    dest_files: _Files,
     source_root: Path,
     dest_root: Path,
+    manifests: _Manifests | None = None,
 ) -> list[SyncAction]:
+    """Without `manifests`, every same-sized file present on both sides is read
+    (stopping at the first differing chunk)."""
+    shared = [_SharedFile(rel, f, dest_files[rel]) for rel, f in source_files.items() if rel in dest_files]
+    identical = _identical_rels(shared, source_root, dest_root, manifests)
+
     actions: list[SyncAction] = []
-    for rel in sorted(set(source_files) | set(dest_files)):
-        src = source_files.get(rel)
-        dst = dest_files.get(rel)
-        if src and not dst:
-            actions.append(SyncAction(rel, "source_only", src, dest_root / rel))
-        elif dst and not src:
-            actions.append(SyncAction(rel, "dest_only", source_root / rel, dst))
-        elif src and dst:
-            kind: DifferenceKind = "identical" if _files_identical(src, dst) else "diverged"
-            actions.append(SyncAction(rel, kind, src, dst))
+    for rel in sorted(source_files.keys() | dest_files.keys()):
+        src, dst = source_root / rel, dest_root / rel
+        if rel not in dest_files:
+            actions.append(SyncAction(rel, "source_only", src, dst))
+        elif rel not in source_files:
+            actions.append(SyncAction(rel, "dest_only", src, dst))
+        else:
+            actions.append(SyncAction(rel, "identical" if rel in identical else "diverged", src, dst))
     return actions
 
 
@@ -126,16 +238,40 @@ def _binary_summary(source: Path, dest: Path) -> str:
 # ---------------------------------------------------------------------------
 
 
-def _copy_file(src: Path, dst: Path) -> None:
-    dst.parent.mkdir(parents=True, exist_ok=True)
-    dst.touch()
-    obsidian_open(dst)
-    shutil.copy2(src, dst)
+class _Decision(ty.NamedTuple):
+    """What a handler decided, and the file ops (if any) that carry it out."""
+
+    performed: SyncActionPerformed
+    ops: tuple[FileOp, ...] = ()
+
+
+def _copy_to_dest(action: SyncAction) -> _Decision:
+    return _Decision("copied_to_dest", (CopyOp(action.source, action.dest),))
+
+
+def _copy_to_source(action: SyncAction) -> _Decision:
+    return _Decision("copied_to_source", (CopyOp(action.dest, action.source),))
+
 
+_SKIPPED = _Decision("skipped")
 
-def _write_path(text: str, path: Path) -> None:
-    obsidian_open(path)
-    path.write_text(text)
+
+def _execute(decided: ty.Sequence[tuple[SyncAction, _Decision]]) -> list[tuple[SyncAction, _Decision]]:
+    """Runs every decision's ops and reports them; a decision with an op that
+    failed comes back as "failed" (its paths are left as they were, or
+    half-copied, and not recorded as agreed)."""
+    ops = [op for _, d in decided for op in d.ops]
+    if not ops:
+        return list(decided)
+    report = execute(ops)
+    print(format_report(report))
+    failed = {t.op for t in report.timings if t.error}
+    if report.commit_error:
+        failed |= {op for op in ops if isinstance(op, WriteOp)}
+    return [
+        (action, _Decision("failed", decision.ops) if failed.intersection(decision.ops) else decision)
+        for action, decision in decided
+    ]
 
 
 # ---------------------------------------------------------------------------
@@ -143,75 +279,61 @@ def _write_path(text: str, path: Path) -> None:
 # ---------------------------------------------------------------------------
 
 
-def _handle_source_only(action: SyncAction, *, dry_run: bool) -> SyncActionPerformed:
+def _handle_source_only(action: SyncAction, *, dry_run: bool) -> _Decision:
     print(f"\n{_BLUE('+ ' + str(action.rel))}")
     print("  exists in source, missing from dest")
     if dry_run:
         print(_DIM("  [dry-run] would copy source -> dest"))
-        return "copied_to_dest"
+        return _Decision("copied_to_dest")
     response = input(_BLUE("  Copy to dest? [Y/n] ")).strip().lower()
     if response in ("", "y"):
-        _copy_file(action.source, action.dest)
-        return "copied_to_dest"
-    return "skipped"
+        return _copy_to_dest(action)
+    return _SKIPPED
 
 
-def _handle_dest_only(action: SyncAction, *, dry_run: bool) -> SyncActionPerformed:
+def _handle_dest_only(action: SyncAction, *, dry_run: bool) -> _Decision:
     print(f"\n{_BLUE('? ' + str(action.rel))}")
     print("  exists in dest, missing from source")
     if dry_run:
         print(_DIM("  [dry-run] would copy dest -> source"))
-        return "copied_to_source"
+        return _Decision("copied_to_source")
     response = input(_BLUE("  Copy to source? [Y/n] ")).strip().lower()
     if response in ("", "y"):
-        _copy_file(action.dest, action.source)
-        return "copied_to_source"
-    return "skipped"
+        return _copy_to_source(action)
+    return _SKIPPED
 
 
-def _handle_diverged(action: SyncAction, *, dry_run: bool) -> SyncActionPerformed:
+def _handle_diverged(action: SyncAction, *, dry_run: bool, base: BaseSnapshots | None) -> _Decision:
     print(f"\n{_BLUE('~ ' + str(action.rel))}")
 
     if _is_binary(action.source) or _is_binary(action.dest):
         return _handle_diverged_binary(action, dry_run=dry_run)
+    base_text = base.text(action.rel) if base else None
+    if base_text is not None:
+        return _handle_diverged_text_3way(action, base_text, dry_run=dry_run)
     return _handle_diverged_text(action, dry_run=dry_run)
 
 
-def _handle_diverged_binary(action: SyncAction, *, dry_run: bool) -> SyncActionPerformed:
+def _handle_diverged_binary(action: SyncAction, *, dry_run: bool) -> _Decision:
     print(_binary_summary(action.source, action.dest))
     if dry_run:
         print(_DIM("  [dry-run] would prompt: source / dest / skip"))
-        return "skipped"
+        return _SKIPPED
     response = input(_BLUE("  Keep [s]ource / [d]est / s[k]ip? ")).strip().lower()
     if response in ("", "s"):
-        _copy_file(action.source, action.dest)
-        return "copied_to_dest"
+        return _copy_to_dest(action)
     elif response == "d":
-        _copy_file(action.dest, action.source)
-        return "copied_to_source"
-    return "skipped"
+        return _copy_to_source(action)
+    return _SKIPPED
 
 
-def _handle_diverged_text(action: SyncAction, *, dry_run: bool) -> SyncActionPerformed:
-    d = diff(action.source, action.dest)
-    hunk_list = hunks(d)
-
-    if not hunk_list:
-        print(_DIM("  (no text diff)"))
-        return "skipped"
-
-    if dry_run:
-        for h in hunk_list:
-            print(colorize_hunk(h))
-        print(_DIM(f"  [dry-run] {len(hunk_list)} hunk(s) would be prompted"))
-        return "merged"
-
-    dest_lines = action.dest.read_text().splitlines(keepends=True)
-    source_lines = action.source.read_text().splitlines(keepends=True)
+def _prompt_choices(hunk_iter: ty.Iterable[Hunk], total: int) -> list[HunkChoice]:
+    """One choice per hunk; hunks are rendered as they come, so the first is
+    on screen before later ones have been built."""
     choices: list[HunkChoice] = []
     accept_all = False
 
-    for i, h in enumerate(hunk_list):
+    for i, h in enumerate(hunk_iter):
         print(colorize_hunk(h))
 
         if accept_all:
@@ -219,7 +341,7 @@ def _handle_diverged_text(action: SyncAction, *, dry_run: bool) -> SyncActionPer
             continue
 
         prompt = _BLUE(
-            f"  hunk {i + 1}/{len(hunk_list)} — "
+            f"  hunk {i + 1}/{total} — "
             "[y]es source→dest / [s]ync dest→source / [n]o skip / [a]ll / [q]uit? "
         )
         response = input(prompt).strip().lower()
@@ -232,68 +354,251 @@ def _handle_diverged_text(action: SyncAction, *, dry_run: bool) -> SyncActionPer
             accept_all = True
         elif response == "q":
             choices.append("skip")
-            choices.extend("skip" for _ in range(len(hunk_list) - i - 1))
+            choices.extend("skip" for _ in range(total - i - 1))
             break
         else:
             choices.append("skip")
 
-    merged = apply_hunks(dest_lines, source_lines, choices)
+    return choices
+
+
+def _merged_decision(
+    action: SyncAction, merged: MergedSides, source_lines: list[str], dest_lines: list[str]
+) -> _Decision:
+    ops = (
+        *([WriteOp(action.source, "".join(merged.source))] if merged.source != source_lines else []),
+        *([WriteOp(action.dest, "".join(merged.dest))] if merged.dest != dest_lines else []),
+    )
+    return _Decision("merged", ops) if ops else _SKIPPED
 
-    source_changed = merged.source != source_lines
-    dest_changed = merged.dest != dest_lines
-    if not source_changed and not dest_changed:
-        return "skipped"
 
-    if source_changed:
-        _write_path("".join(merged.source), action.source)
-    if dest_changed:
-        _write_path("".join(merged.dest), action.dest)
-    return "merged"
+def _handle_diverged_text(action: SyncAction, *, dry_run: bool) -> _Decision:
+    d = diff(action.source, action.dest)
+
+    if not d:
+        print(_DIM("  (no text diff)"))
+        return _SKIPPED
+
+    if dry_run:
+        for h in iter_hunks(d):
+            print(colorize_hunk(h))
+        print(_DIM(f"  [dry-run] {len(d.groups)} hunk(s) would be prompted"))
+        return _Decision("merged")
+
+    # diff(source, dest) is dest -> source: `a` is dest's lines, `b` source's
+    merged = apply_hunks(d.a, d.b, _prompt_choices(iter_hunks(d), len(d.groups)), groups=d.groups)
+    return _merged_decision(action, merged, d.b, d.a)
+
+
+def _handle_diverged_text_3way(action: SyncAction, base_text: str, *, dry_run: bool) -> _Decision:
+    dest_lines = action.dest.read_text().splitlines(keepends=True)
+    source_lines = action.source.read_text().splitlines(keepends=True)
+    chunks = merge3(base_text.splitlines(keepends=True), dest_lines, source_lines)
+    conflicts = [conflict_hunk(c) for c in chunks if c.kind == "conflict"]
+    automatic = sum(c.kind in ("source", "dest") for c in chunks)
+    print(
+        _DIM(
+            f"  merged against the last synced version: {automatic} one-sided change(s) applied,"
+            f" {len(conflicts)} conflict(s)"
+        )
+    )
+
+    if dry_run:
+        for h in conflicts:
+            print(colorize_hunk(h))
+        print(_DIM(f"  [dry-run] {len(conflicts)} conflict(s) would be prompted"))
+        return _Decision("merged")
+
+    merged = resolve_merge3(chunks, _prompt_choices(conflicts, len(conflicts)))
+    return _merged_decision(action, merged, source_lines, dest_lines)
+
+
+def _auto_merge(action: SyncAction, base: BaseSnapshots) -> _Decision | None:
+    """The three-way merge of a diverged text file, if it needs no choices."""
+    base_text = base.text(action.rel)
+    if base_text is None:
+        return None
+    dest_lines = action.dest.read_text().splitlines(keepends=True)
+    source_lines = action.source.read_text().splitlines(keepends=True)
+    chunks = merge3(base_text.splitlines(keepends=True), dest_lines, source_lines)
+    if any(c.kind == "conflict" for c in chunks):
+        return None
+    return _merged_decision(action, resolve_merge3(chunks, []), source_lines, dest_lines)
 
 
 # ---------------------------------------------------------------------------
 # Orchestrator
 # ---------------------------------------------------------------------------
 
-_HANDLERS: dict[DifferenceKind, ty.Callable[[SyncAction, bool], SyncActionPerformed]] = {
-    "source_only": lambda a, dr: _handle_source_only(a, dry_run=dr),
-    "dest_only": lambda a, dr: _handle_dest_only(a, dry_run=dr),
-    "diverged": lambda a, dr: _handle_diverged(a, dry_run=dr),
+
+class _Context(ty.NamedTuple):
+    dry_run: bool
+    base: BaseSnapshots | None
+
+
+_HANDLERS: dict[DifferenceKind, ty.Callable[[SyncAction, _Context], _Decision]] = {
+    "source_only": lambda a, ctx: _handle_source_only(a, dry_run=ctx.dry_run),
+    "dest_only": lambda a, ctx: _handle_dest_only(a, dry_run=ctx.dry_run),
+    "diverged": lambda a, ctx: _handle_diverged(a, dry_run=ctx.dry_run, base=ctx.base),
 }
 
 
-def sync(source: Path, dest: Path, *, dry_run: bool = False) -> SyncSummary:
-    source_files = _discover_files(source)
-    dest_files = _discover_files(dest)
-    actions = _classify(source_files, dest_files, source, dest)
+class _Scan(ty.NamedTuple):
+    actions: list[SyncAction]
+    manifests: _Manifests | None
+
+
+def _load_manifests(source: Path, dest: Path, manifest_dir: Path | None, rehash: bool) -> _Manifests | None:
+    if not manifest_dir:
+        return None
+    return _Manifests(
+        load_manifest(manifest_dir, source, rehash=rehash),
+        load_manifest(manifest_dir, dest, rehash=rehash),
+    )
 
-    identical = [a for a in actions if a.kind == "identical"]
-    actionable = [a for a in actions if a.kind != "identical"]
+
+def _save_manifests(manifests: _Manifests | None, source_files: _Files, dest_files: _Files) -> None:
+    if manifests:
+        manifests.source.save(f.rel for f in source_files.values())
+        manifests.dest.save(f.rel for f in dest_files.values())
+
+
+def _scan(source: Path, dest: Path, *, manifest_dir: Path | None, rehash: bool) -> _Scan:
+    source_files, dest_files = _discover_both(source, dest)
+    manifests = _load_manifests(source, dest, manifest_dir, rehash)
+    actions = _classify(source_files, dest_files, source, dest, manifests)
+    _save_manifests(manifests, source_files, dest_files)
+    return _Scan(actions, manifests)
+
+
+def _agreed_digest(action: SyncAction, manifests: _Manifests | None) -> str:
+    entry = manifests.source.entries.get(action.rel.as_posix()) if manifests else None
+    return entry.sha256 if entry else file_digest(action.source)
+
+
+def _advance_base(
+    base: BaseSnapshots,
+    scan: _Scan,
+    decided: ty.Sequence[tuple[SyncAction, _Decision]],
+    *,
+    live: ty.Iterable[Path] | None = None,
+    collect_garbage: bool = True,
+) -> None:
+    """Record every file this run left identical on both sides as its new base.
+    Files still diverged, or whose ops failed, keep the base they had; files
+    outside `live` (by default: outside this scan) lose theirs.  Bodies no
+    longer referenced are collected unless `collect_garbage` is off (watch)."""
+    for action in scan.actions:
+        if action.kind == "identical":
+            base.record(action.rel, _agreed_digest(action, scan.manifests), action.source)
+    for action, decision in decided:
+        if decision.ops and decision.performed != "failed" and files_equal(action.source, action.dest):
+            base.record(action.rel, file_digest(action.source), action.source)
+    base.save(
+        (rel.as_posix() for rel in (live if live is not None else (a.rel for a in scan.actions))),
+        collect_garbage=collect_garbage,
+    )
+
+
+def sync(
+    source: Path,
+    dest: Path,
+    *,
+    dry_run: bool = False,
+    manifest_dir: Path | None = None,
+    base_dir: Path | None = None,
+    rehash: bool = False,
+) -> SyncSummary:
+    """Without `base_dir`, diverged text is always diffed two-way."""
+    scan = _scan(source, dest, manifest_dir=manifest_dir, rehash=rehash)
+    base = load_base(base_dir, source, dest) if base_dir else None
+
+    identical = [a for a in scan.actions if a.kind == "identical"]
+    actionable = [a for a in scan.actions if a.kind != "identical"]
 
     if not actionable:
         print(_GREEN("Everything in sync."))
+        if base and not dry_run:
+            _advance_base(base, scan, [])
         return SyncSummary(0, 0, 0, len(identical))
 
     print(f"Found {len(actionable)} file(s) to review ({len(identical)} identical, skipped)\n")
 
-    summary = SyncSummary()
-    for action in actionable:
-        handler = _HANDLERS[action.kind]
-        result = handler(action, dry_run)
-        match result:
-            case "copied_to_source":
-                summary.copied_to_source += 1
-            case "copied_to_dest":
-                summary.copied_to_dest += 1
-            case "merged":
-                summary.merged += 1
-            case "skipped":
-                summary.skipped += 1
+    ctx = _Context(dry_run, base)
+    decided = _execute([(action, _HANDLERS[action.kind](action, ctx)) for action in actionable])
+    if base and not dry_run:
+        _advance_base(base, scan, decided)
 
+    summary = SyncSummary()
+    for _, decision in decided:
+        summary.tally(decision.performed)
     _print_summary(summary)
     return summary
 
 
+# ---------------------------------------------------------------------------
+# Batch (policy-driven, no prompts)
+# ---------------------------------------------------------------------------
+
+
+def _decide_diverged(action: SyncAction, resolution: DivergedResolution) -> _Decision:
+    if resolution == "newest":
+        s_mtime, d_mtime = action.source.stat().st_mtime_ns, action.dest.stat().st_mtime_ns
+        resolution = "source" if s_mtime > d_mtime else "dest" if d_mtime > s_mtime else "skip"
+    match resolution:
+        case "source":
+            return _copy_to_dest(action)
+        case "dest":
+            return _copy_to_source(action)
+    return _SKIPPED
+
+
+def _decide(action: SyncAction, policy: Policy, base: BaseSnapshots | None = None) -> _Decision:
+    resolutions = policy.for_path(action.rel)
+    match action.kind:
+        case "source_only":
+            return _copy_to_dest(action) if resolutions.source_only == "copy" else _SKIPPED
+        case "dest_only":
+            return _copy_to_source(action) if resolutions.dest_only == "copy" else _SKIPPED
+        case "diverged":
+            binary = _is_binary(action.source) or _is_binary(action.dest)
+            if not binary and base and (merged := _auto_merge(action, base)):
+                return merged
+            return _decide_diverged(
+                action, resolutions.diverged_binary if binary else resolutions.diverged_text
+            )
+    return _SKIPPED
+
+
+def sync_batch(
+    source: Path,
+    dest: Path,
+    policy: Policy,
+    *,
+    dry_run: bool = False,
+    manifest_dir: Path | None = None,
+    base_dir: Path | None = None,
+    rehash: bool = False,
+) -> BatchReport:
+    """Every decision is made (from `policy`) before any file is touched.
+    Diverged text that merges cleanly against its base is merged regardless
+    of the policy; the policy only decides real conflicts."""
+    scan = _scan(source, dest, manifest_dir=manifest_dir, rehash=rehash)
+    base = load_base(base_dir, source, dest) if base_dir else None
+    decided = [(a, _decide(a, policy, base)) for a in scan.actions if a.kind != "identical"]
+
+    if not dry_run:
+        decided = _execute(decided)
+        if base:
+            _advance_base(base, scan, decided)
+
+    report = BatchReport(identical=len(scan.actions) - len(decided))
+    for action, decision in decided:
+        report.summary.tally(decision.performed)
+        report.outcomes.append(BatchOutcome(action.rel, action.kind, decision.performed))
+    return report
+
+
 def _print_summary(s: SyncSummary) -> None:
     lines = [
         "=" * 40,
@@ -301,10 +606,128 @@ def _print_summary(s: SyncSummary) -> None:
         f"  Copied to source: {s.copied_to_source}",
         f"  Merged:           {s.merged}",
         f"  Skipped:          {s.skipped}",
+        *([_YELLOW(f"  Failed:           {s.failed}")] if s.failed else []),
     ]
     print("\n".join(lines))
 
 
+# ---------------------------------------------------------------------------
+# Watch (batch, re-run on every burst of filesystem changes)
+# ---------------------------------------------------------------------------
+
+
+def _refresh(root: Path, files: _Files, rels: ty.Iterable[Path]) -> None:
+    """Re-stat `rels` into the index; whatever is no longer a file drops out."""
+    for rel in rels:
+        try:
+            if (root / rel).is_file():
+                files[rel] = stat_file(root, rel.as_posix())
+                continue
+        except FileNotFoundError:
+            pass
+        files.pop(rel, None)
+
+
+def _changed_rels(changes: ty.Iterable[Change], source_files: _Files, dest_files: _Files) -> set[Path]:
+    """Vault-relative paths that may have changed on either side.  A changed
+    directory stands for everything previously indexed under it and
+    everything now on disk under it."""
+    rels: set[Path] = set()
+    for change in changes:
+        rel = Path(change.rel)
+        if not change.tree:
+            rels.add(rel)
+            continue
+        rels.update(r for r in source_files.keys() | dest_files.keys() if r.is_relative_to(rel))
+        if (change.root / rel).is_dir():
+            rels.update(rel / f.rel for f in walk(change.root / rel))
+    return {rel for rel in rels if not _is_hidden(rel)}
+
+
+def _log_decision(action: SyncAction, decision: _Decision, *, dry_run: bool) -> None:
+    stamp = datetime.now().strftime("%H:%M:%S")
+    prefix = "[dry-run] " if dry_run else ""
+    print(f"{_DIM(stamp)}  {prefix}{decision.performed:<17} {action.rel}")
+
+
+def watch(
+    source: Path,
+    dest: Path,
+    policy: Policy,
+    *,
+    dry_run: bool = False,
+    manifest_dir: Path | None = None,
+    base_dir: Path | None = None,
+    rehash: bool = False,
+    poll: bool = False,
+    poll_interval: float = 2.0,
+    quiet: float = 2.0,
+    stop: threading.Event | None = None,
+) -> None:
+    """`sync_batch`, then again for each burst of changes under either root --
+    but only over the paths that changed, classified against an in-memory
+    index of both trees.  Runs until `stop` is set (or interrupted)."""
+    source_files, dest_files = _discover_both(source, dest)
+    manifests = _load_manifests(source, dest, manifest_dir, rehash)
+    base = load_base(base_dir, source, dest) if base_dir else None
+    watcher = open_watcher([source, dest], poll=poll, poll_interval=poll_interval)
+    how = f"polling every {poll_interval:g}s" if isinstance(watcher, PollingWatcher) else "inotify"
+    print(_DIM(f"watching {source} and {dest} ({how})"))
+
+    rels: set[Path] = source_files.keys() | dest_files.keys()
+    changes: set[Change] = set()
+    just_walked = True  # the index is current for `rels`; after this, they're re-statted
+    try:
+        while True:
+            try:
+                rels |= _changed_rels(changes, source_files, dest_files)
+                if not just_walked:
+                    _refresh(source, source_files, rels)
+                    _refresh(dest, dest_files, rels)
+                actions = _classify(
+                    {r: source_files[r] for r in rels if r in source_files},
+                    {r: dest_files[r] for r in rels if r in dest_files},
+                    source,
+                    dest,
+                    manifests,
+                )
+                decided = [(a, _decide(a, policy, base)) for a in actions if a.kind != "identical"]
+            except OSError as e:
+                # an editor or a `git checkout` renamed or deleted something
+                # between its event and our reading it: keep the burst, and go
+                # round again with the index re-statted
+                print(_YELLOW(f"changes put off to the next burst: {e}"))
+            else:
+                if rels:
+                    if not dry_run:
+                        # failures are reported; their paths are retried on their next change
+                        decided = _execute(decided)
+                        touched = {a.rel for a, decision in decided if decision.ops}
+                        for root, files in ((source, source_files), (dest, dest_files)):
+                            _refresh(root, files, touched)
+                            watcher.observed(root, (rel.as_posix() for rel in touched))
+                        if base:
+                            _advance_base(
+                                base,
+                                _Scan(actions, manifests),
+                                decided,
+                                live=source_files.keys() | dest_files.keys(),
+                                collect_garbage=False,
+                            )
+                    _save_manifests(manifests, source_files, dest_files)
+                    for action, decision in decided:
+                        _log_decision(action, decision, dry_run=dry_run)
+                changes, rels = set(), set()
+
+            if stop is not None and stop.is_set():
+                return
+            # wake once a second even when idle, so `stop` is noticed
+            changes |= debounced(watcher, quiet=quiet, timeout=1.0)
+            just_walked = False
+    finally:
+        watcher.close()
+
+
 # ---------------------------------------------------------------------------
 # CLI
 # ---------------------------------------------------------------------------
@@ -313,23 +736,106 @@ def _print_summary(s: SyncSummary) -> None:
 def cli() -> None:
     import argparse
 
-    env = require_env()
-
     parser = argparse.ArgumentParser(
         description="Two-way sync between a source-of-truth directory and a shared directory."
     )
-    parser.add_argument("--source", "-s", type=Path, default=env.vault.work.current_project.personal)
-    parser.add_argument("--dest", "-d", type=Path, default=env.vault.work.current_project.shared)
+    parser.add_argument("--source", "-s", type=Path, help="default: .env.toml's current project (personal)")
+    parser.add_argument("--dest", "-d", type=Path, help="default: .env.toml's current project (shared)")
     parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument(
+        "--rehash",
+        action="store_true",
+        help="ignore the stat manifest from previous runs and re-read every file present on both sides",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="resolve everything from a policy instead of prompting (see --policy)",
+    )
+    parser.add_argument(
+        "--policy",
+        type=Path,
+        default=None,
+        help="TOML policy for --batch; defaults restore/pick up missing files and newest-wins binaries",
+    )
+    parser.add_argument("--report", type=Path, default=None, help="write a JSON report of a --batch run")
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="keep running: resolve (from --policy, as --batch does) whatever changes on either side",
+    )
+    parser.add_argument(
+        "--poll",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="with --watch, rescan every SECONDS instead of using inotify",
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=2.0,
+        metavar="SECONDS",
+        help="with --watch, wait for SECONDS without changes before acting on a burst (default: 2)",
+    )
     args = parser.parse_args()
 
+    if not (args.source and args.dest):
+        current_project = require_env().vault.work.current_project
+        args.source = args.source or current_project.personal
+        args.dest = args.dest or current_project.shared
     assert args.source and args.dest, "Either pass a value or configure it in .env.toml"
 
     for label, path in [("source", args.source), ("dest", args.dest)]:
         if not path.is_dir():
             parser.error(f"{label} directory does not exist: {path}")
 
-    sync(args.source, args.dest, dry_run=args.dry_run)
+    if not (args.batch or args.watch):
+        sync(
+            args.source,
+            args.dest,
+            dry_run=args.dry_run,
+            manifest_dir=default_manifest_dir(),
+            base_dir=default_base_dir(),
+            rehash=args.rehash,
+        )
+        return
+
+    try:
+        policy = load_policy(args.policy) if args.policy else Policy()
+    except PolicyError as e:
+        parser.error(str(e))
+    if args.watch:
+        try:
+            watch(
+                args.source,
+                args.dest,
+                policy,
+                dry_run=args.dry_run,
+                manifest_dir=default_manifest_dir(),
+                base_dir=default_base_dir(),
+                rehash=args.rehash,
+                poll=args.poll is not None,
+                poll_interval=args.poll or 2.0,
+                quiet=args.debounce,
+            )
+        except KeyboardInterrupt:
+            pass
+        return
+
+    report = sync_batch(
+        args.source,
+        args.dest,
+        policy,
+        dry_run=args.dry_run,
+        manifest_dir=default_manifest_dir(),
+        base_dir=default_base_dir(),
+        rehash=args.rehash,
+    )
+    _print_summary(report.summary)
+    if args.report:
+        args.report.parent.mkdir(parents=True, exist_ok=True)
+        args.report.write_text(report.to_json())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,71 @@
+"""Single-pass `os.scandir` walk of a vault.
+
+Hidden (dot-prefixed) entries are skipped, and hidden directories are never
+descended into, so `.git` / `.obsidian` / `.trash` cost one `readdir` entry
+each rather than a full subtree walk -- unless the caller asks for them with
+`include_hidden`.
+"""
+
+import os
+import typing as ty
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+class WalkedFile(ty.NamedTuple):
+    rel: str
+    """posix-style path relative to the walked root"""
+    size: int
+    mtime_ns: int
+    inode: int
+
+
+def _walked_file(rel: str, st: os.stat_result) -> WalkedFile:
+    return WalkedFile(rel, st.st_size, st.st_mtime_ns, st.st_ino)
+
+
+def stat_file(root: Path, rel: str) -> WalkedFile:
+    return _walked_file(rel, (root / rel).stat())
+
+
+def walk(
+    root: Path, *, include: ty.Callable[[str], bool] | None = None, include_hidden: bool = False
+) -> list[WalkedFile]:
+    """Every non-hidden (or, with `include_hidden`, every) regular file (or
+    symlink to one) under root.
+
+    `include` filters by file name, before the file is stat'ed.  Directory
+    symlinks are not followed, matching `Path.rglob`.  Directories and files
+    removed while the walk is under way (an editor's save, a `git checkout`)
+    are left out; a missing `root` still raises.
+    """
+    files: list[WalkedFile] = []
+    stack = [("", os.fspath(root))]
+    while stack:
+        prefix, dir_path = stack.pop()
+        try:
+            entries = os.scandir(dir_path)
+        except (FileNotFoundError, NotADirectoryError):
+            if not prefix:
+                raise
+            continue
+        with entries:
+            for entry in entries:
+                if entry.name.startswith(".") and not include_hidden:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((f"{prefix}{entry.name}/", entry.path))
+                elif entry.is_file() and (include is None or include(entry.name)):
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    files.append(_walked_file(prefix + entry.name, st))
+    return files
+
+
+def walk_many(roots: ty.Sequence[Path]) -> list[list[WalkedFile]]:
+    """`walk` each root on its own thread; scandir and stat release the GIL,
+    so roots on different disks (or a slow network mount) overlap."""
+    with ThreadPoolExecutor(max_workers=len(roots) or 1) as pool:
+        return list(pool.map(walk, roots))
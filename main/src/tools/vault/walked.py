@@ -59,15 +59,32 @@ the limitations:
 - our script pretty much assumes you are writing entries in order by date
 ascending - the later the date, the later the line.  the behavior when you are
 _not_ doing that is undefined.
+
+what it remembers between runs (in the per-user cache, not next to the log):
+the parsed lines of the file it last wrote, plus that file's length and hash.
+if the file still starts with exactly those bytes, only the lines appended
+after them are parsed.  the file is only rewritten when the output differs
+from what's there, and then atomically (see `tools.fs`).
+
+`walked stats` doesn't touch the file; it prints rolling 7/30/365-day sums
+(now, and the best ever), monthly and yearly totals, and walking streaks.
 """
 
+import bisect
+import hashlib
+import itertools
+import json
+import operator
 import re
 import typing as ty
+from array import array
 from dataclasses import dataclass, field
 from datetime import date, timedelta
 from pathlib import Path
 
+from tools.cache import cache_dir
 from tools.env import require_env
+from tools.fs import write_if_changed
 
 
 @dataclass
@@ -136,17 +153,21 @@ def _yield_weeks_in_range(start: date, end: date) -> ty.Iterator[_Week]:
         yield _Week(first_week_start + timedelta(days=n), first_week_start + timedelta(days=n + 6))
 
 
-def _total_from_entries(entries: list[_Entry]) -> float:
-    return sum(entry.total for entry in entries)
+def _week_start(d: date) -> date:
+    return d - timedelta(days=d.weekday())
 
 
 def _yield_weeks(entries: ty.Iterable[_Entry]) -> ty.Iterator[_Week]:
     sorted_entries = sorted(entries, key=lambda e: e.date)
     first, last = sorted_entries[0], sorted_entries[-1]
 
+    # one pass: sorted entries fall into consecutive runs per week
+    totals = {
+        start: sum(e.total for e in week_entries)
+        for start, week_entries in itertools.groupby(sorted_entries, key=lambda e: _week_start(e.date))
+    }
     for week in _yield_weeks_in_range(start=first.date, end=last.date):
-        entries = [entry for entry in sorted_entries if week.start <= entry.date <= week.end]
-        yield _Week(start=week.start, end=week.end, total=_total_from_entries(entries))
+        yield _Week(start=week.start, end=week.end, total=totals.get(week.start, 0.0))
 
 
 def _fmt_week(week: _Week) -> str:
@@ -230,21 +251,247 @@ def _print_out(lines_out: list[_Line]) -> _Output:
     return out
 
 
+# ---------------------------------------------------------------------------
+# parsed-state cache
+# ---------------------------------------------------------------------------
+
+_CACHE_VERSION = 1
+
+
+def _cache_file(log_file: Path) -> Path:
+    key = hashlib.sha256(str(log_file.resolve()).encode()).hexdigest()[:16]
+    return cache_dir("walked", f"{key}.json")
+
+
+def _encode_line(line: _Line) -> ty.Any:
+    if isinstance(line, _Entry):
+        return [line.date.isoformat(), line.values, line.unparsable]
+    return line
+
+
+def _decode_line(raw: ty.Any) -> _Line:
+    if isinstance(raw, str):
+        return raw
+    date_s, values, unparsable = raw
+    return _Entry(date.fromisoformat(date_s), sum(values), values, unparsable)
+
+
+class _ParsedLog(ty.NamedTuple):
+    cached: list[_Line]
+    """lines of the prefix we wrote last time, as parsing it again would give them"""
+    new: list[_Line]
+    """lines parsed this run: everything after that prefix"""
+
+
+def _parse_incrementally(log_file: Path, data: bytes) -> _ParsedLog:
+    try:
+        cache = json.loads(_cache_file(log_file).read_text())
+        offset, digest = cache["offset"], cache["sha256"]
+        usable = cache["version"] == _CACHE_VERSION and len(data) >= offset
+        if usable and hashlib.sha256(data[:offset]).hexdigest() == digest:
+            cached = [_decode_line(raw) for raw in cache["lines"]]
+            return _ParsedLog(cached, _parse_lines_in(data[offset:].decode()))
+    except (OSError, ValueError, KeyError, TypeError):
+        pass  # missing or unreadable cache: parse from scratch
+    return _ParsedLog([], _parse_lines_in(data.decode()))
+
+
+def _as_written(line: _Line) -> _Line:
+    """What parsing `line` back out of the file we write would give."""
+    if isinstance(line, _Entry):
+        return _parse_entry(_fmt_entry(line)) or line
+    return line
+
+
+def _save_cache(log_file: Path, written: bytes, parsed: _ParsedLog) -> None:
+    lines = [*parsed.cached, *map(_as_written, parsed.new)]
+    cache_file = _cache_file(log_file)
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cache_file.with_suffix(".tmp")
+    tmp.write_text(
+        json.dumps(
+            {
+                "version": _CACHE_VERSION,
+                "offset": len(written),
+                "sha256": hashlib.sha256(written).hexdigest(),
+                "lines": [_encode_line(line) for line in lines],
+            }
+        )
+    )
+    tmp.replace(cache_file)
+
+
+# ---------------------------------------------------------------------------
+# stats
+# ---------------------------------------------------------------------------
+
+
+class _Columns(ty.NamedTuple):
+    ordinals: array[int]  # array('i') of date.toordinal(), one per entry
+    totals: array[float]  # array('d'), one per entry
+
+
+def _columns(log_file_text: str) -> _Columns:
+    cols = _Columns(array("i"), array("d"))
+    for line in log_file_text.splitlines():
+        if entry := _parse_entry(line):
+            cols.ordinals.append(entry.date.toordinal())
+            cols.totals.append(entry.total)
+    return cols
+
+
+class _Daily(ty.NamedTuple):
+    first: date
+    prefix: array[float]
+    """array('d'): prefix[i] is the total walked on the days before first + i"""
+    walked: bytes
+    """one byte per day, 1 if anything was walked that day"""
+
+    def total(self, start: date, end: date) -> float:
+        """Walked from `start` up to but not including `end`, clamped to the series."""
+        n = len(self.walked)
+        lo = min(max((start - self.first).days, 0), n)
+        hi = min(max((end - self.first).days, 0), n)
+        return self.prefix[hi] - self.prefix[lo]
+
+
+def _daily(cols: _Columns, through: date) -> _Daily:
+    ordinals, totals = cols
+    if any(map(operator.gt, ordinals, ordinals[1:])):  # out of order: tolerated, not assumed
+        pairs = sorted(zip(ordinals, totals), key=operator.itemgetter(0))
+        ordinals, totals = (
+            array("i", map(operator.itemgetter(0), pairs)),
+            array("d", map(operator.itemgetter(1), pairs)),
+        )
+    first = ordinals[0]
+    days = range(first, max(ordinals[-1], through.toordinal()) + 2)
+    # the total before each day is the running total of the entries dated before it
+    running = array("d", itertools.accumulate(totals, initial=0.0))
+    before = map(bisect.bisect_left, itertools.repeat(ordinals), days)
+    prefix = array("d", map(running.__getitem__, before))
+    return _Daily(date.fromordinal(first), prefix, bytes(map(operator.ne, prefix[1:], prefix[:-1])))
+
+
+class _Window(ty.NamedTuple):
+    days: int
+    current: float
+    best: float
+    best_end: date
+
+
+def _window(daily: _Daily, days: int, today: date) -> _Window:
+    current = daily.total(today - timedelta(days=days - 1), today + timedelta(days=1))
+    p = daily.prefix
+    # the window ending on each day; the first `days - 1` of them reach back
+    # before the log starts, so a log shorter than the window still has one
+    sums = list(map(operator.sub, p[1:], itertools.chain(itertools.repeat(p[0], days), p[1:])))
+    best = max(sums)
+    return _Window(days, current, best, daily.first + timedelta(days=sums.index(best)))
+
+
+class _Streaks(ty.NamedTuple):
+    current: int
+    """consecutive days walked, ending today (or yesterday, if today's walk isn't logged yet)"""
+    best: int
+    best_end: date | None
+
+
+def _streaks(daily: _Daily, today: date) -> _Streaks:
+    runs = daily.walked.split(b"\0")
+    best = max(runs, key=len)
+    if not best:
+        return _Streaks(0, 0, None)
+    # end of the first longest run: its offset plus the separators before it
+    best_at = runs.index(best)
+    best_end = sum(map(len, runs[:best_at])) + best_at + len(best) - 1
+
+    ended = daily.walked[: max((today - daily.first).days + 1, 0)]
+    if ended.endswith(b"\0"):  # not walked (or not logged) today yet
+        ended = ended[:-1]
+    current = len(ended) - len(ended.rstrip(b"\1"))
+    return _Streaks(current, len(best), daily.first + timedelta(days=best_end))
+
+
+def _month_starts(first: date, last: date) -> ty.Iterator[date]:
+    d = first.replace(day=1)
+    while d <= last:
+        yield d
+        d = d.replace(year=d.year + 1, month=1) if d.month == 12 else d.replace(month=d.month + 1)
+
+
+class _Stats(ty.NamedTuple):
+    windows: list[_Window]
+    streaks: _Streaks
+    months: list[tuple[date, float]]
+    years: list[tuple[int, float]]
+
+
+_WINDOW_DAYS = (7, 30, 365)
+
+
+def _stats(cols: _Columns, today: date) -> _Stats:
+    daily = _daily(cols, through=today)
+    last = daily.first + timedelta(days=len(daily.walked) - 1)
+    months = list(_month_starts(daily.first, last))
+    month_ends = [*months[1:], last + timedelta(days=1)]
+    years = range(daily.first.year, last.year + 1)
+    return _Stats(
+        windows=[_window(daily, days, today) for days in _WINDOW_DAYS],
+        streaks=_streaks(daily, today),
+        months=[(start, daily.total(start, end)) for start, end in zip(months, month_ends)],
+        years=[(y, daily.total(date(y, 1, 1), date(y + 1, 1, 1))) for y in years],
+    )
+
+
+def _fmt_stats(stats: _Stats) -> str:
+    s = stats.streaks
+    best = f"{s.best} days (ending {s.best_end.isoformat()})" if s.best_end else "none"
+    windows = [
+        f"last {w.days:>3} days: {w.current:>8.2f}    best: {w.best:>8.2f} (ending {w.best_end.isoformat()})"
+        for w in stats.windows
+    ]
+    streak = f"streak:        {s.current:>5} days    best: {best}"
+    months = [f"{start:%Y-%m}: {total:>8.2f}" for start, total in stats.months if total]
+    years = [f"{year}:    {total:>8.2f}" for year, total in stats.years]
+    return "\n".join([*windows, streak, "", *months, "", *years])
+
+
+def stats(log_file: Path, today: date | None = None) -> None:
+    cols = _columns(log_file.read_text())
+    if not cols.ordinals:
+        print("no entries")
+        return
+    print(_fmt_stats(_stats(cols, today or date.today())))
+
+
 def main(log_file: Path) -> None:
-    output = _print_out(_derive_lines_out(_parse_lines_in(log_file.read_text())))
+    data = log_file.read_bytes()
+    parsed = _parse_incrementally(log_file, data)
+    output = _print_out(_derive_lines_out([*parsed.cached, *parsed.new]))
     print(output.console_s)
-    log_file.write_text(output.log_file_s)
+
+    written = output.log_file_s.encode()
+    if written != data:  # already in hand; spares write_if_changed re-reading it
+        write_if_changed(log_file, written)
+    _save_cache(log_file, written, parsed)
 
 
 def cli() -> None:
     import argparse
 
     parser = argparse.ArgumentParser(description=__doc__)
-    parser.add_argument("--file", type=Path, default=require_env().vault.main.walked_file)
+    parser.add_argument(
+        "command", nargs="?", choices=["stats"], help="print stats instead of updating sums"
+    )
+    parser.add_argument("--file", type=Path, help="default: .env.toml's vault.main.walked-file")
     args = parser.parse_args()
 
+    args.file = args.file or require_env().vault.main.walked_file
     assert args.file
-    main(args.file)
+    if args.command == "stats":
+        stats(args.file)
+    else:
+        main(args.file)
 
 
 if __name__ == "__main__":
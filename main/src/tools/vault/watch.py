@@ -0,0 +1,253 @@
+"""Change feeds over one or more directory trees, for `sync-vault --watch`.
+
+On Linux the trees are watched with inotify (through ctypes; no extra
+dependency), so an idle watch costs nothing but a blocked `select`.
+Elsewhere -- or with `poll=True` -- the trees are re-walked every
+`poll_interval` seconds and compared against the previous walk.
+
+Either way a feed reports *which* paths changed, not how: callers re-stat
+them.  Hidden entries are ignored, like `walk` does.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import time
+import typing as ty
+from pathlib import Path
+
+from .walk import walk
+
+
+class Change(ty.NamedTuple):
+    root: Path
+    rel: str
+    """posix path relative to `root`; "" with `tree` means the whole root"""
+    tree: bool = False
+    """`rel` is a directory: anything at or under it may have changed"""
+
+
+class Watcher(ty.Protocol):
+    def changes(self, timeout: float | None) -> set[Change]:
+        """Changes seen within `timeout` seconds (None: wait for some)."""
+        ...
+
+    def observed(self, root: Path, rels: ty.Iterable[str]) -> None:
+        """The caller has just seen (or written) `rels` as they are now; only
+        report them again once they change from that."""
+        ...
+
+    def close(self) -> None: ...
+
+
+def _is_hidden_name(name: str) -> bool:
+    return name.startswith(".")
+
+
+# ---------------------------------------------------------------------------
+# Polling
+# ---------------------------------------------------------------------------
+
+_Snapshot = dict[str, tuple[int, int, int]]
+
+
+def _snapshot(root: Path) -> _Snapshot:
+    return {f.rel: (f.size, f.mtime_ns, f.inode) for f in walk(root)}
+
+
+class PollingWatcher:
+    def __init__(self, roots: ty.Sequence[Path], *, poll_interval: float = 2.0) -> None:
+        self.poll_interval = poll_interval
+        self._snapshots = {root: _snapshot(root) for root in roots}
+        self._last_poll = time.monotonic()
+
+    def _poll(self) -> set[Change]:
+        changes: set[Change] = set()
+        for root, before in self._snapshots.items():
+            after = _snapshot(root)
+            changes.update(
+                Change(root, rel)
+                for rel in before.keys() | after.keys()
+                if before.get(rel) != after.get(rel)
+            )
+            self._snapshots[root] = after
+        return changes
+
+    def changes(self, timeout: float | None) -> set[Change]:
+        """Walks at most once per `poll_interval`, however short `timeout` is."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            next_poll = self._last_poll + self.poll_interval
+            time.sleep(
+                max((next_poll if deadline is None else min(next_poll, deadline)) - time.monotonic(), 0)
+            )
+            found: set[Change] = set()
+            if time.monotonic() >= next_poll:
+                found = self._poll()
+                self._last_poll = time.monotonic()
+            if found or (deadline is not None and time.monotonic() >= deadline):
+                return found
+
+    def observed(self, root: Path, rels: ty.Iterable[str]) -> None:
+        # Without this, a file we write and a coworker deletes between two
+        # polls is missing from both walks, so the deletion is never reported.
+        snapshot = self._snapshots[root]
+        for rel in rels:
+            try:
+                st = (root / rel).stat()
+                snapshot[rel] = (st.st_size, st.st_mtime_ns, st.st_ino)
+            except FileNotFoundError:
+                snapshot.pop(rel, None)
+
+    def close(self) -> None:
+        pass
+
+
+# ---------------------------------------------------------------------------
+# inotify (Linux)
+# ---------------------------------------------------------------------------
+
+_IN_MODIFY = 0x002
+_IN_ATTRIB = 0x004
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_Q_OVERFLOW = 0x4000
+_IN_IGNORED = 0x8000
+_IN_ISDIR = 0x40000000
+
+_WATCH_MASK = (
+    _IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+)
+
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len -- then `len` bytes of NUL-padded name
+
+
+def _libc() -> ctypes.CDLL | None:
+    if sys.platform != "linux":
+        return None
+    libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    return libc if hasattr(libc, "inotify_init1") else None
+
+
+class InotifyWatcher:
+    def __init__(self, roots: ty.Sequence[Path], libc: ctypes.CDLL) -> None:
+        self._libc = libc
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: dict[int, tuple[Path, str]] = {}  # wd -> (root, posix dir relative to root)
+        self._failures: set[int] = set()  # errnos already reported
+        for root in roots:
+            self._watch_tree(root, "")
+
+    def _watch_dir(self, root: Path, rel: str) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(root / rel), _WATCH_MASK)
+        if wd >= 0:
+            self._dirs[wd] = (root, rel)
+            return
+        err = ctypes.get_errno()
+        if err in (errno.ENOENT, errno.ENOTDIR) or err in self._failures:
+            return  # removed again before we got to it, or already reported
+        self._failures.add(err)
+        hint = " (raise fs.inotify.max_user_watches, or watch with --poll)" if err == errno.ENOSPC else ""
+        print(
+            f"warning: changes under {root / rel} (and any other directory failing the same way)"
+            f" won't be seen: {os.strerror(err)}{hint}",
+            file=sys.stderr,
+        )
+
+    def _watch_tree(self, root: Path, rel: str) -> None:
+        stack = [rel]
+        while stack:
+            rel = stack.pop()
+            self._watch_dir(root, rel)
+            try:
+                with os.scandir(root / rel) as entries:
+                    stack.extend(
+                        f"{rel}/{e.name}" if rel else e.name
+                        for e in entries
+                        if not _is_hidden_name(e.name) and e.is_dir(follow_symlinks=False)
+                    )
+            except OSError:
+                continue  # removed again before we got to it
+
+    def _unwatch_tree(self, root: Path, rel: str) -> None:
+        """A directory moved away: its watches (which follow the inode, not
+        the path) would go on reporting under its old path.  If it moved
+        within the tree, the IN_MOVED_TO that follows watches it afresh."""
+        for wd, (r, d) in list(self._dirs.items()):
+            if r == root and (d == rel or d.startswith(f"{rel}/")):
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._dirs[wd]
+
+    def _read(self) -> set[Change]:
+        try:
+            buf = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        changes: set[Change] = set()
+        offset = 0
+        while offset < len(buf):
+            wd, mask, _, name_len = _EVENT.unpack_from(buf, offset)
+            # as os.scandir would name it, undecodable bytes and all
+            name = os.fsdecode(buf[offset + _EVENT.size : offset + _EVENT.size + name_len].rstrip(b"\0"))
+            offset += _EVENT.size + name_len
+
+            if mask & _IN_Q_OVERFLOW:
+                changes.update(Change(root, "", tree=True) for root in {r for r, _ in self._dirs.values()})
+                continue
+            if mask & _IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            if wd not in self._dirs or not name or _is_hidden_name(name):
+                continue
+            root, parent = self._dirs[wd]
+            rel = f"{parent}/{name}" if parent else name
+            is_dir = bool(mask & _IN_ISDIR)
+            if is_dir and mask & _IN_MOVED_FROM:
+                self._unwatch_tree(root, rel)
+            if is_dir and mask & (_IN_CREATE | _IN_MOVED_TO):
+                self._watch_tree(root, rel)
+            changes.add(Change(root, rel, tree=is_dir))
+        return changes
+
+    def changes(self, timeout: float | None) -> set[Change]:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        return self._read() if readable else set()
+
+    def observed(self, root: Path, rels: ty.Iterable[str]) -> None:
+        pass  # every change after this point arrives as an event anyway
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def open_watcher(roots: ty.Sequence[Path], *, poll: bool = False, poll_interval: float = 2.0) -> Watcher:
+    if not poll and (libc := _libc()):
+        return InotifyWatcher(roots, libc)
+    return PollingWatcher(roots, poll_interval=poll_interval)
+
+
+def debounced(
+    watcher: Watcher, *, quiet: float = 2.0, max_wait: float = 30.0, timeout: float | None = None
+) -> set[Change]:
+    """Waits (up to `timeout`) for a change, then keeps gathering until
+    `quiet` seconds pass without one -- so a burst of writes (e.g. Relay
+    catching up) is handled as one batch -- or `max_wait` runs out."""
+    pending = watcher.changes(timeout)
+    if not pending:
+        return pending
+    deadline = time.monotonic() + max_wait
+    while (remaining := deadline - time.monotonic()) > 0:
+        more = watcher.changes(min(quiet, remaining))
+        if not more:
+            break
+        pending |= more
+    return pending
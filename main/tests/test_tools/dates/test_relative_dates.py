@@ -0,0 +1,69 @@
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+from tools.dates import relative_dates as rd
+
+
+@pytest.fixture
+def table(tmp_path: Path) -> Path:
+    path = tmp_path / "table.bin"
+    rd.build_table(path, 2025, 2026)
+    return path
+
+
+def test_table_rows_match_derived_dates(table: Path) -> None:
+    days = [date(2025, 1, 1) + timedelta(days=n) for n in range(730)]
+
+    looked_up = rd._lookup(table, days)
+
+    assert looked_up == [rd._derive_relative_dates(d) for d in days]
+
+
+def test_days_outside_the_table_are_derived(table: Path) -> None:
+    days = [date(2024, 12, 31), date(2026, 6, 1), date(2027, 1, 1)]
+
+    looked_up = rd._lookup(table, days)
+    dates = rd.relative_dates(days, table)
+
+    assert looked_up[0] is None and looked_up[2] is None
+    assert looked_up[1] == rd._derive_relative_dates(date(2026, 6, 1))
+    assert dates == [rd._derive_relative_dates(d) for d in days]
+
+
+@pytest.mark.parametrize("contents", [b"", b"not a table", b"RDT1" + b"\0" * 12])
+def test_unusable_table_falls_back_to_deriving(tmp_path: Path, contents: bytes) -> None:
+    path = tmp_path / "table.bin"
+    path.write_bytes(contents)
+
+    (dates,) = rd.relative_dates([date(2026, 5, 13)], path)
+
+    assert dates == rd._derive_relative_dates(date(2026, 5, 13))
+
+
+def test_table_from_an_older_derivation_is_ignored(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    path = tmp_path / "table.bin"
+    with monkeypatch.context() as m:
+        m.setattr(rd, "_SCHEMA", rd._schema(rd._TABLE_VERSION - 1))
+        rd.build_table(path, 2026, 2026)
+
+    assert rd._lookup(path, [date(2026, 5, 13)]) == [None]
+
+
+def test_parse_range_is_inclusive() -> None:
+    days = rd._parse_range("2026-02-27..2026-03-02")
+
+    assert days == [date(2026, 2, 27), date(2026, 2, 28), date(2026, 3, 1), date(2026, 3, 2)]
+
+
+@pytest.mark.parametrize("other", [["--range", "2026-01-01..2026-01-02"], ["--build-table", "2025..2026"]])
+def test_of_is_not_silently_ignored(
+    other: list[str], monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    monkeypatch.setattr("sys.argv", ["relative-dates", "--of", "2026-05-13", *other])
+
+    with pytest.raises(SystemExit) as exc:
+        rd.cli()
+
+    assert exc.value.code == 2
+    assert "not allowed with argument" in capsys.readouterr().err
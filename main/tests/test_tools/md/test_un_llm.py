@@ -0,0 +1,21 @@
+from pathlib import Path
+from unittest.mock import patch
+
+from tools.md.un_llm import main
+
+
+def test_rewrites_llm_formatting(tmp_path: Path) -> None:
+    p = tmp_path / "note.md"
+    p.write_text("it’s **bold** — ok\n")
+
+    main(p)
+
+    assert p.read_text() == "it's __bold__ - ok\n"
+
+
+def test_already_clean_file_is_not_written(tmp_path: Path) -> None:
+    p = tmp_path / "note.md"
+    p.write_text("it's __bold__ - ok\n")
+
+    with patch("os.replace", side_effect=AssertionError("wrote")):
+        main(p)
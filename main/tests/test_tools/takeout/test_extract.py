@@ -0,0 +1,101 @@
+import io
+import tarfile
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from tools.takeout.extract import ConcurrencyProbe, Jobs, extract_all
+from tools.takeout.untar import untar
+
+
+def _feed(probe: ConcurrencyProbe, rates_mb_s: list[float]) -> list[int]:
+    """Records one window per rate (as `samples` completions); returns the job
+    count after each."""
+    now, seen = 0.0, []
+    probe._start_window(now)
+    for rate in rates_mb_s:
+        for _ in range(max(probe.samples, probe.jobs)):
+            now += 1.0
+            probe.record(int(rate * 1e6), now)
+        seen.append(probe.jobs)
+    return seen
+
+
+def test_probe_adds_jobs_while_throughput_improves_then_backs_off() -> None:
+    probe = ConcurrencyProbe(max_jobs=8)
+
+    jobs = _feed(probe, [100, 180, 200, 150])
+
+    assert jobs == [2, 3, 4, 3]
+    assert probe.settled
+
+
+def test_probe_holds_when_a_job_adds_too_little() -> None:
+    probe = ConcurrencyProbe(max_jobs=8)
+
+    jobs = _feed(probe, [100, 105, 500])
+
+    assert jobs == [2, 2, 2]
+
+
+def test_probe_stops_at_max_jobs() -> None:
+    probe = ConcurrencyProbe(max_jobs=2)
+
+    assert _feed(probe, [100, 200, 400]) == [2, 2, 2]
+
+
+def test_extract_all_never_runs_more_than_jobs_at_once(tmp_path: Path) -> None:
+    archives = []
+    for i in range(6):
+        archives.append(tmp_path / f"{i}.tgz")
+        archives[-1].write_bytes(b"x")
+    running, peak, lock = 0, 0, threading.Lock()
+
+    def fake_extract(_: Path) -> None:
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+
+    results = extract_all(archives, fake_extract, jobs=2)
+
+    assert peak == 2
+    assert sorted(r.archive for r in results) == sorted(archives)
+
+
+def test_extract_all_stops_submitting_after_a_failure(tmp_path: Path) -> None:
+    archives = [tmp_path / f"{i}.tgz" for i in range(4)]
+    started = []
+
+    def failing(archive: Path) -> None:
+        started.append(archive)
+        raise RuntimeError("disk full")
+
+    with pytest.raises(RuntimeError, match="disk full"):
+        extract_all(archives, failing, jobs=1)
+
+    assert started == archives[:1]
+
+
+@pytest.mark.parametrize("jobs", [2, "auto"])
+def test_extract_all_untars_overlapping_deliveries_into_one_dest(tmp_path: Path, jobs: Jobs) -> None:
+    shared = {f"Takeout/shared/{i}.jpg": bytes([i]) * 10_000 for i in range(10)}
+    archives = []
+    for n in range(4):
+        archives.append(tmp_path / f"{n}.tgz")
+        with tarfile.open(archives[-1], "w:gz") as tar:
+            for name, data in {**shared, f"Takeout/{n}.json": b"{}"}.items():
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+    out, index = tmp_path / "out", tmp_path / "index.sqlite"
+
+    results = extract_all(archives, lambda tgz: untar(tgz, out, index_path=index), jobs=jobs, max_jobs=4)
+
+    assert len(results) == 4
+    assert all((out / rel).read_bytes() == data for rel, data in shared.items())
+    assert sorted(p.name for p in (out / "Takeout").glob("*.json")) == [f"{n}.json" for n in range(4)]
@@ -0,0 +1,62 @@
+import os
+from pathlib import Path
+
+import pytest
+from tools.takeout.fingerprint import _sample_offsets, fingerprinted, sampled_fingerprint
+
+_MB = 1 << 20
+
+
+@pytest.fixture
+def archive(tmp_path: Path) -> Path:
+    path = tmp_path / "takeout-001.tgz"
+    path.write_bytes(os.urandom(40 * _MB))
+    return path
+
+
+def _overwrite(path: Path, offset: int, data: bytes) -> None:
+    st = path.stat()
+    with path.open("r+b") as f:
+        f.seek(offset)
+        f.write(data)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))  # leave the stat as it was
+
+
+def test_samples_head_tail_and_evenly_spaced_chunks() -> None:
+    offsets = _sample_offsets(100 * _MB, chunks=3, chunk_size=_MB)
+
+    assert offsets == [0, 99 * _MB // 4, 99 * _MB // 2, 3 * 99 * _MB // 4, 99 * _MB]
+
+
+def test_small_file_is_one_sample() -> None:
+    assert _sample_offsets(100, chunks=16, chunk_size=_MB) == [0]
+
+
+def test_stable_for_an_untouched_file(archive: Path) -> None:
+    assert sampled_fingerprint(archive) == sampled_fingerprint(archive)
+
+
+def test_changes_with_the_stat(archive: Path) -> None:
+    before = sampled_fingerprint(archive)
+    st = archive.stat()
+
+    os.utime(archive, ns=(st.st_atime_ns, st.st_mtime_ns + 1))
+
+    assert sampled_fingerprint(archive) != before
+
+
+def test_changes_with_a_sampled_block(archive: Path) -> None:
+    before = sampled_fingerprint(archive)
+
+    _overwrite(archive, archive.stat().st_size - 10, b"corrupted!")
+
+    assert sampled_fingerprint(archive) != before
+
+
+def test_only_full_sees_edits_between_samples(archive: Path) -> None:
+    sampled, full = fingerprinted(archive, "sampled"), fingerprinted(archive, "full")
+
+    _overwrite(archive, 3 * _MB // 2, b"between the samples")
+
+    assert fingerprinted(archive, "sampled") == sampled
+    assert fingerprinted(archive, "full") != full
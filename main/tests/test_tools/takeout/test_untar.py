@@ -0,0 +1,130 @@
+import io
+import os
+import tarfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from tools.takeout import untar as untar_mod
+from tools.takeout.untar import Untarred, untar
+
+
+@pytest.fixture(params=[False, True], ids=["tarfile-gzip", "pigz"])
+def pigz(request: pytest.FixtureRequest, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    if not request.param:
+        monkeypatch.setattr(untar_mod.shutil, "which", lambda _: None)
+        return
+    # gzip takes the same -dc, so it can stand in for pigz through the pipe
+    fake = tmp_path / "bin" / "pigz"
+    fake.parent.mkdir()
+    fake.write_text('#!/bin/sh\nexec gzip "$@"\n')
+    fake.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{fake.parent}{os.pathsep}{os.environ['PATH']}")
+
+
+def _tgz(path: Path, files: dict[str, bytes], *, mtime: int = 1_700_000_000) -> Path:
+    with tarfile.open(path, "w:gz") as tar:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size, info.mtime, info.mode = len(data), mtime, 0o644
+            tar.addfile(info, io.BytesIO(data))
+    return path
+
+
+def test_extracts_files(tmp_path: Path, pigz: None) -> None:
+    tgz = _tgz(tmp_path / "a.tgz", {"Takeout/Photos/a.jpg": b"a" * 100, "Takeout/b.json": b"{}"})
+
+    result = untar(tgz, tmp_path / "out", index_path=tmp_path / "index.sqlite")
+
+    assert result == Untarred(written=2, skipped=0, bytes_written=102)
+    assert (tmp_path / "out/Takeout/Photos/a.jpg").read_bytes() == b"a" * 100
+    assert (tmp_path / "out/Takeout/Photos/a.jpg").stat().st_mtime == 1_700_000_000
+
+
+def test_rerun_skips_everything_already_extracted(tmp_path: Path, pigz: None) -> None:
+    tgz = _tgz(tmp_path / "a.tgz", {"Takeout/a.jpg": b"a", "Takeout/b.jpg": b"b"})
+    index = tmp_path / "index.sqlite"
+    untar(tgz, tmp_path / "out", index_path=index)
+
+    with patch.object(untar_mod, "_write", side_effect=AssertionError("rewrote")):
+        result = untar(tgz, tmp_path / "out", index_path=index)
+
+    assert result == Untarred(written=0, skipped=2, bytes_written=0)
+
+
+def test_changed_or_missing_files_are_rewritten(tmp_path: Path) -> None:
+    out, index = tmp_path / "out", tmp_path / "index.sqlite"
+    untar(_tgz(tmp_path / "a.tgz", {"a": b"a", "b": b"b", "c": b"c"}), out, index_path=index)
+    (out / "a").unlink()
+    (out / "b").write_bytes(b"edited")
+
+    result = untar(_tgz(tmp_path / "a.tgz", {"a": b"a", "b": b"b", "c": b"c"}), out, index_path=index)
+
+    assert result == Untarred(written=2, skipped=1, bytes_written=2)
+    assert (out / "b").read_bytes() == b"b"
+
+
+def test_touched_but_identical_file_is_verified_not_rewritten(tmp_path: Path) -> None:
+    out, index = tmp_path / "out", tmp_path / "index.sqlite"
+    tgz = _tgz(tmp_path / "a.tgz", {"a": b"same"})
+    untar(tgz, out, index_path=index)
+    (out / "a").touch()
+
+    result = untar(tgz, out, index_path=index)
+
+    assert result == Untarred(written=0, skipped=1, bytes_written=0)
+
+
+def test_later_delivery_with_a_newer_member_overwrites(tmp_path: Path) -> None:
+    out, index = tmp_path / "out", tmp_path / "index.sqlite"
+    untar(_tgz(tmp_path / "1.tgz", {"a": b"old"}, mtime=1), out, index_path=index)
+
+    result = untar(_tgz(tmp_path / "2.tgz", {"a": b"new"}, mtime=2), out, index_path=index)
+
+    assert result.written == 1
+    assert (out / "a").read_bytes() == b"new"
+
+
+def test_rejects_members_outside_dest(tmp_path: Path) -> None:
+    tgz = _tgz(tmp_path / "evil.tgz", {"../escape": b"x"})
+
+    with pytest.raises(tarfile.FilterError):
+        untar(tgz, tmp_path / "out", index_path=tmp_path / "index.sqlite")
+
+    assert not (tmp_path / "escape").exists()
+
+
+def test_two_indexes_on_one_db_can_interleave_writes(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(untar_mod, "_LOCK_TIMEOUT", 0.1)
+    a = untar_mod.ExtractIndex(tmp_path / "index.sqlite")
+    b = untar_mod.ExtractIndex(tmp_path / "index.sqlite")
+    record = untar_mod._Record(1, 2, "sha", 3)
+
+    a.put("a", record)
+    b.put("b", record)
+    a.put("c", record)
+
+    assert b.get("a") == a.get("b") == record
+    a.close()
+    b.close()
+
+
+def test_concurrent_untars_into_one_dest(tmp_path: Path) -> None:
+    # overlapping deliveries, as Takeout sends them
+    shared = {f"Takeout/shared/{i}.jpg": bytes([i]) * 50_000 for i in range(20)}
+    tgzs = [
+        _tgz(tmp_path / f"{n}.tgz", {**shared, **{f"Takeout/{n}/{i}.jpg": b"x" * i for i in range(20)}})
+        for n in range(4)
+    ]
+    out, index = tmp_path / "out", tmp_path / "index.sqlite"
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda tgz: untar(tgz, out, index_path=index), tgzs))
+
+    assert all(r.written + r.skipped == 40 for r in results)
+    assert all((out / rel).read_bytes() == data for rel, data in shared.items())
+    assert not list(out.rglob(".*.untar"))
+    assert untar(tgzs[0], out, index_path=index) == Untarred(written=0, skipped=40, bytes_written=0)
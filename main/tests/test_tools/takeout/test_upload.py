@@ -0,0 +1,243 @@
+import json
+import sys
+import threading
+import typing as ty
+import urllib.error
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+from tools.takeout.upload import (
+    AdaptiveConcurrency,
+    Checkpoint,
+    ImmichGo,
+    Shard,
+    ShardFailedError,
+    album_names,
+    upload_shards,
+    year_shards,
+)
+
+# Stands in for immich-go: reports the shard it was asked to upload to the
+# server, and fails if the server does.
+_FAKE_IMMICH_GO = """\
+import sys, urllib.request
+args = sys.argv[1:]
+server = args[args.index("--server") + 1]
+shard = next((a.split("=", 1)[1] for a in args if a.startswith("--date-range=")), "rest")
+try:
+    urllib.request.urlopen(urllib.request.Request(f"{server}/api/assets", data=shard.encode()))
+except Exception:
+    sys.exit(1)
+"""
+
+
+class _StubImmich:
+    def __init__(self, fail: dict[str, int]) -> None:
+        self.fail = fail  # shard -> how many more uploads of it to refuse
+        self.uploads: list[str] = []
+        self.albums: list[str] = []
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path == "/api/albums":
+                    self._reply(200, [{"albumName": name} for name in stub.albums])
+                else:
+                    self._reply(200, {"res": "pong"} if self.path == "/api/server/ping" else {})
+
+            def do_POST(self) -> None:
+                body = self.rfile.read(int(self.headers["Content-Length"])).decode()
+                if self.path == "/api/albums":
+                    with stub.lock:
+                        stub.albums.append(json.loads(body)["albumName"])
+                    self._reply(201, {})
+                    return
+                shard = body
+                with stub.lock:
+                    stub.uploads.append(shard)
+                    refuse = stub.fail.get(shard, 0) > 0
+                    if refuse:
+                        stub.fail[shard] -= 1
+                self._reply(500 if refuse else 201, {})
+
+            def _reply(self, status: int, body: ty.Any) -> None:
+                self.send_response(status)
+                self.end_headers()
+                self.wfile.write(json.dumps(body).encode())
+
+            def log_message(self, *_: ty.Any) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+@pytest.fixture
+def immich_go(tmp_path: Path) -> ty.Iterator[ty.Callable[..., tuple[_StubImmich, ImmichGo]]]:
+    fake = tmp_path / "immich-go"
+    fake.write_text(f"#!{sys.executable}\n{_FAKE_IMMICH_GO}")
+    fake.chmod(0o755)
+    stubs = []
+
+    def start(fail: dict[str, int] | None = None) -> tuple[_StubImmich, ImmichGo]:
+        stubs.append(_StubImmich(fail or {}))
+        return stubs[-1], ImmichGo(stubs[-1].url, "secret", executable=str(fake))
+
+    yield start
+    for stub in stubs:
+        stub.server.shutdown()
+
+
+_SHARDS = [Shard(y, (f"--date-range={y}",), 10) for y in ("2019", "2020", "2021")] + [Shard("rest", (), 0)]
+
+
+def _upload(tmp_path: Path, immich: ImmichGo, checkpoint: Checkpoint, **kwargs: ty.Any) -> None:
+    upload_shards(
+        tmp_path / "Takeout",
+        _SHARDS,
+        immich,
+        log_dir=tmp_path / "logs",
+        dry_run=False,
+        checkpoint=checkpoint,
+        **kwargs,
+    )
+
+
+def test_uploads_every_shard_with_the_sweep_last(tmp_path: Path, immich_go: ty.Any) -> None:
+    stub, immich = immich_go()
+    checkpoint = Checkpoint(tmp_path / "checkpoint.json")
+
+    _upload(tmp_path, immich, checkpoint)
+
+    assert sorted(stub.uploads[:-1]) == ["2019", "2020", "2021"] and stub.uploads[-1] == "rest"
+    assert set(Checkpoint(tmp_path / "checkpoint.json").done) == {"2019", "2020", "2021", "rest"}
+
+
+def test_failed_shard_is_retried(tmp_path: Path, immich_go: ty.Any) -> None:
+    stub, immich = immich_go(fail={"2020": 2})
+
+    _upload(tmp_path, immich, Checkpoint(None), attempts=3)
+
+    assert stub.uploads.count("2020") == 3
+
+
+def test_shard_failing_every_attempt_is_reported_after_the_rest_finish(
+    tmp_path: Path, immich_go: ty.Any
+) -> None:
+    stub, immich = immich_go(fail={"2020": 99})
+    checkpoint = Checkpoint(tmp_path / "checkpoint.json")
+
+    with pytest.raises(ShardFailedError, match="2020"):
+        _upload(tmp_path, immich, checkpoint, attempts=2)
+
+    assert stub.uploads.count("2020") == 2
+    assert set(checkpoint.done) == {"2019", "2021", "rest"}
+
+
+def test_resumes_from_the_checkpoint(tmp_path: Path, immich_go: ty.Any) -> None:
+    path = tmp_path / "checkpoint.json"
+    Checkpoint(path).mark_done(_SHARDS[0], 1.0)
+    Checkpoint(path).mark_done(_SHARDS[2], 1.0)
+    stub, immich = immich_go()
+
+    _upload(tmp_path, immich, Checkpoint(path))
+
+    assert stub.uploads == ["2020", "rest"]
+
+
+def test_albums_are_created_once_before_any_shard(tmp_path: Path, immich_go: ty.Any) -> None:
+    stub, immich = immich_go()
+    stub.albums.append("Trip to Maine")
+
+    _upload(tmp_path, immich, Checkpoint(None), albums=["Trip to Maine", "Wedding"])
+
+    assert stub.albums == ["Trip to Maine", "Wedding"]
+
+
+def test_dry_run_creates_no_albums(tmp_path: Path, immich_go: ty.Any) -> None:
+    stub, immich = immich_go()
+
+    upload_shards(
+        tmp_path / "Takeout",
+        _SHARDS,
+        immich,
+        log_dir=tmp_path / "logs",
+        dry_run=True,
+        checkpoint=Checkpoint(None),
+        albums=["Wedding"],
+    )
+
+    assert stub.albums == []
+
+
+def test_the_sweep_is_not_a_throughput_sample(
+    tmp_path: Path, immich_go: ty.Any, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    samples: list[float] = []
+    monkeypatch.setattr(
+        AdaptiveConcurrency, "succeeded", lambda self, files_per_s: samples.append(files_per_s)
+    )
+    _, immich = immich_go()
+
+    _upload(tmp_path, immich, Checkpoint(None))
+
+    assert len(samples) == 3 and all(samples)
+
+
+def test_unreachable_server_fails_before_any_shard(tmp_path: Path, immich_go: ty.Any) -> None:
+    stub, immich = immich_go()
+    stub.server.shutdown()
+    stub.server.server_close()
+
+    with pytest.raises(urllib.error.URLError):
+        _upload(tmp_path, immich, Checkpoint(None))
+
+    assert stub.uploads == []
+
+
+def test_concurrency_grows_additively_and_halves_on_failure() -> None:
+    concurrency = AdaptiveConcurrency(max_limit=8)
+
+    for rate in (10, 12, 11, 13):
+        concurrency.succeeded(rate)
+    grown = concurrency.limit
+    concurrency.failed()
+    halved = concurrency.limit
+    concurrency.succeeded(5)  # throughput fell off: back one
+
+    assert (grown, halved, concurrency.limit) == (5, 2, 1)
+
+
+def test_year_shards(tmp_path: Path) -> None:
+    photos = tmp_path / "Takeout" / "Google Photos"
+    for year, n in (("2019", 2), ("2021", 1)):
+        (photos / f"Photos from {year}").mkdir(parents=True)
+        for i in range(n):
+            (photos / f"Photos from {year}" / f"{i}.jpg").write_bytes(b"")
+    (photos / "Trip to Maine").mkdir()
+
+    shards = year_shards(tmp_path)
+
+    assert shards == [
+        Shard("2019", ("--date-range=2019",), 2),
+        Shard("2021", ("--date-range=2021",), 1),
+        Shard("rest", (), 0),
+    ]
+
+
+def test_album_names(tmp_path: Path) -> None:
+    photos = tmp_path / "Takeout" / "Google Photos"
+    for folder, metadata in (
+        ("Trip to Maine", {"title": "Trip to Maine"}),
+        ("Wedding(1)", {"title": "Wedding"}),
+        ("Untitled", {}),
+        ("Photos from 2019", {"title": "Photos from 2019"}),
+    ):
+        (photos / folder).mkdir(parents=True)
+        (photos / folder / "metadata.json").write_text(json.dumps(metadata))
+    (photos / "No metadata").mkdir()
+
+    assert album_names(tmp_path) == ["Trip to Maine", "Untitled", "Wedding"]
@@ -1,6 +1,8 @@
+import difflib
 from pathlib import Path
 
-from tools.diff import apply_hunks, diff, hunks
+import pytest
+from tools.diff import apply_hunks, diff, hunks, iter_hunks, merge3, resolve_merge3
 
 
 def _write(tmp_path: Path, name: str, text: str) -> Path:
@@ -42,6 +44,66 @@ class TestHunks:
         v2 = _write(tmp_path, "v2.md", "same\n")
         assert hunks(diff(v1, v2)) == []
 
+    def test_hunks_reference_the_diffs_lines_instead_of_copying(self, tmp_path: Path) -> None:
+        v1 = _write(tmp_path, "v1.md", "a\nb\nc\n")
+        v2 = _write(tmp_path, "v2.md", "a\nX\nc\n")
+        d = diff(v1, v2)
+
+        h = next(iter_hunks(d))
+
+        assert h.a is d.a and h.b is d.b
+        assert not hasattr(h, "__dict__")
+
+    def test_hunk_lines_match_the_unified_diff(self, tmp_path: Path) -> None:
+        shared = [f"line{i}\n" for i in range(20)]
+        v1_lines, v2_lines = shared.copy(), shared.copy()
+        v1_lines[2], v2_lines[17] = "SOURCE\n", "DEST\n"
+        v1 = _write(tmp_path, "v1.md", "".join(v1_lines))
+        v2 = _write(tmp_path, "v2.md", "".join(v2_lines))
+        d = diff(v1, v2)
+
+        rendered = [line for h in iter_hunks(d) for line in (h.header, *h.diff_lines)]
+
+        assert rendered == list(d)[2:]
+
+
+# ---------------------------------------------------------------------------
+# diff()
+# ---------------------------------------------------------------------------
+
+
+class TestDiff:
+    def test_difflib_engine_reproduces_unified_diff(self, tmp_path: Path) -> None:
+        old = [f"line{i}\n" for i in range(40)]
+        new = old.copy()
+        new[3:5] = ["changed\n"]
+        new.insert(30, "added\n")
+        v1 = _write(tmp_path, "v1.md", "".join(new))
+        v2 = _write(tmp_path, "v2.md", "".join(old))
+
+        d = diff(v1, v2, engine="difflib")
+
+        assert list(d) == list(difflib.unified_diff(old, new, fromfile=str(v2), tofile=str(v1)))
+
+    @pytest.mark.parametrize("engine", ["patience", "difflib"])
+    def test_taking_every_hunk_reproduces_v1(self, tmp_path: Path, engine: str) -> None:
+        v1 = _write(tmp_path, "v1.md", "a\nuh-huh\nb\nuh-huh\nc\nd\n")
+        v2 = _write(tmp_path, "v2.md", "uh-huh\na\nuh-huh\nc\nX\nd\nuh-huh\n")
+
+        d = diff(v1, v2, engine=engine)  # type: ignore[arg-type]
+        merged = apply_hunks(d.a, d.b, ["source"] * len(d.groups), groups=d.groups)
+
+        assert "".join(merged.dest) == v1.read_text()
+
+    def test_identical_files_are_falsy_and_empty(self, tmp_path: Path) -> None:
+        v1 = _write(tmp_path, "v1.md", "same\n")
+        v2 = _write(tmp_path, "v2.md", "same\n")
+
+        d = diff(v1, v2)
+
+        assert not d
+        assert list(d) == []
+
 
 # ---------------------------------------------------------------------------
 # apply_hunks()
@@ -137,3 +199,79 @@ class TestApplyHunks:
 
         assert result.source == lines
         assert result.dest == lines
+
+
+# ---------------------------------------------------------------------------
+# merge3() / resolve_merge3()
+# ---------------------------------------------------------------------------
+
+_BASE = [f"line{i}\n" for i in range(10)]
+
+
+def _edited(**changes: str) -> list[str]:
+    lines = _BASE.copy()
+    for key, text in changes.items():
+        lines[int(key.removeprefix("at"))] = text
+    return lines
+
+
+class TestMerge3:
+    def test_non_overlapping_edits_merge_without_conflict(self) -> None:
+        dest = _edited(at1="DEST\n")
+        source = _edited(at8="SOURCE\n")
+
+        chunks = merge3(_BASE, dest, source)
+        merged = resolve_merge3(chunks, [])
+
+        assert not any(c.kind == "conflict" for c in chunks)
+        assert merged.source == merged.dest == _edited(at1="DEST\n", at8="SOURCE\n")
+
+    def test_identical_edit_on_both_sides_is_not_a_conflict(self) -> None:
+        both = _edited(at4="BOTH\n")
+
+        chunks = merge3(_BASE, both, both)
+
+        assert [c.kind for c in chunks if c.kind != "unchanged"] == ["same"]
+        assert resolve_merge3(chunks, []).source == both
+
+    def test_overlapping_edits_conflict(self) -> None:
+        dest = _edited(at4="DEST\n")
+        source = _edited(at4="SOURCE\n")
+
+        chunks = merge3(_BASE, dest, source)
+
+        [conflict] = [c for c in chunks if c.kind == "conflict"]
+        assert (conflict.base, conflict.dest, conflict.source) == (["line4\n"], ["DEST\n"], ["SOURCE\n"])
+
+    @pytest.mark.parametrize(
+        ("choice", "expected_source", "expected_dest"),
+        [
+            ("source", "SOURCE\n", "SOURCE\n"),
+            ("dest", "DEST\n", "DEST\n"),
+            ("skip", "SOURCE\n", "DEST\n"),
+        ],
+    )
+    def test_conflict_choice_alongside_automatic_change(
+        self, choice: str, expected_source: str, expected_dest: str
+    ) -> None:
+        dest = _edited(at4="DEST\n")
+        source = _edited(at4="SOURCE\n", at9="TAIL\n")
+
+        merged = resolve_merge3(merge3(_BASE, dest, source), [choice])  # type: ignore[list-item]
+
+        assert merged.source == _edited(at4=expected_source, at9="TAIL\n")
+        assert merged.dest == _edited(at4=expected_dest, at9="TAIL\n")
+
+    def test_insertions_and_deletions_on_different_sides(self) -> None:
+        dest = [*_BASE[:2], "inserted\n", *_BASE[2:]]
+        source = _BASE[:7]
+
+        merged = resolve_merge3(merge3(_BASE, dest, source), [])
+
+        assert merged.source == merged.dest == [*_BASE[:2], "inserted\n", *_BASE[2:7]]
+
+    def test_mismatched_choice_length_raises(self) -> None:
+        chunks = merge3(_BASE, _edited(at4="DEST\n"), _edited(at4="SOURCE\n"))
+
+        with pytest.raises(ValueError):
+            resolve_merge3(chunks, [])
@@ -0,0 +1,165 @@
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from tools import env
+
+_TOML = """
+computer_name = "laptop"
+
+[claude.project-targets]
+vault-main = "~/_/main"
+work-org = ""
+
+[vault.main]
+walked-file = "/vault/walked.md"
+
+[vault.work.current-project]
+personal = "/personal"
+shared = "/shared"
+"""
+
+
+@pytest.fixture
+def env_toml(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    path = tmp_path / ".env.toml"
+    path.write_text(_TOML)
+    monkeypatch.setattr(env, "_env_toml", lambda: path)
+    monkeypatch.setattr(env, "_loaded", None)
+    return path
+
+
+def test_parses_config(env_toml: Path) -> None:
+    config = env.load_env()
+
+    assert config
+    assert config.computer_name == "laptop"
+    assert config.claude.project_targets == {"vault-main": Path("~/_/main").expanduser()}
+    assert config.vault.main.walked_file == Path("/vault/walked.md")
+    assert config.vault.work.current_project.shared == Path("/shared")
+
+
+def test_repeat_loads_in_one_process_reuse_the_config(env_toml: Path) -> None:
+    first = env.load_env()
+
+    with patch("pathlib.Path.read_text", side_effect=AssertionError("re-read")):
+        second = env.load_env()
+
+    assert second is first
+
+
+def test_later_processes_load_the_snapshot_instead_of_parsing(
+    env_toml: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    first = env.load_env()
+    monkeypatch.setattr(env, "_loaded", None)  # as in a fresh process
+
+    with patch("tomllib.loads", side_effect=AssertionError("parsed")):
+        second = env.load_env()
+
+    assert second == first
+
+
+def test_edits_are_picked_up(env_toml: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    env.load_env()
+    env_toml.write_text(_TOML.replace("laptop", "desktop"))
+    st = env_toml.stat()
+    os.utime(env_toml, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    config = env.load_env()
+
+    assert config and config.computer_name == "desktop"
+
+
+def test_every_problem_is_reported_together(env_toml: Path) -> None:
+    env_toml.write_text(
+        """
+computer_name = 3
+
+[vault.main]
+walked-file = ["not", "a", "path"]
+
+[vault.work.current-project]
+personal = "/personal"
+"""
+    )
+
+    with pytest.raises(env.EnvError) as exc:
+        env.load_env()
+
+    assert str(exc.value).splitlines()[1:] == [
+        "  computer_name: expected a string, got 3",
+        "  vault.main.walked-file: expected a string, got ['not', 'a', 'path']",
+        "  vault.work.current-project: set both personal and shared, or neither",
+    ]
+
+
+def test_malformed_toml_is_an_env_error(env_toml: Path) -> None:
+    env_toml.write_text("computer_name = \n")
+
+    with pytest.raises(env.EnvError, match=f"invalid {env_toml}: "):
+        env.load_env()
+
+
+def test_snapshot_is_readable_only_by_its_owner(env_toml: Path) -> None:
+    old_umask = os.umask(0o022)
+    try:
+        env.load_env()
+    finally:
+        os.umask(old_umask)
+
+    (snapshot,) = (env_toml.parent / "cache").rglob("*.pickle")
+    assert snapshot.stat().st_mode & 0o777 == 0o600
+
+
+def test_missing_file_is_none(env_toml: Path) -> None:
+    env_toml.unlink()
+
+    assert env.load_env() is None
+
+
+def test_unknown_keys_are_warned_about_not_fatal(
+    env_toml: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    env_toml.write_text(_TOML + "\n[immich]\ntypo = true\n")
+
+    config = env.load_env()
+
+    assert config and config.computer_name == "laptop"
+    assert capsys.readouterr().err == f"warning: {env_toml}: immich.typo: unknown key, ignored\n"
+
+
+def test_old_template_layout_still_loads(env_toml: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    # what .env.template.toml used to say
+    env_toml.write_text(
+        """
+computer_name = ''
+
+[claude.project-targets]
+vault-main = "~/_/main"
+
+[vault]
+walked-file = "~/_/main/walked.md"
+"""
+    )
+
+    config = env.load_env()
+
+    assert config and config.vault.main.walked_file == Path("~/_/main/walked.md").expanduser()
+    assert "vault.walked-file: deprecated, move it under [vault.main]" in capsys.readouterr().err
+
+
+def test_warnings_are_repeated_from_the_snapshot(
+    env_toml: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    env_toml.write_text("typo = true\n" + _TOML)
+    env.load_env()
+    capsys.readouterr()
+    monkeypatch.setattr(env, "_loaded", None)  # as in a fresh process
+
+    with patch("tomllib.loads", side_effect=AssertionError("parsed")):
+        env.load_env()
+
+    assert "typo: unknown key, ignored" in capsys.readouterr().err
@@ -0,0 +1,81 @@
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from tools.fs import AtomicWrites, write_if_changed
+
+
+def test_unchanged_content_is_not_written(tmp_path: Path) -> None:
+    p = tmp_path / "note.md"
+    p.write_text("same\n")
+    before = p.stat()
+
+    with patch("os.replace", side_effect=AssertionError("wrote")):
+        wrote = write_if_changed(p, "same\n")
+
+    assert not wrote
+    assert p.stat().st_mtime_ns == before.st_mtime_ns
+    assert list(tmp_path.iterdir()) == [p]
+
+
+def test_changed_content_replaces_the_file_and_keeps_its_mode(tmp_path: Path) -> None:
+    p = tmp_path / "note.md"
+    p.write_text("old\n")
+    p.chmod(0o640)
+    inode = p.stat().st_ino
+
+    wrote = write_if_changed(p, "new content\n")
+
+    assert wrote
+    assert p.read_text() == "new content\n"
+    assert p.stat().st_mode & 0o777 == 0o640
+    assert p.stat().st_ino != inode  # renamed over, not rewritten in place
+    assert list(tmp_path.iterdir()) == [p]
+
+
+def test_creates_missing_file(tmp_path: Path) -> None:
+    p = tmp_path / "new.md"
+
+    assert write_if_changed(p, b"bytes\n")
+
+    assert p.read_bytes() == b"bytes\n"
+
+
+def test_batch_commits_everything_on_exit(tmp_path: Path) -> None:
+    a, b, same = tmp_path / "a.md", tmp_path / "b.md", tmp_path / "same.md"
+    for p in (a, b, same):
+        p.write_text("old\n")
+
+    with AtomicWrites() as writes:
+        staged = [writes.write_if_changed(a, "A\n"), writes.write_if_changed(b, "B\n")]
+        staged.append(writes.write_if_changed(same, "old\n"))
+        assert a.read_text() == "old\n"  # nothing visible until commit
+
+    assert staged == [True, True, False]
+    assert (a.read_text(), b.read_text(), same.read_text()) == ("A\n", "B\n", "old\n")
+
+
+def test_batch_discards_everything_on_error(tmp_path: Path) -> None:
+    a = tmp_path / "a.md"
+    a.write_text("old\n")
+
+    with pytest.raises(RuntimeError), AtomicWrites() as writes:
+        writes.write_if_changed(a, "new\n")
+        raise RuntimeError("boom")
+
+    assert a.read_text() == "old\n"
+    assert os.listdir(tmp_path) == ["a.md"]
+
+
+def test_symlinked_target_is_written_through(tmp_path: Path) -> None:
+    real = tmp_path / "real.md"
+    real.write_text("old\n")
+    link = tmp_path / "link.md"
+    link.symlink_to(real)
+
+    assert write_if_changed(link, "new\n")
+
+    assert link.is_symlink()
+    assert real.read_text() == "new\n"
+    assert sorted(os.listdir(tmp_path)) == ["link.md", "real.md"]
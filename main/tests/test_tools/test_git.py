@@ -0,0 +1,18 @@
+from pathlib import Path
+
+import pytest
+from tools.git import repo_root
+
+
+@pytest.mark.parametrize("git", ["dir", "file"])  # a worktree or submodule has a .git file
+def test_repo_root_walks_up_to_dot_git(tmp_path: Path, git: str) -> None:
+    root = tmp_path / "repo"
+    nested = root / "a" / "b"
+    nested.mkdir(parents=True)
+    if git == "dir":
+        (root / ".git").mkdir()
+    else:
+        (root / ".git").write_text("gitdir: elsewhere\n")
+    (nested / "mod.py").write_text("")
+
+    assert repo_root(nested / "mod.py") == root.resolve()
@@ -0,0 +1,74 @@
+import typing as ty
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from tools import hashing
+from tools.hashing import digest_many, equal_many, file_digest, files_equal, read_head
+
+
+def _write(tmp_path: Path, name: str, content: bytes) -> Path:
+    p = tmp_path / name
+    p.write_bytes(content)
+    return p
+
+
+@pytest.mark.parametrize(
+    "a, b, expected",
+    [
+        (b"same", b"same", True),
+        (b"", b"", True),
+        (b"one", b"two", False),
+        (b"short", b"longer", False),
+        (b"x" * 10 + b"A", b"x" * 10 + b"B", False),
+    ],
+)
+def test_files_equal(tmp_path: Path, a: bytes, b: bytes, expected: bool) -> None:
+    pa, pb = _write(tmp_path, "a", a), _write(tmp_path, "b", b)
+
+    assert files_equal(pa, pb, chunk_size=4) is expected
+
+
+def test_read_head_reads_only_prefix(tmp_path: Path) -> None:
+    p = _write(tmp_path, "big", b"0123456789")
+
+    assert read_head(p, 4) == b"0123"
+
+
+def test_many_variants_preserve_input_order(tmp_path: Path) -> None:
+    paths = [_write(tmp_path, f"f{i}", str(i).encode()) for i in range(20)]
+
+    digests = digest_many(paths, max_workers=4)
+    equal = equal_many([(p, p) for p in paths] + [(paths[0], paths[1])], max_workers=4)
+
+    assert digests == [file_digest(p) for p in paths]
+    assert equal == [True] * 20 + [False]
+
+
+@pytest.mark.parametrize(
+    "cpus, total_bytes, pooled",
+    [
+        (8, None, True),
+        (8, hashing.PARALLEL_MIN_BYTES, True),
+        (8, hashing.PARALLEL_MIN_BYTES - 1, False),
+        (1, None, False),
+        (None, None, False),
+    ],
+)
+def test_small_batches_and_single_cpus_skip_the_pool(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, cpus: int | None, total_bytes: int | None, pooled: bool
+) -> None:
+    paths = [_write(tmp_path, f"f{i}", str(i).encode()) for i in range(3)]
+    pools: list[ThreadPoolExecutor] = []
+
+    def pool(**kwargs: ty.Any) -> ThreadPoolExecutor:
+        pools.append(ThreadPoolExecutor(**kwargs))
+        return pools[-1]
+
+    monkeypatch.setattr(hashing.os, "process_cpu_count", lambda: cpus)
+    monkeypatch.setattr(hashing, "ThreadPoolExecutor", pool)
+
+    digests = digest_many(paths, total_bytes=total_bytes)
+
+    assert digests == [file_digest(p) for p in paths]
+    assert bool(pools) is pooled
@@ -0,0 +1,68 @@
+import difflib
+import itertools
+import random
+
+import pytest
+from tools.linediff import ENGINES, grouped_opcodes, intern_lines, matching_blocks, opcodes
+
+
+def _random_pair(seed: int, n: int = 300) -> tuple[list[str], list[str]]:
+    rng = random.Random(seed)
+    # a small vocabulary so lines repeat, like transcript filler and table rules
+    vocab = [f"{word}\n" for word in ("uh-huh", "| --- | --- |", "right", "", "ok so")] + [
+        f"line {i}\n" for i in range(n)
+    ]
+    a = [rng.choice(vocab) for _ in range(n)]
+    b = a.copy()
+    for _ in range(n // 10):
+        at = rng.randrange(len(b) + 1)
+        match rng.choice(("insert", "delete", "replace")):
+            case "insert":
+                b.insert(at, rng.choice(vocab))
+            case "delete" if at < len(b):
+                del b[at]
+            case "replace" if at < len(b):
+                b[at] = rng.choice(vocab)
+    return a, b
+
+
+def test_intern_lines_gives_equal_lines_equal_ids() -> None:
+    a_ids, b_ids = intern_lines(["x\n", "y\n", "x\n"], ["y\n", "z\n"])
+
+    assert a_ids[0] == a_ids[2] != a_ids[1] == b_ids[0]
+    assert b_ids[1] not in a_ids
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+@pytest.mark.parametrize("seed", range(5))
+def test_blocks_are_ordered_true_matches_ending_in_sentinel(engine: str, seed: int) -> None:
+    a, b = _random_pair(seed)
+
+    blocks = matching_blocks(a, b, engine=engine)  # type: ignore[arg-type]
+
+    assert blocks[-1] == (len(a), len(b), 0)
+    for prev, cur in itertools.pairwise(blocks):
+        assert prev.a + prev.size <= cur.a and prev.b + prev.size <= cur.b
+    for m in blocks:
+        assert a[m.a : m.a + m.size] == b[m.b : m.b + m.size]
+
+
+def test_patience_anchors_on_unique_lines() -> None:
+    # the repeated "}" lines can't anchor anything; g's body stays attached to g
+    a = ["def f():\n", "}\n", "def g():\n", "}\n", "# end a\n"]
+    b = ["def g():\n", "}\n", "def h():\n", "}\n", "# end b\n"]
+
+    blocks = matching_blocks(a, b, engine="patience")
+
+    assert (2, 0, 2) in blocks
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_opcodes_and_groups_match_sequence_matcher(seed: int) -> None:
+    a, b = _random_pair(seed)
+    sm = difflib.SequenceMatcher(None, a, b)
+
+    ops = opcodes(sm.get_matching_blocks())
+
+    assert ops == [tuple(op) for op in sm.get_opcodes()]
+    assert grouped_opcodes(ops) == [[tuple(op) for op in g] for g in sm.get_grouped_opcodes()]
@@ -0,0 +1,24 @@
+import subprocess
+import sys
+import tomllib
+from pathlib import Path
+
+import pytest
+
+_PYPROJECT = Path(__file__).resolve().parents[2] / "pyproject.toml"
+# run as scripts rather than installed as console scripts
+_UNREGISTERED = {"tools.google_photos_to_immich"}
+
+
+def _script_modules() -> list[str]:
+    scripts = tomllib.loads(_PYPROJECT.read_text())["project"]["scripts"]
+    return sorted({target.partition(":")[0] for target in scripts.values()} | _UNREGISTERED)
+
+
+@pytest.mark.parametrize("module", _script_modules())
+def test_importing_a_script_does_not_import_thds(module: str) -> None:
+    loaded = subprocess.check_output(
+        [sys.executable, "-c", f"import sys, {module}; print(*sorted(sys.modules))"], text=True
+    ).split()
+
+    assert [m for m in loaded if m == "thds" or m.startswith("thds.")] == []
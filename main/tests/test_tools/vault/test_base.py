@@ -0,0 +1,127 @@
+import os
+import time
+from pathlib import Path
+
+from tools.hashing import file_digest
+from tools.vault import base as base_mod
+from tools.vault.base import load_base
+
+
+def _write(p: Path, content: str | bytes) -> Path:
+    p.parent.mkdir(parents=True, exist_ok=True)
+    if isinstance(content, bytes):
+        p.write_bytes(content)
+    else:
+        p.write_text(content)
+    return p
+
+
+def _age(base_dir: Path) -> None:
+    """Backdate every stored body past the GC grace period."""
+    past = time.time() - 2 * base_mod._GC_GRACE_SECONDS
+    for p in (base_dir / "objects").rglob("*"):
+        os.utime(p, (past, past))
+
+
+def test_recorded_text_round_trips_through_save_and_load(tmp_path: Path) -> None:
+    src, dst, base_dir = tmp_path / "src", tmp_path / "dst", tmp_path / "base"
+    note = _write(src / "notes/a.md", "agreed\n")
+    base = load_base(base_dir, src, dst)
+
+    base.record(Path("notes/a.md"), file_digest(note), note)
+    base.save(["notes/a.md"])
+
+    assert load_base(base_dir, src, dst).text(Path("notes/a.md")) == "agreed\n"
+
+
+def test_binary_is_indexed_but_not_stored(tmp_path: Path) -> None:
+    src, dst, base_dir = tmp_path / "src", tmp_path / "dst", tmp_path / "base"
+    image = _write(src / "img.png", b"\x89PNG\x00\x01")
+    base = load_base(base_dir, src, dst)
+
+    base.record(Path("img.png"), file_digest(image), image)
+
+    assert base.index["img.png"] == file_digest(image)
+    assert base.text(Path("img.png")) is None
+    assert not (base_dir / "objects").exists()
+
+
+def test_unchanged_content_is_not_reread(tmp_path: Path) -> None:
+    src, dst, base_dir = tmp_path / "src", tmp_path / "dst", tmp_path / "base"
+    note = _write(src / "a.md", "agreed\n")
+    base = load_base(base_dir, src, dst)
+    sha = file_digest(note)
+    base.record(Path("a.md"), sha, note)
+    note.unlink()
+
+    base.record(Path("a.md"), sha, note)
+
+    assert base.text(Path("a.md")) == "agreed\n"
+
+
+def test_save_drops_dead_paths_and_their_bodies(tmp_path: Path) -> None:
+    src, dst, base_dir = tmp_path / "src", tmp_path / "dst", tmp_path / "base"
+    kept = _write(src / "kept.md", "kept\n")
+    gone = _write(src / "gone.md", "gone\n")
+    base = load_base(base_dir, src, dst)
+    base.record(Path("kept.md"), file_digest(kept), kept)
+    base.record(Path("gone.md"), file_digest(gone), gone)
+    _age(base_dir)
+
+    base.save(["kept.md"], collect_garbage=True)
+
+    reloaded = load_base(base_dir, src, dst)
+    assert reloaded.text(Path("gone.md")) is None
+    assert len([p for p in (base_dir / "objects").rglob("*") if p.is_file()]) == 1
+
+
+def test_bodies_shared_with_another_pair_survive_its_gc(tmp_path: Path) -> None:
+    src, dst, other, base_dir = tmp_path / "src", tmp_path / "dst", tmp_path / "other", tmp_path / "base"
+    note = _write(src / "a.md", "shared\n")
+    first = load_base(base_dir, src, dst)
+    first.record(Path("a.md"), file_digest(note), note)
+    first.save(["a.md"])
+
+    second = load_base(base_dir, src, other)
+    second.record(Path("a.md"), file_digest(note), note)
+    _age(base_dir)
+    second.save([], collect_garbage=True)
+
+    assert load_base(base_dir, src, dst).text(Path("a.md")) == "shared\n"
+
+
+def test_save_collects_nothing_unless_asked(tmp_path: Path) -> None:
+    src, dst, base_dir = tmp_path / "src", tmp_path / "dst", tmp_path / "base"
+    gone = _write(src / "gone.md", "gone\n")
+    base = load_base(base_dir, src, dst)
+    base.record(Path("gone.md"), file_digest(gone), gone)
+    _age(base_dir)
+
+    base.save([])
+
+    assert len([p for p in (base_dir / "objects").rglob("*") if p.is_file()]) == 1
+
+
+def test_young_unreferenced_bodies_survive_gc(tmp_path: Path) -> None:
+    # another sync has stored this body but not yet saved the index naming it
+    src, dst, other, base_dir = tmp_path / "src", tmp_path / "dst", tmp_path / "other", tmp_path / "base"
+    note = _write(src / "a.md", "in flight\n")
+    concurrent = load_base(base_dir, src, other)
+    concurrent.record(Path("a.md"), file_digest(note), note)
+
+    load_base(base_dir, src, dst).save([], collect_garbage=True)
+
+    assert concurrent.text(Path("a.md")) == "in flight\n"
+
+
+def test_re_recording_a_stored_body_renews_its_grace_period(tmp_path: Path) -> None:
+    src, dst, other, base_dir = tmp_path / "src", tmp_path / "dst", tmp_path / "other", tmp_path / "base"
+    note = _write(src / "a.md", "old\n")
+    load_base(base_dir, src, dst).record(Path("a.md"), file_digest(note), note)
+    _age(base_dir)
+    concurrent = load_base(base_dir, src, other)
+    concurrent.record(Path("a.md"), file_digest(note), note)
+
+    load_base(base_dir, src, dst).save([], collect_garbage=True)
+
+    assert concurrent.text(Path("a.md")) == "old\n"
@@ -0,0 +1,79 @@
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from tools.vault.conflict_files import find_and_prompt_to_delete_conflict_files
+
+
+def _copy(root: Path, n: int) -> Path:
+    return root / f"note (Conflicted copy {n}).md"
+
+
+def _populate(root: Path, source: str, copies: list[str]) -> list[Path]:
+    (root / "note.md").write_text(source)
+    paths = [_copy(root, n) for n in range(len(copies))]
+    for p, text in zip(paths, copies):
+        p.write_text(text)
+    return paths
+
+
+def test_auto_identical_deletes_duplicates_and_prompts_once_per_distinct_content(tmp_path: Path) -> None:
+    _populate(tmp_path, "mine\n", ["mine\n", "mine\n", "theirs\n", "theirs\n"])
+
+    with patch("builtins.input", return_value="n") as prompt:
+        deleted = find_and_prompt_to_delete_conflict_files(tmp_path, auto_identical=True)
+
+    assert deleted == 3
+    assert prompt.call_count == 1
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["note (Conflicted copy 2).md", "note.md"]
+
+
+def test_without_auto_identical_nothing_is_deleted_unasked(tmp_path: Path) -> None:
+    copies = _populate(tmp_path, "mine\n", ["mine\n", "theirs\n"])
+
+    with patch("builtins.input", return_value="n") as prompt:
+        deleted = find_and_prompt_to_delete_conflict_files(tmp_path)
+
+    assert deleted == 0
+    assert prompt.call_count == 1
+    assert all(p.exists() for p in copies)
+
+
+def test_accepting_a_group_deletes_every_identical_copy(tmp_path: Path) -> None:
+    copies = _populate(tmp_path, "mine\n", ["theirs\n", "theirs\n", "other\n"])
+
+    with patch("builtins.input", side_effect=["y", "n"]):
+        deleted = find_and_prompt_to_delete_conflict_files(tmp_path)
+
+    assert deleted == 2
+    assert [p.exists() for p in copies] == [False, False, True]
+
+
+def test_conflicted_copies_in_hidden_directories_are_found(tmp_path: Path) -> None:
+    obsidian = tmp_path / ".obsidian"
+    obsidian.mkdir()
+    (obsidian / "workspace.json").write_text('{"mine": 1}\n')
+    copy = obsidian / "workspace (Conflicted copy 2).json"
+    copy.write_text('{"mine": 1}\n')
+
+    deleted = find_and_prompt_to_delete_conflict_files(tmp_path, auto_identical=True)
+
+    assert deleted == 1
+    assert sorted(p.name for p in obsidian.iterdir()) == ["workspace.json"]
+
+
+@pytest.mark.parametrize("force", [False, True])
+def test_orphaned_copies_are_reported_and_kept(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str], force: bool
+) -> None:
+    _populate(tmp_path, "mine\n", ["mine\n"])
+    orphan = tmp_path / "renamed (Conflicted copy 1).md"
+    orphan.write_text("only copy\n")
+
+    deleted = find_and_prompt_to_delete_conflict_files(tmp_path, force=force, auto_identical=True)
+
+    assert deleted == 1
+    assert orphan.exists()
+    out = capsys.readouterr().out
+    assert f"- {orphan} (" in out and "no renamed.md" in out
+    assert "deleted note (Conflicted copy 0).md" in out
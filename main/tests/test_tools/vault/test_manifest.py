@@ -0,0 +1,131 @@
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+from tools import hashing
+from tools.vault import manifest
+from tools.vault.manifest import DigestRequest, ManifestEntry, digest_many, load_manifest
+from tools.vault.walk import WalkedFile, stat_file
+
+_SETTLED_MTIME_NS = 1_700_000_000 * 10**9
+
+
+def _write_settled(path: Path, content: str) -> WalkedFile:
+    """Write a file whose mtime is old enough to fall outside the racy window."""
+    path.write_text(content)
+    os.utime(path, ns=(_SETTLED_MTIME_NS, _SETTLED_MTIME_NS))
+    return stat_file(path.parent, path.name)
+
+
+def test_digest_hashes_once_then_answers_from_stat(tmp_path: Path) -> None:
+    root = tmp_path / "root"
+    root.mkdir()
+    st = _write_settled(root / "a.md", "hello\n")
+    m = load_manifest(tmp_path / "manifests", root)
+
+    first = digest_many([DigestRequest(m, st)])
+    second = digest_many([DigestRequest(m, st)])
+
+    assert first == second
+    assert m.hashed == 1
+
+
+def test_digests_across_manifests_in_request_order(tmp_path: Path) -> None:
+    a_root, b_root = tmp_path / "a", tmp_path / "b"
+    a_root.mkdir()
+    b_root.mkdir()
+    a = load_manifest(tmp_path / "manifests", a_root)
+    b = load_manifest(tmp_path / "manifests", b_root)
+    requests = [
+        DigestRequest(a, _write_settled(a_root / "x.md", "one\n")),
+        DigestRequest(b, _write_settled(b_root / "x.md", "two\n")),
+        DigestRequest(a, _write_settled(a_root / "y.md", "two\n")),
+    ]
+
+    digests = digest_many(requests)
+
+    assert digests[0] != digests[1]
+    assert digests[1] == digests[2]
+
+
+def test_saved_manifest_is_reused_across_loads(tmp_path: Path) -> None:
+    root = tmp_path / "root"
+    root.mkdir()
+    st = _write_settled(root / "a.md", "hello\n")
+    m = load_manifest(tmp_path / "manifests", root)
+    digest_many([DigestRequest(m, st)])
+    m.save(["a.md"])
+
+    reloaded = load_manifest(tmp_path / "manifests", root)
+    with patch.object(hashing, "file_digest", side_effect=AssertionError("read a file body")):
+        digest_many([DigestRequest(reloaded, st)])
+
+    assert reloaded.hashed == 0
+
+
+def test_stat_change_triggers_rehash(tmp_path: Path) -> None:
+    root = tmp_path / "root"
+    root.mkdir()
+    m = load_manifest(tmp_path / "manifests", root)
+    (before,) = digest_many([DigestRequest(m, _write_settled(root / "a.md", "hello\n"))])
+
+    (after,) = digest_many([DigestRequest(m, _write_settled(root / "a.md", "hello, world\n"))])
+
+    assert before != after
+    assert m.hashed == 2
+
+
+def test_rehash_discards_recorded_entries(tmp_path: Path) -> None:
+    root = tmp_path / "root"
+    root.mkdir()
+    st = _write_settled(root / "a.md", "hello\n")
+    m = load_manifest(tmp_path / "manifests", root)
+    digest_many([DigestRequest(m, st)])
+    m.save(["a.md"])
+
+    reloaded = load_manifest(tmp_path / "manifests", root, rehash=True)
+
+    assert reloaded.entries == {}
+
+
+def test_save_drops_deleted_and_racy_entries(tmp_path: Path) -> None:
+    root = tmp_path / "root"
+    root.mkdir()
+    m = load_manifest(tmp_path / "manifests", root)
+    (root / "fresh.md").write_text("f\n")
+    digest_many(
+        [
+            DigestRequest(m, _write_settled(root / "settled.md", "s\n")),
+            DigestRequest(m, _write_settled(root / "deleted.md", "d\n")),
+            DigestRequest(m, stat_file(root, "fresh.md")),
+        ]
+    )
+
+    m.save(["settled.md", "fresh.md"])
+
+    assert set(load_manifest(tmp_path / "manifests", root).entries) == {"settled.md"}
+
+
+def test_corrupt_manifest_loads_empty(tmp_path: Path) -> None:
+    root = tmp_path / "root"
+    root.mkdir()
+    path = manifest.manifest_path(tmp_path / "manifests", root)
+    path.parent.mkdir(parents=True)
+    path.write_text("{not json")
+
+    m = load_manifest(tmp_path / "manifests", root)
+
+    assert m.entries == {}
+
+
+def test_entry_round_trips_through_json(tmp_path: Path) -> None:
+    root = tmp_path / "root"
+    root.mkdir()
+    st = _write_settled(root / "a.md", "hello\n")
+    m = load_manifest(tmp_path / "manifests", root)
+    (sha,) = digest_many([DigestRequest(m, st)])
+    m.save(["a.md"])
+
+    reloaded = load_manifest(tmp_path / "manifests", root)
+
+    assert reloaded.entries == {"a.md": ManifestEntry(st.size, st.mtime_ns, st.inode, sha)}
@@ -0,0 +1,157 @@
+import os
+import typing as ty
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from tools.vault import obsidian
+
+
+@pytest.fixture(autouse=True)
+def _isolated_registry(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> ty.Iterator[None]:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setattr(obsidian, "_obsidian_config", lambda: None)
+    obsidian._vault_index.cache_clear()
+    yield
+    obsidian._vault_index.cache_clear()
+
+
+def _fake_cli(vaults: dict[str, Path]) -> ty.Callable[..., str]:
+    def check_output(cmd: list[str], text: bool) -> str:
+        if cmd == ["obsidian-cli", "vaults"]:
+            return "\n".join(vaults)
+        name = cmd[1].removeprefix("vault=")
+        return f"name {name}\npath {vaults[name]}\n"
+
+    return check_output
+
+
+def test_vaults_resolved_once_per_process(tmp_path: Path) -> None:
+    cli = _fake_cli({"main": tmp_path / "main", "work": tmp_path / "work"})
+
+    with patch.object(obsidian.subprocess, "check_output", side_effect=cli) as check_output:
+        first = obsidian._xf_to_file_in_vault(tmp_path / "main/a.md")
+        second = obsidian._xf_to_file_in_vault(tmp_path / "work/sub/b.md")
+
+    assert first == obsidian._FileInVault("main", "a.md")
+    assert second == obsidian._FileInVault("work", "sub/b.md")
+    assert check_output.call_count == 3  # `vaults`, then one `vault` per vault
+
+
+def test_nested_vault_wins_over_enclosing_vault(tmp_path: Path) -> None:
+    cli = _fake_cli({"outer": tmp_path / "notes", "inner": tmp_path / "notes/shared"})
+
+    with patch.object(obsidian.subprocess, "check_output", side_effect=cli):
+        result = obsidian._xf_to_file_in_vault(tmp_path / "notes/shared/x.md")
+
+    assert result == obsidian._FileInVault("inner", "x.md")
+
+
+def test_path_outside_every_vault_raises(tmp_path: Path) -> None:
+    cli = _fake_cli({"main": tmp_path / "main"})
+
+    with (
+        patch.object(obsidian.subprocess, "check_output", side_effect=cli),
+        pytest.raises(obsidian._VaultNotFoundException),
+    ):
+        obsidian._xf_to_file_in_vault(tmp_path / "elsewhere/a.md")
+
+
+def test_persisted_registry_reused_until_obsidian_config_changes(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    config = tmp_path / "obsidian.json"
+    config.write_text("{}")
+    monkeypatch.setattr(obsidian, "_obsidian_config", lambda: config)
+    cli = _fake_cli({"main": tmp_path / "main"})
+    with patch.object(obsidian.subprocess, "check_output", side_effect=cli):
+        obsidian._vault_index()
+    obsidian._vault_index.cache_clear()
+
+    with patch.object(obsidian.subprocess, "check_output", side_effect=AssertionError("spawned")):
+        reused = obsidian._vault_index()
+    obsidian._vault_index.cache_clear()
+    os.utime(config, ns=(0, config.stat().st_mtime_ns + 1))
+    with patch.object(obsidian.subprocess, "check_output", side_effect=cli) as check_output:
+        obsidian._vault_index()
+
+    assert reused == {(tmp_path / "main").resolve(): obsidian._VaultInfo("main", tmp_path / "main")}
+    assert check_output.call_count == 2
+
+
+def test_open_many_without_cli_opens_nothing(tmp_path: Path) -> None:
+    with patch.object(obsidian.shutil, "which", return_value=None):
+        result = obsidian.obsidian_open_many([tmp_path / "a.md", tmp_path / "b.md"])
+
+    assert result == [False, False]
+
+
+@pytest.mark.parametrize(("platform", "spawns"), [("darwin", 1), ("linux", 3)])
+def test_open_many_spawns(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, platform: str, spawns: int
+) -> None:
+    monkeypatch.setattr(obsidian.sys, "platform", platform)
+    cli = _fake_cli({"main": tmp_path / "main"})
+    paths = [
+        tmp_path / "main/a.md",
+        tmp_path / "main/sub dir/b.md",
+        tmp_path / "main/c.md",
+        tmp_path / "x.md",
+    ]
+
+    with (
+        patch.object(obsidian.shutil, "which", return_value="/bin/obsidian-cli"),
+        patch.object(obsidian.subprocess, "check_output", side_effect=cli),
+        patch.object(obsidian.subprocess, "check_call") as check_call,
+    ):
+        result = obsidian.obsidian_open_many(paths)
+
+    assert result == [True, True, True, False]
+    assert check_call.call_count == spawns
+
+
+def test_open_many_on_macos_opens_every_uri_at_once(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(obsidian.sys, "platform", "darwin")
+    cli = _fake_cli({"main": tmp_path / "main"})
+
+    with (
+        patch.object(obsidian.shutil, "which", return_value="/bin/obsidian-cli"),
+        patch.object(obsidian.subprocess, "check_output", side_effect=cli),
+        patch.object(obsidian.subprocess, "check_call") as check_call,
+    ):
+        obsidian.obsidian_open_many([tmp_path / "main/a.md", tmp_path / "main/sub dir/b.md"])
+
+    check_call.assert_called_once_with(
+        [
+            "open",
+            "obsidian://open?vault=main&file=a.md&paneType=tab",
+            "obsidian://open?vault=main&file=sub%20dir%2Fb.md&paneType=tab",
+        ]
+    )
+
+
+def test_open_many_on_macos_splits_a_batch_too_big_for_one_argv(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(obsidian.sys, "platform", "darwin")
+    monkeypatch.setattr(obsidian, "_ARGV_BYTES", 200)
+    cli = _fake_cli({"main": tmp_path / "main"})
+    paths = [tmp_path / f"main/note {i}.md" for i in range(5)] + [tmp_path / "x.md"]
+
+    def check_call(cmd: list[str]) -> None:
+        if any("note%202" in uri for uri in cmd):
+            raise OSError(7, "Argument list too long")
+
+    with (
+        patch.object(obsidian.shutil, "which", return_value="/bin/obsidian-cli"),
+        patch.object(obsidian.subprocess, "check_output", side_effect=cli),
+        patch.object(obsidian.subprocess, "check_call", side_effect=check_call) as spawned,
+    ):
+        result = obsidian.obsidian_open_many(paths)
+
+    argvs = [c.args[0] for c in spawned.call_args_list]
+    assert [len(argv) - 1 for argv in argvs] == [2, 2, 1]
+    assert all(sum(len(a) + 9 for a in argv) <= 200 for argv in argvs)
+    assert result == [True, True, False, False, True, False]  # only the failed chunk's paths are False
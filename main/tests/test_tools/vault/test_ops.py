@@ -0,0 +1,75 @@
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from tools import fs
+from tools.vault.ops import CopyOp, FileOp, WriteOp, execute, raise_for_errors
+
+
+def test_execute_runs_copies_and_writes(tmp_path: Path) -> None:
+    src = tmp_path / "src.md"
+    src.write_text("copied\n")
+    ops: list[FileOp] = [
+        CopyOp(src, tmp_path / "out/a/b/copy.md"),
+        WriteOp(tmp_path / "out/a/written.md", "written\n"),
+    ]
+
+    report = execute(ops, max_workers=2)
+
+    assert (tmp_path / "out/a/b/copy.md").read_text() == "copied\n"
+    assert (tmp_path / "out/a/written.md").read_text() == "written\n"
+    assert [t.op for t in report.timings] == ops
+    assert report.errors == []
+
+
+def test_failures_do_not_stop_other_ops(tmp_path: Path) -> None:
+    src = tmp_path / "src.md"
+    src.write_text("x")
+    ops = [CopyOp(tmp_path / "missing.md", tmp_path / "out/a.md"), CopyOp(src, tmp_path / "out/b.md")]
+
+    report = execute(ops)
+
+    assert (tmp_path / "out/b.md").exists()
+    assert len(report.errors) == 1
+    with pytest.raises(ExceptionGroup, match="1 file operation\\(s\\) failed"):
+        raise_for_errors(report)
+
+
+def test_empty_plan_is_a_no_op() -> None:
+    report = execute([])
+
+    assert report.timings == []
+
+
+def test_writes_are_committed_with_one_fsync_pass(tmp_path: Path) -> None:
+    ops = [WriteOp(tmp_path / f"out/{i}.md", f"note {i}\n") for i in range(5)]
+
+    with patch("tools.fs._fsync", wraps=fs._fsync) as fsync:
+        report = execute(ops, max_workers=3)
+
+    assert report.errors == []
+    assert [(tmp_path / f"out/{i}.md").read_text() for i in range(5)] == [f"note {i}\n" for i in range(5)]
+    assert fsync.call_count == 5 + 1  # every file, then their one directory
+
+
+def test_failed_commit_is_reported(tmp_path: Path) -> None:
+    ops = [WriteOp(tmp_path / "a.md", "a\n"), WriteOp(tmp_path / "b.md", "b\n")]
+
+    with patch("tools.fs._fsync", side_effect=OSError("disk gone")):
+        report = execute(ops)
+
+    assert [str(e) for e in report.errors] == ["disk gone"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == []
+
+
+def test_target_that_cannot_be_created_is_reported(tmp_path: Path) -> None:
+    src = tmp_path / "src.md"
+    src.write_text("x")
+    unnamable = CopyOp(src, tmp_path / "out" / ("x" * 300))  # ENAMETOOLONG on touch
+    ops = [unnamable, CopyOp(src, tmp_path / "out/b.md")]
+
+    report = execute(ops)
+
+    assert (tmp_path / "out/b.md").read_text() == "x"
+    assert [t.op for t in report.timings if t.error] == [unnamable]
+    assert len(report.errors) == 1
@@ -0,0 +1,93 @@
+import re
+import typing as ty
+from pathlib import Path, PurePath
+
+import pytest
+from tools.vault.policy import Policy, PolicyError, Resolutions, Rule, load_policy, parse_policy
+
+
+def test_empty_document_is_default_policy() -> None:
+    assert parse_policy({}) == Policy()
+
+
+def test_first_matching_rule_overrides_only_what_it_sets() -> None:
+    policy = parse_policy(
+        {
+            "diverged_text": "source",
+            "rules": [
+                {"glob": "attachments/**", "diverged_binary": "dest"},
+                {"glob": "**/*.png", "diverged_binary": "skip", "dest_only": "skip"},
+            ],
+        }
+    )
+
+    resolved = policy.for_path(PurePath("attachments/img/a.png"))
+
+    assert resolved == Resolutions(diverged_text="source", diverged_binary="dest")
+
+
+@pytest.mark.parametrize(
+    "rel, expected",
+    [
+        ("notes/a.md", Resolutions()),
+        ("Daily/2026-10-18.md", Resolutions(diverged_text="dest")),
+        ("Daily/nested/x.md", Resolutions()),
+    ],
+)
+def test_glob_matches_full_relative_path(rel: str, expected: Resolutions) -> None:
+    policy = Policy(rules=(Rule("Daily/*.md", {"diverged_text": "dest"}),))
+
+    assert policy.for_path(PurePath(rel)) == expected
+
+
+def test_all_errors_reported_together() -> None:
+    with pytest.raises(PolicyError) as exc:
+        parse_policy(
+            {
+                "source_only": "delete",
+                "bogus": 1,
+                "rules": [{"diverged_text": "newest"}, {"glob": "x", "dest_only": "source"}],
+            }
+        )
+
+    message = str(exc.value)
+    assert "policy: source_only must be one of copy, skip, got 'delete'" in message
+    assert "policy: unknown key 'bogus'" in message
+    assert "rules[0]: glob is required" in message
+    assert "rules[1]: dest_only must be one of copy, skip, got 'source'" in message
+
+
+@pytest.mark.parametrize(
+    "rules, error",
+    [
+        (["*.md"], "rules[0]: expected a table, got '*.md'"),
+        ("*.md", "rules: expected an array of tables ([[rules]]), got '*.md'"),
+    ],
+)
+def test_rules_of_the_wrong_shape_are_policy_errors(rules: ty.Any, error: str) -> None:
+    with pytest.raises(PolicyError, match=re.escape(error)):
+        parse_policy({"rules": rules})
+
+
+def test_load_policy_reads_toml(tmp_path: Path) -> None:
+    path = tmp_path / "policy.toml"
+    path.write_text('diverged_binary = "source"\n\n[[rules]]\nglob = "*.md"\ndest_only = "skip"\n')
+
+    policy = load_policy(path)
+
+    assert policy == Policy(Resolutions(diverged_binary="source"), (Rule("*.md", {"dest_only": "skip"}),))
+
+
+def test_load_policy_missing_file_is_a_policy_error(tmp_path: Path) -> None:
+    path = tmp_path / "typo.toml"
+
+    with pytest.raises(PolicyError, match=f"can't read sync policy {re.escape(str(path))}: No such file"):
+        load_policy(path)
+
+
+def test_load_policy_toml_syntax_error_is_a_policy_error(tmp_path: Path) -> None:
+    path = tmp_path / "policy.toml"
+    path.write_text('diverged_binary = "source\n')
+
+    with pytest.raises(PolicyError, match=f"invalid sync policy {re.escape(str(path))}: .*line 1"):
+        load_policy(path)
@@ -1,14 +1,27 @@
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import typing as ty
 from pathlib import Path
 from unittest.mock import patch
 
+import pytest
+from tools import hashing
+from tools.vault import sync as sync_mod
+from tools.vault.policy import Policy, Resolutions, Rule
 from tools.vault.sync import (
+    BatchOutcome,
     SyncSummary,
     _classify,
     _discover_files,
-    _files_identical,
     _is_binary,
     _is_hidden,
     sync,
+    sync_batch,
+    watch,
 )
 
 
@@ -22,6 +35,14 @@ def _populate(root: Path, files: dict[str, str | bytes]) -> None:
             p.write_text(content)
 
 
+def _settle(root: Path) -> None:
+    """Backdate mtimes so the manifest doesn't treat files as racily fresh."""
+    settled_ns = 1_700_000_000 * 10**9
+    for p in root.rglob("*"):
+        if p.is_file():
+            os.utime(p, ns=(settled_ns, settled_ns))
+
+
 # ---------------------------------------------------------------------------
 # _is_hidden
 # ---------------------------------------------------------------------------
@@ -51,7 +72,8 @@ class TestDiscoverFiles:
         _populate(tmp_path, {"a.md": "a", "sub/b.md": "b"})
         found = _discover_files(tmp_path)
         assert set(found.keys()) == {Path("a.md"), Path("sub/b.md")}
-        assert all(p.is_absolute() for p in found.values())
+        assert found[Path("sub/b.md")].rel == "sub/b.md"
+        assert found[Path("sub/b.md")].size == 1
 
     def test_excludes_hidden(self, tmp_path: Path) -> None:
         _populate(tmp_path, {"visible.md": "v", ".hidden": "h", ".obs/x": "x"})
@@ -65,9 +87,18 @@ class TestDiscoverFiles:
         (tmp_path / "subdir").mkdir()
         assert _discover_files(tmp_path) == {}
 
+    def test_does_not_descend_into_hidden_directories(self, tmp_path: Path) -> None:
+        _populate(tmp_path, {"a.md": "a", ".git/objects/ab/cdef": "x"})
+
+        with patch("os.scandir", wraps=os.scandir) as scandir:
+            found = _discover_files(tmp_path)
+
+        assert set(found.keys()) == {Path("a.md")}
+        assert scandir.call_count == 1
+
 
 # ---------------------------------------------------------------------------
-# _is_binary / _files_identical
+# _is_binary / files_equal
 # ---------------------------------------------------------------------------
 
 
@@ -87,14 +118,14 @@ class TestFileHelpers:
         b = tmp_path / "b"
         a.write_text("same")
         b.write_text("same")
-        assert _files_identical(a, b)
+        assert hashing.files_equal(a, b)
 
     def test_different_files(self, tmp_path: Path) -> None:
         a = tmp_path / "a"
         b = tmp_path / "b"
         a.write_text("one")
         b.write_text("two")
-        assert not _files_identical(a, b)
+        assert not hashing.files_equal(a, b)
 
 
 # ---------------------------------------------------------------------------
@@ -160,6 +191,93 @@ class TestClassify:
         assert actions[0].dest == dst / "only.md"
 
 
+# ---------------------------------------------------------------------------
+# three-way merge against the base snapshot
+# ---------------------------------------------------------------------------
+
+_BASE_TEXT = "".join(f"line{i}\n" for i in range(10))
+
+
+def _agree_then_diverge(tmp_path: Path, *, source_text: str, dest_text: str) -> tuple[Path, Path, Path]:
+    src, dst, base_dir = tmp_path / "src", tmp_path / "dst", tmp_path / "base"
+    src.mkdir()
+    dst.mkdir()
+    _populate(src, {"f.md": _BASE_TEXT})
+    _populate(dst, {"f.md": _BASE_TEXT})
+    sync(src, dst, base_dir=base_dir)
+    _populate(src, {"f.md": source_text})
+    _populate(dst, {"f.md": dest_text})
+    return src, dst, base_dir
+
+
+class TestSyncThreeWay:
+    def test_non_overlapping_edits_merge_without_prompting(self, tmp_path: Path) -> None:
+        source_text = _BASE_TEXT.replace("line8\n", "SOURCE\n")
+        dest_text = _BASE_TEXT.replace("line1\n", "DEST\n")
+        src, dst, base_dir = _agree_then_diverge(tmp_path, source_text=source_text, dest_text=dest_text)
+
+        with patch("builtins.input", side_effect=AssertionError("prompted")):
+            summary = sync(src, dst, base_dir=base_dir)
+
+        expected = _BASE_TEXT.replace("line8\n", "SOURCE\n").replace("line1\n", "DEST\n")
+        assert (src / "f.md").read_text() == (dst / "f.md").read_text() == expected
+        assert summary.merged == 1
+
+    def test_only_overlapping_edit_is_prompted(self, tmp_path: Path) -> None:
+        source_text = _BASE_TEXT.replace("line4\n", "SOURCE\n").replace("line9\n", "TAIL\n")
+        dest_text = _BASE_TEXT.replace("line4\n", "DEST\n").replace("line0\n", "HEAD\n")
+        src, dst, base_dir = _agree_then_diverge(tmp_path, source_text=source_text, dest_text=dest_text)
+
+        with patch("builtins.input", return_value="s") as prompt:
+            sync(src, dst, base_dir=base_dir)
+
+        expected = (
+            _BASE_TEXT.replace("line0\n", "HEAD\n")
+            .replace("line4\n", "DEST\n")
+            .replace("line9\n", "TAIL\n")
+        )
+        assert prompt.call_count == 1
+        assert (src / "f.md").read_text() == (dst / "f.md").read_text() == expected
+
+    def test_merged_result_becomes_the_next_base(self, tmp_path: Path) -> None:
+        merged = _BASE_TEXT.replace("line8\n", "SOURCE\n")
+        src, dst, base_dir = _agree_then_diverge(tmp_path, source_text=merged, dest_text=_BASE_TEXT)
+        sync(src, dst, base_dir=base_dir)
+        _populate(src, {"f.md": merged.replace("line0\n", "AGAIN\n")})
+        _populate(dst, {"f.md": merged.replace("line9\n", "THEIRS\n")})
+
+        with patch("builtins.input", side_effect=AssertionError("prompted")):
+            sync(src, dst, base_dir=base_dir)
+
+        assert (dst / "f.md").read_text() == merged.replace("line0\n", "AGAIN\n").replace(
+            "line9\n", "THEIRS\n"
+        )
+
+    def test_batch_merges_cleanly_and_leaves_conflicts_to_policy(self, tmp_path: Path) -> None:
+        source_text = _BASE_TEXT.replace("line8\n", "SOURCE\n")
+        dest_text = _BASE_TEXT.replace("line1\n", "DEST\n")
+        src, dst, base_dir = _agree_then_diverge(tmp_path, source_text=source_text, dest_text=dest_text)
+        _populate(src, {"c.md": "source\n"})
+        _populate(dst, {"c.md": "dest\n"})
+
+        report = sync_batch(src, dst, Policy(), base_dir=base_dir)
+
+        assert (src / "f.md").read_text() == (dst / "f.md").read_text()
+        assert (src / "c.md").read_text() == "source\n"
+        assert report.summary == SyncSummary(merged=1, skipped=1)
+
+    def test_dry_run_does_not_advance_base(self, tmp_path: Path) -> None:
+        src, dst, base_dir = tmp_path / "src", tmp_path / "dst", tmp_path / "base"
+        src.mkdir()
+        dst.mkdir()
+        _populate(src, {"f.md": _BASE_TEXT})
+        _populate(dst, {"f.md": _BASE_TEXT})
+
+        sync(src, dst, dry_run=True, base_dir=base_dir)
+
+        assert not base_dir.exists()
+
+
 # ---------------------------------------------------------------------------
 # sync() end-to-end
 # ---------------------------------------------------------------------------
@@ -353,6 +471,26 @@ class TestSyncInteractive:
 
         assert (dst / "a/b/c.md").read_text() == "deep\n"
 
+    def test_failed_copy_is_counted_and_the_rest_applied(self, tmp_path: Path) -> None:
+        src = tmp_path / "src"
+        dst = tmp_path / "dst"
+        src.mkdir()
+        dst.mkdir()
+        _populate(src, {"good.md": "good\n", "bad.md": "bad\n"})
+        copy2 = shutil.copy2
+
+        def flaky_copy2(s: Path, d: Path) -> object:
+            if Path(d).name == "bad.md":
+                raise OSError("disk gone")
+            return copy2(s, d)
+
+        with patch("builtins.input", return_value="y"), patch("shutil.copy2", flaky_copy2):
+            summary = sync(src, dst, base_dir=tmp_path / "base")
+
+        assert (dst / "good.md").read_text() == "good\n"
+        assert summary.copied_to_dest == 1
+        assert summary.failed == 1
+
     def test_hidden_files_ignored(self, tmp_path: Path) -> None:
         src = tmp_path / "src"
         dst = tmp_path / "dst"
@@ -367,3 +505,271 @@ class TestSyncInteractive:
         # only the dest_only visible.md should show up
         assert summary.copied_to_source == 1
         assert summary.copied_to_dest == 0
+
+
+class TestSyncManifest:
+    def test_repeat_run_reads_no_file_bodies(self, tmp_path: Path) -> None:
+        src = tmp_path / "src"
+        dst = tmp_path / "dst"
+        manifests = tmp_path / "manifests"
+        src.mkdir()
+        dst.mkdir()
+        files = {"a.md": "same\n", "sub/b.png": b"\x89PNG\x00same"}
+        _populate(src, files)
+        _populate(dst, files)
+        _settle(src)
+        _settle(dst)
+        sync(src, dst, manifest_dir=manifests)
+
+        with (
+            patch.object(hashing, "file_digest", side_effect=AssertionError("read a file body")),
+            patch.object(hashing, "files_equal", side_effect=AssertionError("compared bodies")),
+        ):
+            summary = sync(src, dst, manifest_dir=manifests)
+
+        assert summary == SyncSummary(0, 0, 0, 2)
+
+    def test_only_changed_file_is_rehashed(self, tmp_path: Path) -> None:
+        src = tmp_path / "src"
+        dst = tmp_path / "dst"
+        manifests = tmp_path / "manifests"
+        src.mkdir()
+        dst.mkdir()
+        files = {"a.md": "same\n", "b.md": "also same\n"}
+        _populate(src, files)
+        _populate(dst, files)
+        _settle(src)
+        _settle(dst)
+        sync(src, dst, manifest_dir=manifests)
+        (dst / "b.md").write_text("also SAME\n")
+
+        with patch.object(hashing, "file_digest", wraps=hashing.file_digest) as file_digest:
+            summary = sync(src, dst, manifest_dir=manifests, dry_run=True)
+
+        assert file_digest.call_count == 1  # only dest's b.md; its source twin is still answered from stat
+        assert summary.skipped == 0 and summary.merged == 1
+
+    def test_size_mismatch_is_diverged_without_hashing(self, tmp_path: Path) -> None:
+        src = tmp_path / "src"
+        dst = tmp_path / "dst"
+        src.mkdir()
+        dst.mkdir()
+        _populate(src, {"a.md": "short\n"})
+        _populate(dst, {"a.md": "much longer\n"})
+
+        with patch.object(hashing, "file_digest", side_effect=AssertionError("read a file body")):
+            summary = sync(src, dst, manifest_dir=tmp_path / "manifests", dry_run=True)
+
+        assert summary.merged == 1
+
+    def test_rehash_reads_every_shared_file(self, tmp_path: Path) -> None:
+        src = tmp_path / "src"
+        dst = tmp_path / "dst"
+        manifests = tmp_path / "manifests"
+        src.mkdir()
+        dst.mkdir()
+        _populate(src, {"a.md": "same\n"})
+        _populate(dst, {"a.md": "same\n"})
+        _settle(src)
+        _settle(dst)
+        sync(src, dst, manifest_dir=manifests)
+
+        with patch.object(hashing, "file_digest", wraps=hashing.file_digest) as file_digest:
+            sync(src, dst, manifest_dir=manifests, rehash=True)
+
+        assert file_digest.call_count == 2
+
+
+class TestSyncBatch:
+    def test_applies_policy_without_prompting(self, tmp_path: Path) -> None:
+        src = tmp_path / "src"
+        dst = tmp_path / "dst"
+        src.mkdir()
+        dst.mkdir()
+        _populate(src, {"restore.md": "mine\n", "f.md": "source\n", "same.md": "same\n"})
+        _populate(dst, {"pickup.md": "theirs\n", "f.md": "dest\n", "same.md": "same\n"})
+
+        with patch("builtins.input", side_effect=AssertionError("prompted")):
+            report = sync_batch(src, dst, Policy(Resolutions(diverged_text="source")))
+
+        assert (dst / "restore.md").read_text() == "mine\n"
+        assert (src / "pickup.md").read_text() == "theirs\n"
+        assert (dst / "f.md").read_text() == "source\n"
+        assert report.summary == SyncSummary(copied_to_dest=2, copied_to_source=1)
+        assert report.identical == 1
+
+    def test_newest_mtime_wins_for_diverged_binary(self, tmp_path: Path) -> None:
+        src = tmp_path / "src"
+        dst = tmp_path / "dst"
+        src.mkdir()
+        dst.mkdir()
+        _populate(src, {"img.png": b"\x89PNG\x00source"})
+        _populate(dst, {"img.png": b"\x89PNG\x00dest"})
+        os.utime(src / "img.png", ns=(1, 1_000))
+        os.utime(dst / "img.png", ns=(1, 2_000))
+
+        report = sync_batch(src, dst, Policy())
+
+        assert (src / "img.png").read_bytes() == b"\x89PNG\x00dest"
+        assert report.outcomes == [BatchOutcome(Path("img.png"), "diverged", "copied_to_source")]
+
+    def test_glob_rule_overrides_default(self, tmp_path: Path) -> None:
+        src = tmp_path / "src"
+        dst = tmp_path / "dst"
+        src.mkdir()
+        dst.mkdir()
+        _populate(dst, {"scratch/tmp.md": "x\n", "keep.md": "y\n"})
+        policy = Policy(rules=(Rule("scratch/**", {"dest_only": "skip"}),))
+
+        report = sync_batch(src, dst, policy)
+
+        assert not (src / "scratch/tmp.md").exists()
+        assert (src / "keep.md").exists()
+        assert report.summary == SyncSummary(copied_to_source=1, skipped=1)
+
+    def test_dry_run_decides_but_does_not_copy(self, tmp_path: Path) -> None:
+        src = tmp_path / "src"
+        dst = tmp_path / "dst"
+        src.mkdir()
+        dst.mkdir()
+        _populate(src, {"restore.md": "mine\n"})
+
+        report = sync_batch(src, dst, Policy(), dry_run=True)
+
+        assert not (dst / "restore.md").exists()
+        assert report.summary == SyncSummary(copied_to_dest=1)
+
+    def test_report_json_has_summary_shape(self, tmp_path: Path) -> None:
+        src = tmp_path / "src"
+        dst = tmp_path / "dst"
+        src.mkdir()
+        dst.mkdir()
+        _populate(src, {"a/restore.md": "mine\n"})
+
+        report = sync_batch(src, dst, Policy(), dry_run=True)
+
+        assert json.loads(report.to_json()) == {
+            "copied_to_dest": 1,
+            "copied_to_source": 0,
+            "merged": 0,
+            "skipped": 0,
+            "failed": 0,
+            "identical": 0,
+            "files": [{"path": "a/restore.md", "kind": "source_only", "result": "copied_to_dest"}],
+        }
+
+
+# ---------------------------------------------------------------------------
+# watch
+# ---------------------------------------------------------------------------
+
+
+def _eventually(condition: ty.Callable[[], bool], timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+class TestSyncWatch:
+    @pytest.mark.parametrize("poll", [True, False])
+    def test_restores_a_deleted_file_and_picks_up_a_new_one(self, tmp_path: Path, poll: bool) -> None:
+        src = tmp_path / "src"
+        dst = tmp_path / "dst"
+        src.mkdir()
+        dst.mkdir()
+        _populate(src, {"keep.md": "mine\n", "restore.md": "restore me\n"})
+        _populate(dst, {"keep.md": "mine\n"})
+        stop = threading.Event()
+        watcher = threading.Thread(
+            target=watch,
+            args=(src, dst, Policy()),
+            kwargs={"poll": poll, "quiet": 0.1, "poll_interval": 0.1, "stop": stop},
+        )
+        watcher.start()
+
+        try:
+            assert _eventually(lambda: (dst / "restore.md").exists())
+            (dst / "restore.md").unlink()
+            _populate(dst, {"new/from-coworker.md": "theirs\n"})
+
+            assert _eventually(lambda: (dst / "restore.md").exists())
+            assert _eventually(lambda: (src / "new/from-coworker.md").exists())
+        finally:
+            stop.set()
+            watcher.join()
+
+        assert (src / "new/from-coworker.md").read_text() == "theirs\n"
+
+    def test_survives_a_file_vanishing_before_it_is_classified(self, tmp_path: Path) -> None:
+        src = tmp_path / "src"
+        dst = tmp_path / "dst"
+        src.mkdir()
+        dst.mkdir()
+        real_classify = sync_mod._classify
+        vanished = threading.Event()
+
+        def racing_classify(source_files: ty.Any, *args: ty.Any) -> ty.Any:
+            # the editor renames its file away just as we get to reading it
+            if Path("gone.md") in source_files and not vanished.is_set():
+                vanished.set()
+                (dst / "gone.md").unlink()
+            return real_classify(source_files, *args)
+
+        _populate(src, {"gone.md": "mine\n", "other.md": "other\n"})
+        _populate(dst, {"gone.md": "them\n"})
+        stop = threading.Event()
+        watcher = threading.Thread(
+            target=watch,
+            args=(src, dst, Policy()),
+            kwargs={"poll": True, "quiet": 0.1, "poll_interval": 0.1, "stop": stop},
+        )
+        with patch.object(sync_mod, "_classify", side_effect=racing_classify):
+            watcher.start()
+            try:
+                assert _eventually(lambda: (dst / "other.md").exists())
+                assert _eventually(lambda: (dst / "gone.md").exists())
+                assert vanished.is_set()
+                assert watcher.is_alive()
+            finally:
+                stop.set()
+                watcher.join()
+
+        assert (dst / "gone.md").read_text() == "mine\n"
+
+    @pytest.mark.skipif(sys.platform != "linux", reason="needs inotify's directory events")
+    def test_survives_a_directory_vanishing_before_it_is_walked(self, tmp_path: Path) -> None:
+        src = tmp_path / "src"
+        dst = tmp_path / "dst"
+        src.mkdir()
+        dst.mkdir()
+        real_walk = sync_mod.walk
+        vanished = threading.Event()
+
+        def racing_walk(root: Path, **kwargs: ty.Any) -> ty.Any:
+            # `git checkout` removes the directory just after its event
+            if root.name == "sub" and not vanished.is_set():
+                vanished.set()
+                shutil.rmtree(root)
+            return real_walk(root, **kwargs)
+
+        stop = threading.Event()
+        watcher = threading.Thread(
+            target=watch, args=(src, dst, Policy()), kwargs={"quiet": 0.1, "stop": stop}
+        )
+        with patch.object(sync_mod, "walk", side_effect=racing_walk):
+            watcher.start()
+            try:
+                time.sleep(0.3)
+                _populate(src, {"sub/note.md": "in a doomed directory\n"})
+                assert _eventually(vanished.is_set)
+                _populate(src, {"after.md": "still watching\n"})
+                assert _eventually(lambda: (dst / "after.md").exists())
+                assert watcher.is_alive()
+            finally:
+                stop.set()
+                watcher.join()
+
+        assert not (dst / "sub").exists()
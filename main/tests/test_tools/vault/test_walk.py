@@ -0,0 +1,115 @@
+import os
+import shutil
+import typing as ty
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from tools.vault.walk import WalkedFile, stat_file, walk, walk_many
+
+
+def _populate(root: Path, rels: list[str]) -> None:
+    for rel in rels:
+        p = root / rel
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(rel)
+
+
+def test_walk_returns_posix_relpaths_with_stat(tmp_path: Path) -> None:
+    _populate(tmp_path, ["a.md", "sub/deeper/b.md"])
+
+    files = walk(tmp_path)
+
+    assert sorted(files) == [stat_file(tmp_path, "a.md"), stat_file(tmp_path, "sub/deeper/b.md")]
+    st = (tmp_path / "a.md").stat()
+    assert stat_file(tmp_path, "a.md") == WalkedFile("a.md", st.st_size, st.st_mtime_ns, st.st_ino)
+
+
+def test_walk_skips_hidden_files_and_directories(tmp_path: Path) -> None:
+    _populate(tmp_path, ["a.md", ".DS_Store", ".obsidian/workspace.json", "sub/.trash/old.md"])
+
+    files = walk(tmp_path)
+
+    assert [f.rel for f in files] == ["a.md"]
+
+
+def test_walk_include_hidden(tmp_path: Path) -> None:
+    _populate(tmp_path, ["a.md", ".DS_Store", ".obsidian/workspace.json"])
+
+    files = walk(tmp_path, include_hidden=True)
+
+    assert sorted(f.rel for f in files) == [".DS_Store", ".obsidian/workspace.json", "a.md"]
+
+
+def test_walk_include_filters_on_name(tmp_path: Path) -> None:
+    _populate(tmp_path, ["keep.md", "sub/keep too.md", "drop.png"])
+
+    files = walk(tmp_path, include=lambda name: name.endswith(".md"))
+
+    assert sorted(f.rel for f in files) == ["keep.md", "sub/keep too.md"]
+
+
+def test_walk_does_not_follow_directory_symlinks(tmp_path: Path) -> None:
+    _populate(tmp_path / "real", ["a.md"])
+    (tmp_path / "root").mkdir()
+    os.symlink(tmp_path / "real", tmp_path / "root" / "link", target_is_directory=True)
+
+    files = walk(tmp_path / "root")
+
+    assert files == []
+
+
+class _Racing:
+    """os.scandir, except `gone` is deleted just before it's listed or statted."""
+
+    def __init__(self, gone: Path) -> None:
+        self.gone = gone
+        self.scandir = os.scandir
+
+    def __call__(self, path: str) -> ty.Any:
+        if path == os.fspath(self.gone):
+            shutil.rmtree(self.gone)
+        return _RacingEntries(self.scandir(path), self.gone)
+
+
+class _RacingEntries:
+    def __init__(self, entries: ty.Any, gone: Path) -> None:
+        self.entries = entries
+        self.gone = gone
+
+    def __enter__(self) -> ty.Self:
+        return self
+
+    def __iter__(self) -> ty.Iterator[os.DirEntry[str]]:
+        for entry in self.entries:
+            if entry.path == os.fspath(self.gone) and self.gone.is_file():
+                self.gone.unlink()
+            yield entry
+
+    def __exit__(self, *exc: object) -> None:
+        self.entries.__exit__(*exc)
+
+
+@pytest.mark.parametrize("gone", ["sub", "sub/gone.md"])
+def test_walk_skips_what_vanishes_mid_walk(tmp_path: Path, gone: str) -> None:
+    _populate(tmp_path, ["a.md", "sub/gone.md"])
+
+    with patch("tools.vault.walk.os.scandir", _Racing(tmp_path / gone)):
+        files = walk(tmp_path)
+
+    assert [f.rel for f in files] == ["a.md"]
+
+
+def test_walk_of_a_missing_root_raises(tmp_path: Path) -> None:
+    with pytest.raises(FileNotFoundError):
+        walk(tmp_path / "missing")
+
+
+def test_walk_many_preserves_root_order(tmp_path: Path) -> None:
+    _populate(tmp_path / "one", ["1.md"])
+    _populate(tmp_path / "two", ["2.md", "22.md"])
+
+    one, two = walk_many([tmp_path / "one", tmp_path / "two"])
+
+    assert [f.rel for f in one] == ["1.md"]
+    assert sorted(f.rel for f in two) == ["2.md", "22.md"]
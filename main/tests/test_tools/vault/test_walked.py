@@ -0,0 +1,164 @@
+from datetime import date
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from tools.vault import walked
+
+_LOG = """2025-12-01: 1.5 3
+a note to self...
+2025-12-08: 2
+"""
+
+_WRITTEN = """2025-12-01: (04.50)  1.50 3.00
+a note to self...
+---week---:  04.50
+2025-12-08: (02.00)  2.00
+---week---:  02.00
+"""
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+
+
+def _entry(iso: str, total: float) -> walked._Entry:
+    return walked._Entry(date.fromisoformat(iso), total, [total], [])
+
+
+def test_weeks_sum_their_entries_and_cover_empty_weeks() -> None:
+    entries = [_entry("2025-12-01", 1.0), _entry("2025-12-03", 2.0), _entry("2025-12-17", 4.0)]
+
+    weeks = list(walked._yield_weeks(entries))
+
+    assert [(w.start.isoformat(), w.total) for w in weeks] == [
+        ("2025-12-01", 3.0),
+        ("2025-12-08", 0.0),
+        ("2025-12-15", 4.0),
+    ]
+
+
+def test_writes_day_and_week_sums(tmp_path: Path) -> None:
+    log = tmp_path / "walked.md"
+    log.write_text(_LOG)
+
+    walked.main(log)
+
+    assert log.read_text() == _WRITTEN
+
+
+def test_unchanged_log_is_neither_reparsed_nor_rewritten(tmp_path: Path) -> None:
+    log = tmp_path / "walked.md"
+    log.write_text(_LOG)
+    walked.main(log)
+
+    with (
+        patch.object(walked, "_parse_entry", side_effect=AssertionError("parsed")),
+        patch("tools.fs.AtomicWrites.commit", side_effect=AssertionError("rewrote")),
+    ):
+        walked.main(log)
+
+    assert log.read_text() == _WRITTEN
+
+
+def test_only_appended_lines_are_parsed(tmp_path: Path) -> None:
+    log = tmp_path / "walked.md"
+    log.write_text(_LOG)
+    walked.main(log)
+    with log.open("a") as f:
+        f.write("2025-12-09: 1\n")
+
+    with patch.object(walked, "_parse_entry", wraps=walked._parse_entry) as parse:
+        walked.main(log)
+
+    assert parse.call_count == 2  # the appended line, then its reformatted version for the cache
+    assert log.read_text().endswith("2025-12-09: (01.00)  1.00\n---week---:  03.00\n")
+
+
+def test_edit_before_the_cached_offset_reparses_everything(tmp_path: Path) -> None:
+    log = tmp_path / "walked.md"
+    log.write_text(_LOG)
+    walked.main(log)
+
+    log.write_text(log.read_text().replace("1.50 3.00", "1.50 1.00"))
+    walked.main(log)
+
+    assert log.read_text().startswith(
+        "2025-12-01: (02.50)  1.50 1.00\na note to self...\n---week---:  02.50\n"
+    )
+
+
+_STATS_LOG = """2024-12-30: 1
+2024-12-31: 2
+2025-01-01: 3 1
+a note to self...
+2025-01-02: 0.5
+2025-01-05: 10
+"""
+
+
+def test_stats_rollups_windows_and_streaks() -> None:
+    cols = walked._columns(_STATS_LOG)
+
+    stats = walked._stats(cols, today=date(2025, 1, 6))
+
+    assert list(cols.ordinals) == [
+        date.fromisoformat(d).toordinal()
+        for d in ("2024-12-30", "2024-12-31", "2025-01-01", "2025-01-02", "2025-01-05")
+    ]
+    assert stats.months == [(date(2024, 12, 1), 3.0), (date(2025, 1, 1), 14.5)]
+    assert stats.years == [(2024, 3.0), (2025, 14.5)]
+    seven, thirty, _ = stats.windows
+    assert (seven.current, seven.best, seven.best_end) == (16.5, 17.5, date(2025, 1, 5))
+    assert thirty.current == 17.5  # everything
+    assert stats.streaks == walked._Streaks(current=1, best=4, best_end=date(2025, 1, 2))
+
+
+@pytest.mark.parametrize(
+    "today, current",
+    [
+        (date(2025, 1, 2), 4),  # walked today
+        (date(2025, 1, 3), 4),  # not yet today: yesterday's streak still counts
+        (date(2025, 1, 4), 0),
+    ],
+)
+def test_current_streak(today: date, current: int) -> None:
+    stats = walked._stats(walked._columns(_STATS_LOG), today)
+
+    assert stats.streaks.current == current
+
+
+def test_best_window_over_history_longer_than_it() -> None:
+    log = "\n".join(f"2020-01-{d:02}: {d}" for d in range(1, 31))
+
+    seven = walked._stats(walked._columns(log), today=date(2025, 1, 1)).windows[0]
+
+    assert (seven.current, seven.best, seven.best_end) == (0.0, sum(range(24, 31)), date(2020, 1, 30))
+
+
+def test_best_window_over_history_shorter_than_it() -> None:
+    log = "2025-01-01: 2\n2025-01-03: 3\n"
+
+    thirty = walked._stats(walked._columns(log), today=date(2025, 1, 3)).windows[1]
+
+    assert (thirty.current, thirty.best, thirty.best_end) == (5.0, 5.0, date(2025, 1, 3))
+
+
+def test_today_before_the_first_entry() -> None:
+    log = "2025-01-01: 1\n2025-01-02: 1\n2025-01-03: 1\n"
+
+    stats = walked._stats(walked._columns(log), today=date(2024, 12, 30))
+
+    assert stats.streaks == walked._Streaks(current=0, best=3, best_end=date(2025, 1, 3))
+    assert [w.current for w in stats.windows] == [0.0, 0.0, 0.0]
+    assert stats.windows[0].best == 3.0
+
+
+def test_entries_out_of_order_are_summed_by_day() -> None:
+    log = "2025-01-03: 3\n2025-01-01: 1\n2025-01-03: 0.5\n"
+
+    stats = walked._stats(walked._columns(log), today=date(2025, 1, 3))
+
+    assert stats.months == [(date(2025, 1, 1), 4.5)]
+    assert stats.streaks == walked._Streaks(current=1, best=1, best_end=date(2025, 1, 1))
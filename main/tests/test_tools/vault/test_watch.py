@@ -0,0 +1,155 @@
+import ctypes
+import errno
+import os
+import threading
+import time
+import typing as ty
+from pathlib import Path
+
+import pytest
+from tools.vault.watch import Change, InotifyWatcher, _libc, debounced, open_watcher
+
+_HAS_INOTIFY = _libc() is not None
+
+
+@pytest.fixture(params=["poll", "inotify"])
+def poll(request: pytest.FixtureRequest) -> bool:
+    if request.param == "inotify" and not _HAS_INOTIFY:
+        pytest.skip("inotify not available")
+    return bool(request.param == "poll")
+
+
+def test_reports_created_modified_and_deleted_files(tmp_path: Path, poll: bool) -> None:
+    (tmp_path / "old.md").write_text("old\n")
+    (tmp_path / "edit.md").write_text("v1\n")
+    watcher = open_watcher([tmp_path], poll=poll, poll_interval=0.05)
+
+    (tmp_path / "new.md").write_text("new\n")
+    (tmp_path / "edit.md").write_text("version 2\n")
+    (tmp_path / "old.md").unlink()
+    changes = debounced(watcher, quiet=0.2, timeout=2)
+    watcher.close()
+
+    assert {c.rel for c in changes} >= {"new.md", "edit.md", "old.md"}
+
+
+def test_ignores_hidden_entries(tmp_path: Path, poll: bool) -> None:
+    (tmp_path / ".obsidian").mkdir()
+    watcher = open_watcher([tmp_path], poll=poll, poll_interval=0.05)
+
+    (tmp_path / ".obsidian/workspace.json").write_text("{}")
+    (tmp_path / ".DS_Store").write_text("x")
+    changes = watcher.changes(0.3)
+    watcher.close()
+
+    assert changes == set()
+
+
+@pytest.mark.skipif(not _HAS_INOTIFY, reason="inotify not available")
+def test_inotify_follows_new_directories(tmp_path: Path) -> None:
+    watcher = open_watcher([tmp_path])
+    (tmp_path / "sub").mkdir()
+    debounced(watcher, quiet=0.1, timeout=2)
+
+    (tmp_path / "sub/note.md").write_text("hi\n")
+    changes = debounced(watcher, quiet=0.1, timeout=2)
+    watcher.close()
+
+    assert Change(tmp_path, "sub/note.md") in changes
+
+
+def test_debounce_gathers_a_burst_into_one_batch(tmp_path: Path, poll: bool) -> None:
+    watcher = open_watcher([tmp_path], poll=poll, poll_interval=0.05)
+
+    def burst() -> None:
+        for i in range(5):
+            (tmp_path / f"{i}.md").write_text("x\n")
+            time.sleep(0.05)
+
+    writer = threading.Thread(target=burst)
+    writer.start()
+    changes = debounced(watcher, quiet=0.3, timeout=2)
+    writer.join()
+    watcher.close()
+
+    assert {c.rel for c in changes} == {f"{i}.md" for i in range(5)}
+
+
+def test_timeout_without_changes_returns_empty(tmp_path: Path, poll: bool) -> None:
+    watcher = open_watcher([tmp_path], poll=poll, poll_interval=0.05)
+
+    start = time.monotonic()
+    changes = debounced(watcher, timeout=0.2)
+    watcher.close()
+
+    assert changes == set()
+    assert time.monotonic() - start < 1
+
+
+@pytest.mark.skipif(not _HAS_INOTIFY, reason="inotify not available")
+def test_inotify_reports_undecodable_names_as_scandir_does(tmp_path: Path) -> None:
+    watcher = open_watcher([tmp_path])
+
+    fd = os.open(os.fsencode(tmp_path) + b"/caf\xe9.md", os.O_CREAT | os.O_WRONLY)
+    os.close(fd)
+    changes = debounced(watcher, quiet=0.1, timeout=2)
+    watcher.close()
+
+    assert {c.rel for c in changes} == {entry.name for entry in os.scandir(tmp_path)}
+
+
+@pytest.mark.skipif(not _HAS_INOTIFY, reason="inotify not available")
+@pytest.mark.parametrize("to", ["moved", "deeper/moved"])
+def test_inotify_follows_renamed_directories(tmp_path: Path, to: str) -> None:
+    (tmp_path / "sub/inner").mkdir(parents=True)
+    (tmp_path / "deeper").mkdir()
+    watcher = open_watcher([tmp_path])
+    (tmp_path / "sub").rename(tmp_path / to)
+    debounced(watcher, quiet=0.1, timeout=2)
+
+    (tmp_path / to / "inner/note.md").write_text("hi\n")
+    changes = debounced(watcher, quiet=0.1, timeout=2)
+    watcher.close()
+
+    assert {c.rel for c in changes} == {f"{to}/inner/note.md"}
+
+
+@pytest.mark.skipif(not _HAS_INOTIFY, reason="inotify not available")
+def test_inotify_forgets_directories_moved_out_of_the_tree(tmp_path: Path) -> None:
+    (tmp_path / "tree/sub").mkdir(parents=True)
+    watcher = open_watcher([tmp_path / "tree"])
+    (tmp_path / "tree/sub").rename(tmp_path / "elsewhere")
+    debounced(watcher, quiet=0.1, timeout=2)
+
+    (tmp_path / "elsewhere/note.md").write_text("hi\n")
+    changes = debounced(watcher, quiet=0.1, timeout=0.5)
+    watcher.close()
+
+    assert changes == set()
+
+
+@pytest.mark.skipif(not _HAS_INOTIFY, reason="inotify not available")
+def test_inotify_reports_directories_it_cannot_watch(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    for sub in ("a", "b"):
+        (tmp_path / sub).mkdir()
+    found = _libc()
+    assert found
+    libc: ctypes.CDLL = found
+
+    class OutOfWatches:
+        inotify_init1 = libc.inotify_init1
+
+        def inotify_add_watch(self, fd: int, path: bytes, mask: int) -> int:
+            if path == os.fsencode(tmp_path):
+                return int(libc.inotify_add_watch(fd, path, mask))
+            ctypes.set_errno(errno.ENOSPC)
+            return -1
+
+    watcher = InotifyWatcher([tmp_path], ty.cast(ctypes.CDLL, OutOfWatches()))
+    watcher.close()
+
+    err = capsys.readouterr().err
+    assert err.count("warning:") == 1  # once, not once per directory
+    assert "max_user_watches" in err